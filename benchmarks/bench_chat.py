@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""End-to-end MCPClient.chat benchmark against a local fake Ollama server."""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+from pathlib import Path
+
+from common import print_table, summarize, write_results
+from fake_ollama import FakeOllamaServer
+
+
+async def run(args):
+    # Imported late: src.config reads OLLAMA_HOST at import time
+    from src.mcp_client import MCPClient
+    from src.metrics import REGISTRY
+
+    client = MCPClient(use_cache=False)
+    results = {}
+    try:
+        await client.connect()
+        cases = [
+            ("chat/tool_call", "What is 2 + 2?"),
+            ("chat/plain", "Say hello, no tools needed."),
+        ]
+        for case, prompt in cases:
+            print(f"Running {case}...")
+            samples = []
+            for i in range(args.warmup + args.turns):
+                client.reset_conversation()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    await client.chat(prompt)
+                if i >= args.warmup:
+                    samples.append(time.perf_counter() - start)
+            results[case] = summarize(samples)
+        breakdown = {
+            name: metric["series"] for name, metric in REGISTRY.snapshot().items()
+            if name.startswith("mcp_client_")
+        }
+    finally:
+        await client.close()
+    return results, breakdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=100, help="Timed chat turns per case")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed turns before each case")
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="Seconds of simulated generation time per Ollama request")
+    parser.add_argument("--server-log-level", default="WARNING", help="LOG_LEVEL for client and server")
+    parser.add_argument("--output", type=Path, help="Results file (default benchmarks/results/chat.json)")
+    args = parser.parse_args()
+
+    fake = FakeOllamaServer(latency=args.llm_latency).start()
+    os.environ["OLLAMA_HOST"] = fake.url
+    os.environ["LOG_LEVEL"] = args.server_log_level
+    try:
+        results, breakdown = asyncio.run(run(args))
+    finally:
+        fake.stop()
+
+    print_table(results)
+    params = {k: str(v) for k, v in vars(args).items()}
+    results["client_breakdown"] = breakdown
+    write_results("chat", params, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Server cold-start benchmark: time from spawn to the first `initialize` response.
+
+Also runs the server under `python -X importtime` and reports the slowest
+top-level imports, so the cost of each dependency can be tracked. Most of a
+spawn is the interpreter and the MCP SDK import chain (pydantic models, httpx),
+which this project can't shrink, so the budget that matters is what `src.*`
+adds on top: the cumulative import time of top-level `src.*` modules,
+including the standard library modules they pull in first. With --budget-ms /
+--import-budget-ms the script exits non-zero when the median time to
+initialize, or the src.* import time, goes over budget. There is no default
+budget: both numbers vary a lot between machines (and between runs on a busy
+one), so pick one from runs on the machine that enforces it, or compare
+results files with compare.py.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from common import PROJECT_ROOT, summarize, write_results
+
+SERVER_SCRIPT = PROJECT_ROOT / "src" / "mcp_server.py"
+# What the server needs from the SDK; the floor for any server spawn
+SDK_IMPORTS = "import mcp.server, mcp.server.stdio, mcp.types"
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {},
+        "clientInfo": {"name": "bench-startup", "version": "0"}
+    }
+}
+
+
+def time_to_initialize(env: Dict[str, str]) -> float:
+    """Spawn the server over STDIO and return seconds until the initialize response arrives."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(SERVER_SCRIPT)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env
+    )
+    try:
+        process.stdin.write((json.dumps(INITIALIZE) + "\n").encode("utf-8"))
+        process.stdin.flush()
+        line = process.stdout.readline()
+        elapsed = time.perf_counter() - started
+        if not line or json.loads(line).get("id") != 1:
+            raise RuntimeError(f"Unexpected initialize response: {line[:200]!r}")
+        return elapsed
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def import_profile(env: Dict[str, str]) -> List[Tuple[str, int, int, int]]:
+    """
+    Run the server under -X importtime until it answers initialize.
+
+    Returns:
+        (module, self_us, cumulative_us, depth) for every import
+    """
+    # importtime output can exceed the pipe buffer before initialize is answered
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            [sys.executable, "-X", "importtime", str(SERVER_SCRIPT)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr, env=env
+        )
+        process.stdin.write((json.dumps(INITIALIZE) + "\n").encode("utf-8"))
+        process.stdin.flush()
+        process.stdout.readline()
+        process.stdin.close()
+        process.wait(timeout=30)
+        stderr.seek(0)
+        output = stderr.read().decode("utf-8", "replace")
+
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Timed server spawns")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to show")
+    parser.add_argument("--budget-ms", type=float, help="Fail if median time to initialize exceeds this")
+    parser.add_argument("--import-budget-ms", type=float,
+                        help="Fail if importing src.* modules takes longer than this")
+    parser.add_argument("--output", type=Path, help="Results file (default benchmarks/results/startup.json)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    # Warm the OS page cache and bytecode caches so runs are comparable
+    time_to_initialize(env)
+
+    results: Dict[str, Any] = {}
+    samples = [time_to_initialize(env) for _ in range(args.runs)]
+    results["initialize"] = summarize(samples)
+    results["interpreter"] = summarize([_spawn(["-c", "pass"]) for _ in range(5)])
+    results["sdk_import"] = summarize([_spawn(["-c", SDK_IMPORTS]) for _ in range(5)])
+
+    imports = import_profile(env)
+    top_level = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: entry[2], reverse=True)
+    own = [entry for entry in top_level if entry[0] == "src" or entry[0].startswith("src.")]
+    own_ms = sum(entry[2] for entry in own) / 1000
+    total_ms = sum(entry[1] for entry in imports) / 1000
+    results["imports"] = {
+        "total_ms": round(total_ms, 2),
+        "project_ms": round(own_ms, 2),
+        "modules": len(imports),
+        "top_level": [{"module": name, "cumulative_ms": round(cumulative / 1000, 2)}
+                      for name, _, cumulative, _ in top_level[:args.top]],
+        "project": [{"module": name, "cumulative_ms": round(cumulative / 1000, 2)}
+                    for name, _, cumulative, _ in own]
+    }
+
+    init = results["initialize"]
+    print(f"time to initialize: p50={init['p50_ms']:.1f}ms p95={init['p95_ms']:.1f}ms "
+          f"(bare interpreter p50={results['interpreter']['p50_ms']:.1f}ms, "
+          f"interpreter + MCP SDK import p50={results['sdk_import']['p50_ms']:.1f}ms)")
+    print(f"imports: {len(imports)} modules, {total_ms:.1f}ms total, {own_ms:.1f}ms in src.*")
+    print(f"{'top-level import':<40} {'cumulative ms':>14}")
+    for entry in results["imports"]["top_level"]:
+        print(f"{entry['module']:<40} {entry['cumulative_ms']:>14.1f}")
+
+    write_results("startup", {k: str(v) for k, v in vars(args).items()}, results, args.output)
+
+    failures = []
+    if args.budget_ms is not None and init["p50_ms"] > args.budget_ms:
+        failures.append(f"median time to initialize {init['p50_ms']:.1f}ms > budget {args.budget_ms}ms")
+    if args.import_budget_ms is not None and own_ms > args.import_budget_ms:
+        failures.append(f"src.* import time {own_ms:.1f}ms > budget {args.import_budget_ms}ms")
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+def _spawn(python_args: List[str]) -> float:
+    """Time an interpreter running python_args to completion."""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *python_args], check=True)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Microbenchmarks of MCPTools methods, called directly without any transport."""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import parse_count, parse_size, print_table, summarize, time_calls, write_results
+
+from src.tools import MCPTools
+
+
+def make_text_file(path: Path, size: int) -> Path:
+    """Create (or reuse) a text file of roughly `size` bytes with 80-character lines."""
+    if path.exists() and path.stat().st_size == size:
+        return path
+    line = ("x" * 79 + "\n").encode("utf-8")
+    block = line * 8192
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            chunk = block[:remaining]
+            f.write(chunk)
+            remaining -= len(chunk)
+    return path
+
+
+def make_directory(path: Path, entries: int) -> Path:
+    """Create (or reuse) a directory holding `entries` empty files."""
+    marker = path / ".complete"
+    if marker.exists():
+        return path
+    path.mkdir(parents=True, exist_ok=True)
+    for i in range(entries):
+        (path / f"f{i:07d}").touch()
+    marker.touch()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--file-sizes", default="1M,10M,100M,1G",
+                        help="Comma-separated read_file sizes (default 1M,10M,100M,1G)")
+    parser.add_argument("--dir-entries", default="10k,100k,1M",
+                        help="Comma-separated list_files entry counts (default 10k,100k,1M)")
+    parser.add_argument("--iterations", type=int, default=20, help="Iterations for fast tools")
+    parser.add_argument("--large-iterations", type=int, default=3,
+                        help="Iterations for read_file/list_files cases")
+    parser.add_argument("--workdir", type=Path, default=Path(tempfile.gettempdir()) / "mcp-bench",
+                        help="Where generated inputs are kept between runs")
+    parser.add_argument("--quick", action="store_true", help="Small inputs only (1M/10M files, 10k entries)")
+    parser.add_argument("--output", type=Path, help="Results file (default benchmarks/results/tools.json)")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.file_sizes, args.dir_entries = "1M,10M", "10k"
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    tools = MCPTools()
+    results = {}
+
+    results["calculator"] = summarize(time_calls(lambda: tools.calculator("12345 * 6789 + 3 ** 7"), args.iterations))
+    results["get_current_time"] = summarize(time_calls(tools.get_current_time, args.iterations))
+    results["system_info"] = summarize(time_calls(tools.system_info, args.iterations))
+    results["execute_command[true]"] = summarize(time_calls(lambda: tools.execute_command("true"), args.iterations))
+
+    payload = "y" * 1024 * 1024
+    target = args.workdir / "write_target.txt"
+    results["write_file[1MB]"] = summarize(
+        time_calls(lambda: tools.write_file(str(target), payload), args.iterations), work_per_op=len(payload)
+    )
+
+    for size_text in args.file_sizes.split(","):
+        size = parse_size(size_text)
+        path = make_text_file(args.workdir / f"read_{size}.txt", size)
+        for max_lines in (100, 10000):
+            case = f"read_file[{size_text},max_lines={max_lines}]"
+            print(f"Running {case}...")
+            results[case] = summarize(
+                time_calls(lambda: tools.read_file(str(path), max_lines), args.large_iterations),
+                work_per_op=size
+            )
+
+    for count_text in args.dir_entries.split(","):
+        count = parse_count(count_text)
+        path = make_directory(args.workdir / f"dir_{count}", count)
+        case = f"list_files[{count_text}]"
+        print(f"Running {case}...")
+        results[case] = summarize(time_calls(lambda: tools.list_files(str(path)), args.large_iterations))
+
+    print_table(results)
+    write_results("tools", {k: str(v) for k, v in vars(args).items()}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""JSON-RPC round-trip load generator against MCPServerApp over STDIO and TCP transports."""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from common import PROJECT_ROOT, free_port, print_table, summarize, wait_for_port, write_results
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from src.transport import socket_client
+
+SERVER_SCRIPT = PROJECT_ROOT / "src" / "mcp_server.py"
+
+
+async def _load(sessions: List[ClientSession], tool: Optional[str], arguments: Dict[str, Any],
+                requests: int, concurrency: int) -> Dict[str, Any]:
+    """Issue `requests` calls spread over `concurrency` workers and the given sessions."""
+    samples: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker(session: ClientSession):
+        for _ in remaining:
+            start = time.perf_counter()
+            if tool is None:
+                await session.send_ping()
+            else:
+                await session.call_tool(tool, arguments)
+            samples.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker(sessions[i % len(sessions)]) for i in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    stats = summarize(samples)
+    stats["concurrency"] = concurrency
+    stats["connections"] = len(sessions)
+    stats["wall_ops_per_sec"] = round(requests / wall, 2)
+    return stats
+
+
+def _cases(payload_file: Path):
+    return [
+        ("ping", None, {}),
+        ("calculator", "calculator", {"expression": "2 + 2"}),
+        ("read_file[64KB]", "read_file", {"file_path": str(payload_file), "max_lines": 100000}),
+    ]
+
+
+async def bench_stdio(args, env: Dict[str, str], payload_file: Path) -> Dict[str, Any]:
+    results = {}
+    params = StdioServerParameters(command=sys.executable, args=[str(SERVER_SCRIPT)], env=env)
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            for name, tool, arguments in _cases(payload_file):
+                for concurrency in args.concurrency:
+                    await _load([session], tool, arguments, args.warmup, 1)
+                    case = f"stdio/{name}/c{concurrency}"
+                    print(f"Running {case}...")
+                    results[case] = await _load([session], tool, arguments, args.requests, concurrency)
+    return results
+
+
+async def bench_socket(args, env: Dict[str, str], payload_file: Path) -> Dict[str, Any]:
+    results = {}
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(SERVER_SCRIPT), "--transport", "tcp", "--host", "127.0.0.1", "--port", str(port)],
+        env=env
+    )
+    try:
+        await wait_for_port(port)
+        for connections in args.connections:
+            async with _socket_sessions(port, connections) as sessions:
+                for name, tool, arguments in _cases(payload_file):
+                    for concurrency in args.concurrency:
+                        concurrency = max(concurrency, connections)
+                        await _load(sessions, tool, arguments, args.warmup, connections)
+                        case = f"tcp/{name}/conn{connections}/c{concurrency}"
+                        print(f"Running {case}...")
+                        results[case] = await _load(sessions, tool, arguments, args.requests, concurrency)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return results
+
+
+@asynccontextmanager
+async def _socket_sessions(port: int, count: int):
+    """Open `count` initialized client sessions to a TCP server."""
+    async with AsyncExitStack() as stack:
+        sessions = []
+        for _ in range(count):
+            read_stream, write_stream = await stack.enter_async_context(socket_client("127.0.0.1", port))
+            session = await stack.enter_async_context(ClientSession(read_stream, write_stream))
+            await session.initialize()
+            sessions.append(session)
+        yield sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transport", choices=["stdio", "tcp", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per case")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests before each case")
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated in-flight request counts")
+    parser.add_argument("--connections", default="1,4", help="Comma-separated TCP connection counts")
+    parser.add_argument("--server-log-level", default="WARNING",
+                        help="LOG_LEVEL for the server process (INFO measures logging overhead too)")
+    parser.add_argument("--output", type=Path, help="Results file (default benchmarks/results/transport.json)")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.connections = [int(c) for c in args.connections.split(",")]
+
+    # Quotas would turn most of the load into rejections, and offloading would
+    # replace the 64KB result with a blob write; measure the transport alone
+    env = dict(os.environ, LOG_LEVEL=args.server_log_level, SESSION_RATE_LIMIT="0", SESSION_IO_BYTES_PER_SEC="0",
+               RESULT_OFFLOAD_BYTES="0")
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write(("z" * 63 + "\n") * 1024)
+        payload_file = Path(f.name)
+
+    results = {}
+    try:
+        if args.transport in ("stdio", "all"):
+            results.update(asyncio.run(bench_stdio(args, env, payload_file)))
+        if args.transport in ("tcp", "all"):
+            results.update(asyncio.run(bench_socket(args, env, payload_file)))
+    finally:
+        payload_file.unlink()
+
+    print_table(results)
+    params = {k: str(v) for k, v in vars(args).items()}
+    write_results("transport", params, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Shared helpers for benchmark scripts: timing statistics and JSON result files."""
+
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).parent
+PROJECT_ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+# Make `src` importable when a benchmark is run as a script
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def parse_size(text: str) -> int:
+    """Parse sizes like "512", "10k", "1M" or "1G" (binary multiples for bytes, decimal for counts)."""
+    text = text.strip()
+    units = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+    if text[-1].lower() in units:
+        return int(float(text[:-1]) * units[text[-1].lower()])
+    return int(text)
+
+
+def parse_count(text: str) -> int:
+    """Parse counts like "10k" or "1M" with decimal multiples."""
+    text = text.strip()
+    units = {"k": 1000, "m": 1000 ** 2}
+    if text[-1].lower() in units:
+        return int(float(text[:-1]) * units[text[-1].lower()])
+    return int(text)
+
+
+def summarize(samples: List[float], work_per_op: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Summarize per-operation durations in seconds.
+
+    Args:
+        samples: Duration of each operation in seconds
+        work_per_op: Bytes processed per operation, to report MB/s
+
+    Returns:
+        Dictionary of statistics in milliseconds plus ops/sec
+    """
+    ordered = sorted(samples)
+
+    def pct(q: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 4)
+
+    total = sum(samples)
+    result = {
+        "iterations": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "ops_per_sec": round(len(samples) / total, 2) if total else None
+    }
+    if work_per_op:
+        result["mb_per_sec"] = round(work_per_op * len(samples) / total / 1e6, 2) if total else None
+    return result
+
+
+def time_calls(func: Callable[[], Any], iterations: int, warmup: int = 1) -> List[float]:
+    """Call func repeatedly and return the duration of each timed call."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def free_port() -> int:
+    """Return a TCP port on 127.0.0.1 that is currently free."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_for_port(port: int, timeout: float = 15.0):
+    """Wait until something accepts connections on 127.0.0.1:port."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            await writer.wait_closed()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Nothing listening on port {port}")
+            await asyncio.sleep(0.05)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def write_results(name: str, params: Dict[str, Any], results: Dict[str, Any],
+                  output: Optional[Path] = None) -> Path:
+    """
+    Write benchmark results as JSON so runs can be diffed with compare.py.
+
+    Args:
+        name: Benchmark name
+        params: Parameters the benchmark ran with
+        results: Mapping of case name to statistics
+        output: Output file (default benchmarks/results/<name>.json)
+
+    Returns:
+        Path of the written file
+    """
+    output = Path(output or RESULTS_DIR / f"{name}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "benchmark": name,
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": results
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {output}")
+    return output
+
+
+def print_table(results: Dict[str, Dict[str, Any]]):
+    """Print a compact summary of benchmark cases."""
+    print(f"{'case':<44} {'n':>6} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    for case, stats in results.items():
+        print(f"{case:<44} {stats['iterations']:>6} {stats['mean_ms']:>10.3f} "
+              f"{stats['p50_ms']:>10.3f} {stats['p99_ms']:>10.3f} {stats['ops_per_sec'] or 0:>10.1f}")
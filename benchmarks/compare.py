@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Compare two benchmark result files and flag regressions."""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Metric name -> True when larger values are better
+METRICS = {
+    "mean_ms": False,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "ops_per_sec": True,
+    "wall_ops_per_sec": True,
+}
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any],
+            threshold: float) -> Tuple[List[Tuple[str, str, float, float, float]], List[str]]:
+    """
+    Diff the cases present in both result documents.
+
+    Args:
+        baseline: Parsed baseline results file
+        candidate: Parsed candidate results file
+        threshold: Relative change (e.g. 0.1 for 10%) beyond which a slowdown is a regression
+
+    Returns:
+        Tuple of (rows of case, metric, old, new, change) and regression descriptions
+    """
+    rows, regressions = [], []
+    old_results, new_results = baseline.get("results", {}), candidate.get("results", {})
+    for case in sorted(set(old_results) & set(new_results)):
+        old_stats, new_stats = old_results[case], new_results[case]
+        for metric, higher_is_better in METRICS.items():
+            old, new = old_stats.get(metric), new_stats.get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+                continue
+            change = (new - old) / old
+            rows.append((case, metric, old, new, change))
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(f"{case} {metric}: {old:g} -> {new:g} ({change:+.1%})")
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline", type=Path, help="Baseline results JSON")
+    parser.add_argument("candidate", type=Path, help="Candidate results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown that counts as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline.get('git_commit')} {baseline.get('timestamp')}")
+    print(f"candidate: {candidate.get('git_commit')} {candidate.get('timestamp')}")
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    print(f"{'case':<44} {'metric':<16} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for case, metric, old, new, change in rows:
+        print(f"{case:<44} {metric:<16} {old:>12.3f} {new:>12.3f} {change:>+9.1%}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Ollama HTTP API, for deterministic benchmarks and load tests.
+
+Speaks /api/chat (streaming and non-streaming, including tool_calls), /api/tags
+and /api/version. Responses come from a replay script, or from a built-in
+default that calls the calculator tool and then answers. Generation time is
+simulated from token counts and configurable token rates.
+
+Script format (JSON):
+
+    {
+      "conversations": [
+        {
+          "match": "time|clock",
+          "turns": [
+            {"tool_calls": [{"name": "get_current_time", "arguments": {}}]},
+            {"content": "It is noon.", "eval_count": 12}
+          ]
+        }
+      ]
+    }
+
+A conversation is chosen by searching each `match` regex in the latest user
+message (a conversation without `match` is the fallback). The turn is the
+number of assistant messages sent since that user message, so the server is
+stateless and any number of sessions can replay concurrently.
+
+With --record FILE --upstream URL the server proxies to a real Ollama and
+writes what it sees in the same format, for later replay.
+
+Usage:
+    python3 benchmarks/fake_ollama.py --port 11434 --tokens-per-sec 40
+    python3 benchmarks/fake_ollama.py --script conversations.json --stream-chunk-tokens 4
+    python3 benchmarks/fake_ollama.py --record conversations.json --upstream http://localhost:11434
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_SCRIPT = {
+    "conversations": [
+        {"match": "no tools", "turns": [{"content": "Hello! No tools were needed."}]},
+        {
+            "turns": [
+                {"tool_calls": [{"name": "calculator", "arguments": {"expression": "2 + 2"}}]},
+                {"content": "The answer is 4."}
+            ]
+        }
+    ]
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def _normalize_tool_calls(tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Accept {"name", "arguments"} shorthand as well as Ollama's {"function": {...}} form."""
+    normalized = []
+    for call in tool_calls:
+        function = call.get("function", call)
+        normalized.append({"function": {"name": function["name"],
+                                        "arguments": function.get("arguments", {})}})
+    return normalized
+
+
+class ReplayScript:
+    """Scripted assistant turns, selected statelessly from the request messages."""
+
+    def __init__(self, document: Dict[str, Any]):
+        self.conversations = []
+        self.fallback = None
+        for conversation in document.get("conversations", []):
+            turns = conversation.get("turns") or [{"content": ""}]
+            if conversation.get("match"):
+                self.conversations.append((re.compile(conversation["match"], re.IGNORECASE), turns))
+            elif self.fallback is None:
+                self.fallback = turns
+
+    @classmethod
+    def load(cls, path: Path) -> "ReplayScript":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def position(messages: List[Dict[str, Any]]) -> Tuple[str, int]:
+        """Return the latest user message and how many assistant turns followed it."""
+        step = 0
+        for message in reversed(messages):
+            role = message.get("role")
+            if role == "user":
+                return message.get("content") or "", step
+            if role == "assistant":
+                step += 1
+        return "", step
+
+    def next_turn(self, messages: List[Dict[str, Any]], tools_offered: bool) -> Dict[str, Any]:
+        """Pick the assistant turn that should answer these messages."""
+        user_text, step = self.position(messages)
+        turns = self.fallback or [{"content": ""}]
+        for pattern, candidate in self.conversations:
+            if pattern.search(user_text):
+                turns = candidate
+                break
+        turn = dict(turns[min(step, len(turns) - 1)])
+        # A model cannot call tools it was not offered; answer with text instead
+        if turn.get("tool_calls") and not tools_offered:
+            turn = {"content": turn.get("content") or "Done."}
+        return turn
+
+
+class ConversationRecorder:
+    """Collect proxied exchanges into the replay script format."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conversations: Dict[str, List[Dict[str, Any]]] = {}
+
+    def record(self, messages: List[Dict[str, Any]], response: Dict[str, Any]):
+        user_text, step = ReplayScript.position(messages)
+        message = response.get("message") or {}
+        turn: Dict[str, Any] = {"content": message.get("content", "")}
+        if message.get("tool_calls"):
+            turn["tool_calls"] = _normalize_tool_calls(message["tool_calls"])
+        for field in ("prompt_eval_count", "eval_count"):
+            if response.get(field):
+                turn[field] = response[field]
+
+        with self._lock:
+            turns = self._conversations.setdefault(user_text, [])
+            if step < len(turns):
+                turns[step] = turn
+            else:
+                turns.append(turn)
+            document = {"conversations": [
+                {"match": "^" + re.escape(text) + "$", "turns": recorded}
+                for text, recorded in self._conversations.items()
+            ]}
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(document, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Hundreds of sessions connect at once; the default backlog of 5 drops them
+    request_queue_size = 1024
+
+
+class FakeOllamaServer:
+    """
+    Threaded HTTP server answering like Ollama, without a model.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        script: Replay script (default: calculator tool call, then an answer)
+        tokens_per_sec: Simulated generation rate (0 = instant)
+        prompt_tokens_per_sec: Simulated prompt evaluation rate (0 = instant)
+        latency: Fixed extra seconds added to every chat request
+        stream_chunk_tokens: Tokens per streamed chunk
+        upstream: Real Ollama URL to proxy to when recording
+        recorder: Where proxied exchanges are recorded
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, script: Optional[ReplayScript] = None,
+                 tokens_per_sec: float = 0.0, prompt_tokens_per_sec: float = 0.0, latency: float = 0.0,
+                 stream_chunk_tokens: int = 1, upstream: Optional[str] = None,
+                 recorder: Optional[ConversationRecorder] = None):
+        self.script = script or ReplayScript(DEFAULT_SCRIPT)
+        self.tokens_per_sec = tokens_per_sec
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec
+        self.latency = latency
+        self.stream_chunk_tokens = max(1, stream_chunk_tokens)
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.recorder = recorder
+        self._lock = threading.Lock()
+        self._active = 0
+        self.stats = {"requests": 0, "tool_call_responses": 0, "streamed": 0, "max_concurrent": 0}
+        self.httpd = _HTTPServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.httpd.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; with Nagle on, keep-alive
+            # requests stall ~40ms on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": "fake:latest", "model": "fake:latest", "size": 0}]})
+                elif self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-fake"})
+                elif self.path == "/fake/stats":
+                    with fake._lock:
+                        self._send_json(dict(fake.stats))
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if self.path != "/api/chat":
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake._active += 1
+                    fake.stats["requests"] += 1
+                    fake.stats["max_concurrent"] = max(fake.stats["max_concurrent"], fake._active)
+                try:
+                    fake.handle_chat(self, body)
+                finally:
+                    with fake._lock:
+                        fake._active -= 1
+
+            def _send_json(self, document: Dict[str, Any]):
+                data = json.dumps(document).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def handle_chat(self, handler: BaseHTTPRequestHandler, body: Dict[str, Any]):
+        """Answer one /api/chat request, streamed or not."""
+        messages = body.get("messages") or []
+        # Ollama streams unless told otherwise
+        stream = body.get("stream", True)
+        if self.upstream:
+            turn = self._proxy(body)
+        else:
+            turn = self.script.next_turn(messages, bool(body.get("tools")))
+
+        content = turn.get("content") or ""
+        tool_calls = _normalize_tool_calls(turn["tool_calls"]) if turn.get("tool_calls") else None
+        prompt_tokens = turn.get("prompt_eval_count") or estimate_tokens(
+            "".join(m.get("content") or "" for m in messages)
+        )
+        eval_tokens = turn.get("eval_count") or estimate_tokens(
+            content + (json.dumps(tool_calls) if tool_calls else "")
+        )
+        with self._lock:
+            self.stats["tool_call_responses"] += bool(tool_calls)
+            self.stats["streamed"] += bool(stream)
+
+        started = time.perf_counter()
+        prompt_delay = self.latency + (prompt_tokens / self.prompt_tokens_per_sec
+                                       if self.prompt_tokens_per_sec else 0.0)
+        if prompt_delay:
+            time.sleep(prompt_delay)
+        prompt_ns = int((time.perf_counter() - started) * 1e9)
+        model = body.get("model", "fake")
+
+        if stream:
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/x-ndjson")
+            handler.send_header("Transfer-Encoding", "chunked")
+            handler.end_headers()
+            generation_start = time.perf_counter()
+            for piece, tokens in self._split(content, eval_tokens):
+                self._sleep_tokens(tokens)
+                self._write_chunk(handler, self._chunk(model, {"role": "assistant", "content": piece}))
+            if tool_calls:
+                self._write_chunk(handler, self._chunk(
+                    model, {"role": "assistant", "content": "", "tool_calls": tool_calls}
+                ))
+            eval_ns = max(1, int((time.perf_counter() - generation_start) * 1e9))
+            final = self._chunk(model, {"role": "assistant", "content": ""})
+            final.update(self._timings(started, prompt_tokens, prompt_ns, eval_tokens, eval_ns))
+            self._write_chunk(handler, final)
+            handler.wfile.write(b"0\r\n\r\n")
+            return
+
+        generation_start = time.perf_counter()
+        self._sleep_tokens(eval_tokens)
+        eval_ns = max(1, int((time.perf_counter() - generation_start) * 1e9))
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        response = self._chunk(model, message)
+        response.update(self._timings(started, prompt_tokens, prompt_ns, eval_tokens, eval_ns))
+        handler._send_json(response)
+
+    def _proxy(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Forward a chat request upstream (non-streaming) and record the answer."""
+        request = urllib.request.Request(
+            f"{self.upstream}/api/chat", data=json.dumps(dict(body, stream=False)).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request) as response:
+            answer = json.loads(response.read())
+        if self.recorder:
+            self.recorder.record(body.get("messages") or [], answer)
+        message = answer.get("message") or {}
+        turn = {"content": message.get("content", ""), "tool_calls": message.get("tool_calls"),
+                "prompt_eval_count": answer.get("prompt_eval_count"), "eval_count": answer.get("eval_count")}
+        # Upstream time already passed; don't simulate it a second time
+        turn["eval_count"] = turn["eval_count"] or 1
+        return turn
+
+    def _split(self, content: str, tokens: int):
+        """Yield (text, token_count) chunks covering content in about `tokens` tokens."""
+        if not content:
+            return
+        per_chunk = self.stream_chunk_tokens
+        chunks = max(1, -(-tokens // per_chunk))
+        size = max(1, -(-len(content) // chunks))
+        for index in range(0, len(content), size):
+            yield content[index:index + size], per_chunk
+
+    def _sleep_tokens(self, tokens: int):
+        if self.tokens_per_sec and not self.upstream:
+            time.sleep(tokens / self.tokens_per_sec)
+
+    @staticmethod
+    def _chunk(model: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        return {"model": model, "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": message, "done": False}
+
+    @staticmethod
+    def _timings(started: float, prompt_tokens: int, prompt_ns: int,
+                 eval_tokens: int, eval_ns: int) -> Dict[str, Any]:
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": max(1, prompt_ns),
+            "eval_count": eval_tokens,
+            "eval_duration": eval_ns
+        }
+
+    @staticmethod
+    def _write_chunk(handler: BaseHTTPRequestHandler, document: Dict[str, Any]):
+        data = json.dumps(document).encode("utf-8") + b"\n"
+        handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        handler.wfile.flush()
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for benchmarks and load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--script", type=Path, help="Replay script JSON (default: built-in calculator script)")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Generation rate (0 = instant)")
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=0.0,
+                        help="Prompt evaluation rate (0 = instant)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed extra seconds per chat request")
+    parser.add_argument("--stream-chunk-tokens", type=int, default=1, help="Tokens per streamed chunk")
+    parser.add_argument("--upstream", help="Real Ollama URL to proxy to (for --record)")
+    parser.add_argument("--record", type=Path, help="Write proxied conversations here as a replay script")
+    args = parser.parse_args()
+    if args.record and not args.upstream:
+        parser.error("--record requires --upstream")
+
+    fake = FakeOllamaServer(
+        host=args.host, port=args.port,
+        script=ReplayScript.load(args.script) if args.script else None,
+        tokens_per_sec=args.tokens_per_sec, prompt_tokens_per_sec=args.prompt_tokens_per_sec,
+        latency=args.latency, stream_chunk_tokens=args.stream_chunk_tokens,
+        upstream=args.upstream, recorder=ConversationRecorder(args.record) if args.record else None
+    )
+    print(f"Fake Ollama listening on {fake.url}", flush=True)
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Load test: many concurrent MCPClient sessions against a fake Ollama and shared TCP MCP servers.
+
+Each session runs `--turns` chat turns through the full agent loop (LLM request,
+MCP tool call, final LLM request). The fake Ollama server runs in its own
+process so its threads don't compete with the client event loop for the GIL.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from common import BENCH_DIR, PROJECT_ROOT, free_port, summarize, wait_for_port, write_results
+
+SERVER_SCRIPT = PROJECT_ROOT / "src" / "mcp_server.py"
+
+
+def start_processes(args, env: Dict[str, str]) -> Tuple[List[subprocess.Popen], str, List[Tuple[str, int]]]:
+    """Start the fake Ollama process and the TCP MCP servers."""
+    processes = []
+    fake_port = free_port()
+    fake_cmd = [sys.executable, str(BENCH_DIR / "fake_ollama.py"), "--port", str(fake_port),
+                "--tokens-per-sec", str(args.tokens_per_sec), "--latency", str(args.llm_latency)]
+    if args.script:
+        fake_cmd += ["--script", str(args.script)]
+    processes.append(subprocess.Popen(fake_cmd, env=env, stdout=subprocess.DEVNULL))
+
+    addresses = []
+    if args.transport == "tcp":
+        for _ in range(args.servers):
+            port = free_port()
+            processes.append(subprocess.Popen(
+                [sys.executable, str(SERVER_SCRIPT), "--transport", "tcp",
+                 "--host", "127.0.0.1", "--port", str(port)], env=env
+            ))
+            addresses.append(("127.0.0.1", port))
+    return processes, f"http://127.0.0.1:{fake_port}", addresses
+
+
+async def run(args, addresses: List[Tuple[str, int]], fake_port: int) -> Dict[str, Any]:
+    # Imported late: src.config reads OLLAMA_HOST at import time
+    from src.mcp_client import MCPClient
+
+    await wait_for_port(fake_port)
+    for _, port in addresses:
+        await wait_for_port(port)
+
+    connect_times: List[float] = []
+    turn_times: List[float] = []
+    errors: List[str] = []
+    prompts = args.prompt or ["What is 2 + 2?"]
+    # Connect everyone first (bounded, so hundreds of handshakes don't all land
+    # at once), then release all sessions together
+    connect_limit = asyncio.Semaphore(args.connect_concurrency)
+    start_gate = asyncio.Event()
+    ready = 0
+
+    async def session(index: int):
+        nonlocal ready
+        address = addresses[index % len(addresses)] if addresses else None
+        client = MCPClient(use_cache=False, server_address=address, show_tool_calls=False)
+        try:
+            try:
+                async with connect_limit:
+                    started = time.perf_counter()
+                    await client.connect()
+                    connect_times.append(time.perf_counter() - started)
+            finally:
+                ready += 1
+            await start_gate.wait()
+            for turn in range(args.turns):
+                prompt = prompts[(index + turn) % len(prompts)]
+                started = time.perf_counter()
+                answer = await client.chat(prompt)
+                turn_times.append(time.perf_counter() - started)
+                if answer.startswith("Error:"):
+                    errors.append(answer)
+        except Exception as e:
+            errors.append(f"session {index}: {e}")
+        finally:
+            await client.close()
+
+    runner = asyncio.gather(*(session(i) for i in range(args.sessions)))
+    while ready < args.sessions:
+        await asyncio.sleep(0.01)
+    wall_start = time.perf_counter()
+    start_gate.set()
+    await runner
+    wall = time.perf_counter() - wall_start
+
+    results: Dict[str, Any] = {}
+    if connect_times:
+        results["connect"] = summarize(connect_times)
+    if turn_times:
+        results["chat_turn"] = summarize(turn_times)
+        results["chat_turn"]["turns_per_sec"] = round(len(turn_times) / wall, 2)
+    results["summary"] = {
+        "sessions": args.sessions,
+        "turns": len(turn_times),
+        "errors": len(errors),
+        "wall_seconds": round(wall, 3),
+        "sample_errors": errors[:5]
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200, help="Concurrent client sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Chat turns per session")
+    parser.add_argument("--transport", choices=["tcp", "stdio"], default="tcp",
+                        help="tcp: sessions share --servers TCP servers; stdio: one server process per session")
+    parser.add_argument("--servers", type=int, default=4, help="TCP MCP server processes")
+    parser.add_argument("--connect-concurrency", type=int, default=32, help="Handshakes in flight at once")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="Fake generation rate")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fixed extra seconds per LLM request")
+    parser.add_argument("--script", type=Path, help="Replay script for the fake Ollama server")
+    parser.add_argument("--prompt", action="append", help="Prompt to send (repeatable; rotated per turn)")
+    parser.add_argument("--log-level", default="WARNING", help="LOG_LEVEL for client and servers")
+    parser.add_argument("--output", type=Path, help="Results file (default benchmarks/results/load_chat.json)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL=args.log_level)
+    processes, fake_url, addresses = start_processes(args, env)
+    os.environ["OLLAMA_HOST"] = fake_url
+    os.environ["LOG_LEVEL"] = args.log_level
+    try:
+        results = asyncio.run(run(args, addresses, int(fake_url.rsplit(":", 1)[1])))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    for case in ("connect", "chat_turn"):
+        if case in results:
+            stats = results[case]
+            print(f"{case:<12} n={stats['iterations']:<6} mean={stats['mean_ms']:.1f}ms "
+                  f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms")
+    summary = results["summary"]
+    print(f"{summary['sessions']} sessions, {summary['turns']} turns in {summary['wall_seconds']}s, "
+          f"{summary['errors']} errors")
+    write_results("load_chat", {k: str(v) for k, v in vars(args).items()}, results, args.output)
+    if summary["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ import asyncio
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        sys.exit(asyncio.run(main()))
     except KeyboardInterrupt:
         print("\n\nExiting...")
         sys.exit(0)
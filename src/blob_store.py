@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Content-addressed storage for large payloads such as tool outputs."""
+
+import contextlib
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+from src.config import DATA_DIR
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """
+    Immutable blobs stored under DATA_DIR/blobs/<digest[:2]>/<digest>.
+
+    A blob is named by the SHA-256 of its bytes, so storing the same content
+    twice writes it once, and a digest can be handed around (in a
+    conversation log, or to a client) in place of the content.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory or DATA_DIR / "blobs")
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, digest: str) -> Path:
+        # Digests can come from clients; never let one name a path outside the store
+        if not _DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return self.directory / digest[:2] / digest
+
+    def put(self, data: Union[bytes, str]) -> str:
+        """
+        Store a blob unless it is already present.
+
+        Args:
+            data: Content; str is stored UTF-8 encoded
+
+        Returns:
+            The blob's digest
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = self.digest(data)
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A unique temp file: threads and processes may store the same blob at once
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{digest}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Return a blob's content (raises FileNotFoundError if it is unknown)."""
+        with open(self._path(digest), "rb") as f:
+            return f.read()
+
+    def get_text(self, digest: str) -> str:
+        return self.get(digest).decode("utf-8")
+
+    def read(self, digest: str, offset: int = 0, length: int = -1) -> bytes:
+        """Return `length` bytes of a blob from `offset` (to the end if length < 0), reading only those."""
+        with open(self._path(digest), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def size(self, digest: str) -> int:
+        return self._path(digest).stat().st_size
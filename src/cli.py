@@ -2,28 +2,34 @@
 """CLI interface for MCP client."""
 
 import asyncio
+import json
 import sys
 import os
+import time
 from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
 from rich.prompt import Prompt
+from rich.table import Table
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.mcp_client import MCPClient
+from src.mcp_client import MCPClient, close_server_pool
 from src.config import OLLAMA_MODEL
 
 console = Console()
+# Batch mode writes results to stdout, so its progress goes to stderr
+err_console = Console(stderr=True)
 
 
 class MCPChatCLI:
     """Interactive CLI for MCP client."""
 
-    def __init__(self):
-        self.client = MCPClient()
+    def __init__(self, server_address: Optional[Tuple[str, int]] = None, session_name: Optional[str] = None):
+        self.client = MCPClient(server_address=server_address, session_name=session_name)
         self.running = False
 
     async def start(self):
@@ -37,7 +43,7 @@ class MCPChatCLI:
             "[bold cyan]MCP Client with Local LLM[/bold cyan]\n"
             f"Using model: [yellow]{OLLAMA_MODEL}[/yellow]\n"
             "Type your messages and press Enter. Type 'exit' or 'quit' to stop.\n"
-            "Type 'reset' to clear conversation history.",
+            "Type 'reset' to clear conversation history, 'stats' to show metrics.",
             border_style="cyan"
         ))
 
@@ -54,6 +60,11 @@ class MCPChatCLI:
             console.print(f"[cyan]Discovered {len(tools_list)} tools via MCP protocol:[/cyan]")
             console.print(f"[dim]{', '.join(tools_list)}[/dim]\n")
 
+            conversation = self.client.conversation
+            if conversation is not None:
+                console.print(f"[cyan]Session [bold]{conversation.name}[/bold]: resumed "
+                              f"{len(self.client.conversation_history)} messages[/cyan]")
+
         except Exception as e:
             console.print(f"[red]✗ Failed to initialize MCP client: {e}[/red]")
             return
@@ -77,6 +88,10 @@ class MCPChatCLI:
                     console.print("[yellow]Conversation history cleared[/yellow]")
                     continue
 
+                if user_input.lower() == 'stats':
+                    await self.show_stats()
+                    continue
+
                 # Show thinking indicator
                 console.print("\n[dim]Thinking...[/dim]")
 
@@ -94,18 +109,231 @@ class MCPChatCLI:
 
         # Cleanup
         await self.client.close()
+        await close_server_pool()
+
+    async def show_stats(self):
+        """
+        Display client and server metrics as tables.
+        """
+        stats = await self.client.get_stats()
+
+        for side in ("client", "server"):
+            metrics = stats.get(side) or {}
+            table = Table(title=f"{side.capitalize()} metrics", title_justify="left")
+            for column in ("metric", "labels", "count", "avg", "p50", "p95", "p99"):
+                table.add_column(column, justify="left" if column in ("metric", "labels") else "right",
+                                 overflow="fold")
+
+            for name, metric in metrics.items():
+                for labels, series in metric["series"].items():
+                    if metric["type"] == "counter":
+                        table.add_row(name, labels, f"{series:g}", "", "", "", "")
+                    else:
+                        table.add_row(name, labels, str(series["count"]),
+                                      *(_fmt(series[key]) for key in ("avg", "p50", "p95", "p99")))
+            console.print(table)
+
+        if stats.get("server_pool"):
+            console.print(f"[cyan]Server pool:[/cyan] {stats['server_pool']}")
+        if stats.get("tool_cache"):
+            console.print(f"[cyan]Tool schema cache:[/cyan] {stats['tool_cache']}")
+        if stats.get("response_cache"):
+            console.print(f"[cyan]LLM response cache:[/cyan] {stats['response_cache']}")
+
 
+def _fmt(value) -> str:
+    """Format a metric value compactly for the stats table."""
+    if value is None:
+        return "-"
+    return f"{value:.4g}"
+
+
+def _parse_prompt(line: str) -> Dict[str, Any]:
+    """Read one batch input line: {"prompt": ..., "id": ...} or a bare JSON string."""
+    item = json.loads(line)
+    if isinstance(item, str):
+        return {"prompt": item}
+    if not isinstance(item, dict) or not isinstance(item.get("prompt"), str):
+        raise ValueError('expected a JSON string or an object with a "prompt" string')
+    return item
+
+
+class BatchRunner:
+    """
+    Run prompts from a JSONL stream through concurrent MCPClient sessions.
+
+    Each of `concurrency` workers opens one session and answers prompts one
+    at a time, starting every prompt with an empty conversation. Sessions
+    share a TCP server when `server_address` is given (or a warm pool with
+    MCP_POOL_SIZE); otherwise each spawns its own. Input is read as results
+    come in, so a pipe can feed prompts indefinitely. Results are written as
+    one JSON line per prompt in completion order; "index" is the input line
+    number.
+
+    Args:
+        source: Input stream with one prompt per line
+        output: Stream to write result lines to
+        concurrency: Sessions answering prompts at once
+        server_address: (host, port) of a TCP MCP server for all sessions to share
+    """
+
+    def __init__(self, source: TextIO, output: TextIO, concurrency: int = 4,
+                 server_address: Optional[Tuple[str, int]] = None):
+        self.source = source
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.server_address = server_address
+        self.latencies: List[float] = []
+        self.results = 0
+        self.errors = 0
+        self._started = 0.0
+
+    async def run(self) -> int:
+        """Answer every prompt and return the number that failed."""
+        self._started = time.perf_counter()
+        # Bounded so a large input isn't read far ahead of the workers
+        queue: asyncio.Queue = asyncio.Queue(self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(number, queue)) for number in range(self.concurrency)]
+        try:
+            index = 0
+            while True:
+                line = await asyncio.to_thread(self.source.readline)
+                if not line:
+                    break
+                if line.strip():
+                    await queue.put((index, line))
+                index += 1
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await close_server_pool()
 
-async def main():
-    """Main entry point for CLI."""
-    # Start CLI
-    cli = MCPChatCLI()
-    await cli.start()
+        wall = time.perf_counter() - self._started
+        summary = (f"{self.results} prompts, {self.errors} errors in {wall:.2f}s "
+                   f"({self.results / wall:.2f} prompts/s)")
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            p50 = latencies[int(0.50 * (len(latencies) - 1))]
+            p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            summary += f", latency p50={p50:.2f}s p95={p95:.2f}s"
+        err_console.print(f"[cyan]{summary}[/cyan]")
+        return self.errors
+
+    async def _worker(self, number: int, queue: asyncio.Queue):
+        client = MCPClient(server_address=self.server_address, show_tool_calls=False)
+        connect_error = None
+        try:
+            await client.connect()
+        except Exception as e:
+            # Keep draining the queue so the other workers and the reader don't stall
+            connect_error = f"Failed to connect to MCP server: {e}"
+        try:
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    return
+                index, line = entry
+                self._write(await self._answer(client, number, index, line, connect_error))
+        finally:
+            if connect_error is None:
+                await client.close()
+
+    async def _answer(self, client: MCPClient, worker: int, index: int, line: str,
+                      connect_error: Optional[str]) -> Dict[str, Any]:
+        """Run one prompt and build its result line."""
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"index": index, "worker": worker,
+                                  "started": round(started - self._started, 3)}
+        try:
+            item = _parse_prompt(line)
+        except ValueError as e:
+            result["error"] = f"Invalid input line: {e}"
+            self.errors += 1
+            return result
+
+        result["id"] = item.get("id", index)
+        result["prompt"] = item["prompt"]
+        if connect_error is not None:
+            result["error"] = connect_error
+            self.errors += 1
+            return result
+
+        client.reset_conversation()
+        response = await client.chat(item["prompt"])
+        result["response"] = response
+        result["tool_calls"] = [
+            call["function"]["name"]
+            for message in client.conversation_history if message.get("tool_calls")
+            for call in message["tool_calls"]
+        ]
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        self.latencies.append(result["seconds"])
+        # chat() reports failures as its answer
+        if response.startswith("Error:"):
+            result["error"] = response
+            self.errors += 1
+        return result
+
+    def _write(self, result: Dict[str, Any]):
+        self.results += 1
+        self.output.write(json.dumps(result) + "\n")
+        self.output.flush()
+
+
+def _parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "localhost", int(port)
+
+
+async def main(argv=None) -> int:
+    """
+    Main entry point for CLI.
+
+    Without --batch this starts the interactive chat. Returns the process exit
+    code (1 if any batch prompt failed).
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chat with a local LLM that uses MCP tools")
+    parser.add_argument("--batch", metavar="FILE",
+                        help='Answer prompts from a JSONL file ("-" for stdin) instead of chatting')
+    parser.add_argument("--concurrency", type=int, default=4, help="Sessions answering batch prompts at once")
+    parser.add_argument("--output", type=Path, help="Write batch results to a file instead of stdout")
+    parser.add_argument("--server", type=_parse_address, metavar="HOST:PORT",
+                        help="Connect to a running TCP MCP server instead of spawning one per session")
+    parser.add_argument("--session", metavar="NAME",
+                        help="Save the chat under this name and resume it if it exists")
+    args = parser.parse_args(argv)
+
+    if args.batch is None:
+        try:
+            cli = MCPChatCLI(args.server, args.session)
+        except (ValueError, RuntimeError) as e:
+            console.print(f"[red]✗ Cannot open session: {e}[/red]")
+            return 1
+        await cli.start()
+        return 0
+    if args.session:
+        parser.error("--session is for interactive chat; batch prompts each start a new conversation")
+
+    source = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8")
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        errors = await BatchRunner(source, output, args.concurrency, args.server).run()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    return 1 if errors else 0
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        sys.exit(asyncio.run(main()))
     except KeyboardInterrupt:
         console.print("\n[yellow]Exiting...[/yellow]")
         sys.exit(0)
@@ -4,15 +4,16 @@
 import os
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
 # Find and load .env from project root
 current_dir = Path(__file__).parent
 project_root = current_dir.parent
 env_path = project_root / '.env'
 
-# Load environment variables
-load_dotenv(dotenv_path=env_path)
+# Load environment variables (dotenv is only imported when there is a file to read)
+if env_path.is_file():
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=env_path)
 
 # MCP Configuration
 MCP_SERVER_NAME = os.getenv("MCP_SERVER_NAME", "local-mcp-server")
@@ -22,15 +23,90 @@ MCP_CLIENT_NAME = os.getenv("MCP_CLIENT_NAME", "local-mcp-client")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
 
+# LLM response cache
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+# Deterministic mode pins temperature and seed so regression runs are reproducible
+LLM_DETERMINISTIC = os.getenv("LLM_DETERMINISTIC", "false").lower() in ("1", "true", "yes")
+LLM_SEED = int(os.getenv("LLM_SEED", "42"))
+# Tool call rounds per chat turn before the model must answer without tools
+CHAT_MAX_TOOL_ROUNDS = int(os.getenv("CHAT_MAX_TOOL_ROUNDS", "5"))
+# Tool selection: offer the model only the TOP_K tools most relevant to each message
+TOOL_SELECTION_ENABLED = os.getenv("TOOL_SELECTION_ENABLED", "false").lower() in ("1", "true", "yes")
+TOOL_SELECTION_TOP_K = int(os.getenv("TOOL_SELECTION_TOP_K", "4"))
+# Blend keyword scores with embedding similarity (uses EMBEDDING_BACKEND)
+TOOL_SELECTION_EMBEDDINGS = os.getenv("TOOL_SELECTION_EMBEDDINGS", "false").lower() in ("1", "true", "yes")
+TOOL_SELECTION_ALWAYS = os.getenv("TOOL_SELECTION_ALWAYS", "")  # Comma-separated tools always offered
+# Conversation store (data/conversations, large tool results in data/blobs)
+CONVERSATION_INLINE_MAX_BYTES = int(os.getenv("CONVERSATION_INLINE_MAX_BYTES", "4096"))  # Larger go to blobs
+CONVERSATION_RESUME_MESSAGES = int(os.getenv("CONVERSATION_RESUME_MESSAGES", "200"))  # 0 = whole log
+
 # Server Configuration
 MCP_SERVER_HOST = os.getenv("MCP_SERVER_HOST", "localhost")
 MCP_SERVER_PORT = int(os.getenv("MCP_SERVER_PORT", "8000"))
+# Warm server pool: idle pre-initialized servers kept by the client (0 = spawn per session)
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "0"))
+MCP_POOL_MAX_USES = int(os.getenv("MCP_POOL_MAX_USES", "0"))  # Sessions per server; 0 = unlimited
+MCP_POOL_HEALTH_INTERVAL = float(os.getenv("MCP_POOL_HEALTH_INTERVAL", "30"))  # Seconds; 0 disables
+# Reuse converted tool schemas across sessions (validated by a background tools/list)
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Tool call deadline in seconds (0 = wait forever); timed out calls are cancelled on the server
+MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "120"))
+MCP_CALL_RETRIES = int(os.getenv("MCP_CALL_RETRIES", "1"))  # Retries of idempotent tools after a failure
+MCP_RECONNECT_ATTEMPTS = int(os.getenv("MCP_RECONNECT_ATTEMPTS", "3"))
+MCP_RECONNECT_BACKOFF = float(os.getenv("MCP_RECONNECT_BACKOFF", "0.5"))  # Seconds, doubled per attempt
+# Quotas enforced by the server (0 disables each limit)
+SESSION_RATE_LIMIT = float(os.getenv("SESSION_RATE_LIMIT", "20"))  # Tool calls per second per session
+SESSION_RATE_BURST = float(os.getenv("SESSION_RATE_BURST", "40"))
+TOOL_RATE_LIMITS = os.getenv("TOOL_RATE_LIMITS", "execute_command=1:5")  # Per session, "tool=rate[:burst]"
+SESSION_MAX_CONCURRENT = int(os.getenv("SESSION_MAX_CONCURRENT", "4"))  # Running tool calls per session
+# Running calls per tool across all sessions, "tool=limit"
+TOOL_MAX_CONCURRENT = os.getenv("TOOL_MAX_CONCURRENT", "execute_command=2,semantic_search=1")
+SESSION_IO_BYTES_PER_SEC = float(os.getenv("SESSION_IO_BYTES_PER_SEC", "0"))  # Tool response bytes
+READ_FILE_MAX_BYTES = int(os.getenv("READ_FILE_MAX_BYTES", str(1024 * 1024)))  # Bytes read per read_file call
+COMMAND_CPU_SECONDS = int(os.getenv("COMMAND_CPU_SECONDS", "30"))  # CPU time per execute_command
+COMMAND_MEMORY_MB = int(os.getenv("COMMAND_MEMORY_MB", "0"))  # Data segment per execute_command process
+COMMAND_MAX_OUTPUT_BYTES = int(os.getenv("COMMAND_MAX_OUTPUT_BYTES", str(1024 * 1024)))  # Per stream
+# Tool result fields larger than this are stored as blobs and replaced by a handle (0 disables)
+RESULT_OFFLOAD_BYTES = int(os.getenv("RESULT_OFFLOAD_BYTES", "16384"))
+RESULT_PREVIEW_CHARS = int(os.getenv("RESULT_PREVIEW_CHARS", "500"))  # Kept inline with the handle
+# Largest single JSON-RPC message accepted over the TCP transport
+TRANSPORT_MAX_MESSAGE_BYTES = int(os.getenv("TRANSPORT_MAX_MESSAGE_BYTES", str(256 * 1024 * 1024)))
 
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "200"))
+# Per-tool payload log sampling, e.g. "read_file=0.1,*=1"
+LOG_TOOL_SAMPLE_RATES = os.getenv("LOG_TOOL_SAMPLE_RATES", "")
+
+# Embeddings / semantic retrieval
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "ollama")  # "ollama" or "hash" (offline stand-in)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))  # Only used by the "hash" backend
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+RETRIEVAL_CHUNK_LINES = int(os.getenv("RETRIEVAL_CHUNK_LINES", "40"))
+RETRIEVAL_CHUNK_OVERLAP = int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", "5"))
+RETRIEVAL_MAX_FILE_BYTES = int(os.getenv("RETRIEVAL_MAX_FILE_BYTES", str(1024 * 1024)))
+
+# Metrics
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "10"))  # Seconds; 0 disables files
+METRICS_HTTP_PORT = int(os.getenv("METRICS_HTTP_PORT", "0"))  # 0 disables the client endpoint
+
+# Tracing
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "jsonl")  # "jsonl" or "otlp"
+TRACE_FILE = os.getenv("TRACE_FILE", "")  # Defaults to data/traces/spans.jsonl
+OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://localhost:4318")
+
+# Profiling (captures go to data/profiles/; can also be armed with the profile tool)
+PROFILE_NEXT_CALLS = int(os.getenv("PROFILE_NEXT_CALLS", "0"))  # Profile the next N tool calls
+PROFILE_SLOW_THRESHOLD = float(os.getenv("PROFILE_SLOW_THRESHOLD", "0"))  # Seconds; 0 disables
+PROFILE_MEMORY = os.getenv("PROFILE_MEMORY", "false").lower() in ("1", "true", "yes")
+PROFILE_TOOLS = os.getenv("PROFILE_TOOLS", "")  # Comma-separated; empty profiles all tools
 
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
+# Created on first write by whatever stores data there, not at import time
 DATA_DIR = PROJECT_ROOT / "data"
-DATA_DIR.mkdir(exist_ok=True)
 
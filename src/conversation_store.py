@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Named, append-only conversation logs that can be resumed after a restart."""
+
+import json
+import logging
+import os
+import re
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.blob_store import BlobStore
+from src.config import CONVERSATION_INLINE_MAX_BYTES, CONVERSATION_RESUME_MESSAGES, DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# One little-endian uint64 log offset per record
+INDEX_ENTRY = struct.Struct("<Q")
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9._-]{0,99}$")
+
+
+class ConversationStore:
+    """
+    Conversations stored under DATA_DIR/conversations, one per session name.
+
+    Each session is a JSONL log with one record per message (or reset),
+    written as the message is added, and an index file holding the byte
+    offset of every record, so resuming reads only the tail of the log.
+    Tool results larger than inline_max_bytes are kept in a BlobStore and
+    referenced from the log by digest; identical outputs are stored once.
+    Messages are handed back with those references in place, so a client
+    holding its history in memory doesn't hold the results; resolve() reads
+    one back when the message is sent or shown.
+
+    Args:
+        directory: Where the logs are kept
+        blobs: Store for large tool results (defaults to DATA_DIR/blobs)
+        inline_max_bytes: Tool results up to this size stay in the log
+    """
+
+    def __init__(self, directory: Optional[Path] = None, blobs: Optional[BlobStore] = None,
+                 inline_max_bytes: int = CONVERSATION_INLINE_MAX_BYTES):
+        self.directory = Path(directory or DATA_DIR / "conversations")
+        self.blobs = blobs or BlobStore()
+        self.inline_max_bytes = inline_max_bytes
+
+    def open(self, name: str) -> "Conversation":
+        """
+        Open a session for appending, creating it if needed.
+
+        Raises:
+            ValueError: If the name isn't a plain file name
+            RuntimeError: If the session is already open (in this or another process)
+        """
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Invalid session name {name!r}: use letters, digits, '.', '_' or '-'")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return Conversation(name, self.directory / f"{name}.jsonl", self.directory / f"{name}.idx",
+                            self.blobs, self.inline_max_bytes)
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """Return name, record count and last modification time of every session."""
+        sessions = []
+        if not self.directory.is_dir():
+            return sessions
+        for path in sorted(self.directory.glob("*.jsonl")):
+            index_path = path.with_suffix(".idx")
+            sessions.append({
+                "name": path.stem,
+                "records": index_path.stat().st_size // INDEX_ENTRY.size if index_path.exists() else 0,
+                "modified": datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+            })
+        return sessions
+
+
+class Conversation:
+    """
+    One named session's log, held open for appending by a single process.
+
+    Use ConversationStore.open() rather than creating this directly.
+    """
+
+    def __init__(self, name: str, log_path: Path, index_path: Path, blobs: BlobStore,
+                 inline_max_bytes: int):
+        self.name = name
+        self.log_path = log_path
+        self.index_path = index_path
+        self.blobs = blobs
+        self.inline_max_bytes = inline_max_bytes
+        self._log = open(log_path, "ab")
+        try:
+            self._lock()
+            self._index = open(index_path, "ab")
+            self._recover()
+        except BaseException:
+            self._log.close()
+            raise
+        self.records = self._index.tell() // INDEX_ENTRY.size
+
+    def _lock(self):
+        """Take an exclusive lock on the log; two writers would interleave records."""
+        try:
+            import fcntl
+        except ImportError:
+            return
+        try:
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(f"Session {self.name!r} is already open elsewhere") from None
+
+    def _recover(self):
+        """
+        Make the log and index agree after a crash.
+
+        A crash can leave a torn last line in the log, a partial index entry,
+        or log records the index doesn't list yet. The torn line is cut off
+        and the index is rebuilt from its last entry onwards.
+        """
+        log_size = self._log.seek(0, os.SEEK_END)
+        entries = self._index.seek(0, os.SEEK_END) // INDEX_ENTRY.size
+
+        # Start from the last entry that points into the log, re-checking that record
+        offset = 0
+        with open(self.index_path, "rb") as f:
+            while entries:
+                f.seek((entries - 1) * INDEX_ENTRY.size)
+                offset = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))[0]
+                entries -= 1
+                if offset < log_size:
+                    break
+                offset = 0
+
+        offsets = []
+        with open(self.log_path, "rb") as f:
+            f.seek(offset)
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                offsets.append(offset)
+                offset += len(line)
+        if offset != log_size:
+            logger.warning("Conversation %s: dropping %d bytes of a partly written record",
+                           self.name, log_size - offset)
+            self._log.truncate(offset)
+            self._log.seek(0, os.SEEK_END)
+        if len(offsets) > 1:
+            logger.warning("Conversation %s: re-indexed %d records", self.name, len(offsets) - 1)
+        self._index.truncate(entries * INDEX_ENTRY.size)
+        self._index.seek(0, os.SEEK_END)
+        self._index.write(b"".join(INDEX_ENTRY.pack(position) for position in offsets))
+        self._index.flush()
+
+    def append(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Write a message to the end of the log.
+
+        Returns:
+            The message as logged: a large tool result is replaced by its
+            content_blob digest and content_bytes size
+        """
+        record = {"ts": datetime.now().isoformat(), "message": message}
+        content = message.get("content")
+        if message.get("role") == "tool" and isinstance(content, str):
+            data = content.encode("utf-8")
+            if len(data) > self.inline_max_bytes:
+                stored = {key: value for key, value in message.items() if key != "content"}
+                stored["content_blob"] = self.blobs.put(data)
+                stored["content_bytes"] = len(data)
+                record["message"] = stored
+        self._write(record)
+        return record["message"]
+
+    def reset(self):
+        """Mark the conversation as cleared; earlier messages are no longer resumed."""
+        self._write({"ts": datetime.now().isoformat(), "reset": True})
+
+    def _write(self, record: Dict[str, Any]):
+        line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        offset = self._log.tell()
+        self._log.write(line)
+        self._log.flush()
+        # The index is written second: after a crash between the two, _recover() rebuilds it
+        self._index.write(INDEX_ENTRY.pack(offset))
+        self._index.flush()
+        self.records += 1
+
+    def load(self, limit: int = CONVERSATION_RESUME_MESSAGES) -> List[Dict[str, Any]]:
+        """
+        Return the messages since the last reset, at most the last `limit` records.
+
+        Only the tail of the log is read. When the limit cuts the
+        conversation, it starts at the first user message in the window so a
+        tool result is never resumed without the call that produced it.
+        Out-of-line tool results stay references; see resolve().
+
+        Args:
+            limit: Records to read back (0 = the whole log)
+        """
+        start = max(0, self.records - limit) if limit > 0 else 0
+        if start == self.records:
+            return []
+        with open(self.index_path, "rb") as f:
+            f.seek(start * INDEX_ENTRY.size)
+            offset = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))[0]
+        with open(self.log_path, "rb") as f:
+            f.seek(offset)
+            records = [json.loads(line) for line in f]
+
+        messages: List[Dict[str, Any]] = []
+        truncated = start > 0
+        for record in records:
+            if record.get("reset"):
+                messages = []
+                truncated = False
+            else:
+                messages.append(record["message"])
+        if truncated:
+            first_user = next((i for i, message in enumerate(messages) if message.get("role") == "user"),
+                              len(messages))
+            messages = messages[first_user:]
+        return messages
+
+    def resolve(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a message with an out-of-line tool result read back into its content."""
+        digest = message.get("content_blob")
+        if digest is None:
+            return message
+        message = {key: value for key, value in message.items()
+                   if key not in ("content_blob", "content_bytes")}
+        try:
+            message["content"] = self.blobs.get_text(digest)
+        except FileNotFoundError:
+            logger.warning("Conversation %s: tool result %s is missing from the blob store", self.name, digest)
+            message["content"] = json.dumps({"success": False, "error": "Stored tool result is missing"})
+        return message
+
+    def close(self):
+        self._index.close()
+        self._log.close()
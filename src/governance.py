@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Per-session and per-tool quotas: rate limits, concurrency caps and subprocess limits."""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config import (
+    COMMAND_CPU_SECONDS, COMMAND_MEMORY_MB, SESSION_IO_BYTES_PER_SEC, SESSION_MAX_CONCURRENT,
+    SESSION_RATE_BURST, SESSION_RATE_LIMIT, TOOL_MAX_CONCURRENT, TOOL_RATE_LIMITS
+)
+from src.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REJECTIONS = REGISTRY.counter("mcp_server_quota_rejections_total", "Tool calls rejected by quotas")
+
+# Seconds of SESSION_IO_BYTES_PER_SEC a session may use in one burst
+IO_BURST_SECONDS = 10
+
+
+class QuotaExceeded(Exception):
+    """
+    A tool call was rejected by a quota.
+
+    Attributes:
+        error_type: "rate_limited" or "concurrency_limited"
+        retry_after: Seconds until the call would be admitted (a hint for concurrency limits)
+    """
+
+    def __init__(self, message: str, error_type: str, retry_after: float):
+        super().__init__(message)
+        self.error_type = error_type
+        self.retry_after = retry_after
+
+    def to_result(self) -> Dict[str, Any]:
+        """The structured error returned to the client instead of a tool result."""
+        return {
+            "success": False,
+            "error": str(self),
+            "error_type": self.error_type,
+            "retry_after": round(self.retry_after, 3)
+        }
+
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `burst`.
+
+    The level may go negative through charge(); the bucket then admits
+    nothing until it has refilled past zero. Not thread-safe; Governor
+    serializes access.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float = 1.0) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        self._refill()
+        missing = amount - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def charge(self, amount: float):
+        """Remove tokens, going into debt if there aren't enough."""
+        self._refill()
+        self.tokens -= amount
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse a spec like "execute_command=1:5,read_file=10" into {tool: (limit, burst)}.
+
+    The burst defaults to the limit.
+    """
+    limits: Dict[str, Tuple[float, float]] = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            limit, _, burst = value.partition(":")
+            limits[name.strip()] = (float(limit), float(burst or limit))
+    return limits
+
+
+class SessionQuota:
+    """Quota state of one client session."""
+
+    def __init__(self, governor: "Governor"):
+        self.calls = (TokenBucket(governor.session_rate, governor.session_burst)
+                      if governor.session_rate > 0 else None)
+        self.io = (TokenBucket(governor.io_rate, governor.io_rate * IO_BURST_SECONDS)
+                   if governor.io_rate > 0 else None)
+        self.tool_calls: Dict[str, TokenBucket] = {}
+        self.running = 0
+
+
+class Permit:
+    """An admitted tool call; release() must be called when the tool stops running."""
+
+    def __init__(self, governor: "Governor", session: SessionQuota, tool: str):
+        self._governor = governor
+        self.session = session
+        self.tool = tool
+        self._released = False
+
+    def release(self):
+        """Give back the concurrency slots; safe to call more than once, from any thread."""
+        self._governor._release(self)
+
+    def charge_io(self, size: int):
+        """Count `size` response bytes against the session's I/O budget."""
+        if self.session.io is not None:
+            with self._governor._lock:
+                self.session.io.charge(size)
+
+
+class Governor:
+    """
+    Admit or reject tool calls.
+
+    Per session: a token bucket of calls per second, a token bucket per tool
+    (TOOL_RATE_LIMITS), a cap on tool calls running at once, and a budget of
+    response bytes per second. Per tool, across all sessions: a cap on calls
+    running at once (TOOL_MAX_CONCURRENT). A call counts as running until
+    its worker thread finishes, so calls the client cancelled or abandoned
+    keep their slot until they actually stop.
+
+    Rejected calls raise QuotaExceeded without consuming any tokens.
+
+    Args:
+        session_rate: Calls per second per session (0 = unlimited)
+        session_burst: Calls a session can make at once after being idle
+        tool_rates: {tool: (calls per second, burst)} per session
+        session_concurrency: Calls running at once per session (0 = unlimited)
+        tool_concurrency: {tool: calls running at once} across all sessions
+        io_rate: Response bytes per second per session (0 = unlimited)
+    """
+
+    def __init__(self, session_rate: float = SESSION_RATE_LIMIT, session_burst: float = SESSION_RATE_BURST,
+                 tool_rates: Optional[Dict[str, Tuple[float, float]]] = None,
+                 session_concurrency: int = SESSION_MAX_CONCURRENT,
+                 tool_concurrency: Optional[Dict[str, int]] = None,
+                 io_rate: float = SESSION_IO_BYTES_PER_SEC):
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.tool_rates = {tool: limits for tool, limits in (tool_rates or {}).items() if limits[0] > 0}
+        self.session_concurrency = session_concurrency
+        self.tool_concurrency = {tool: int(limit) for tool, limit in (tool_concurrency or {}).items() if limit > 0}
+        self.io_rate = io_rate
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = {}
+
+    def new_session(self) -> SessionQuota:
+        return SessionQuota(self)
+
+    def admit(self, session: SessionQuota, tool: str) -> Permit:
+        """
+        Admit a tool call or raise QuotaExceeded.
+
+        Args:
+            session: Quota state of the calling session
+            tool: Tool name
+
+        Returns:
+            A permit to release when the tool stops running
+        """
+        with self._lock:
+            error = self._check(session, tool)
+            if error is None:
+                if session.calls is not None:
+                    session.calls.charge(1)
+                if tool in self.tool_rates:
+                    self._tool_bucket(session, tool).charge(1)
+                session.running += 1
+                self._running[tool] = self._running.get(tool, 0) + 1
+        if error is not None:
+            REJECTIONS.inc(tool=tool, reason=error.error_type)
+            logger.warning("Rejected %s: %s", tool, error, extra={"tool": tool})
+            raise error
+        return Permit(self, session, tool)
+
+    def _tool_bucket(self, session: SessionQuota, tool: str) -> TokenBucket:
+        bucket = session.tool_calls.get(tool)
+        if bucket is None:
+            bucket = session.tool_calls[tool] = TokenBucket(*self.tool_rates[tool])
+        return bucket
+
+    def _check(self, session: SessionQuota, tool: str) -> Optional[QuotaExceeded]:
+        """Return why a call can't run now, or None. Called with the lock held."""
+        if self.session_concurrency > 0 and session.running >= self.session_concurrency:
+            return QuotaExceeded(f"Session already has {session.running} tool calls running",
+                                 "concurrency_limited", 1.0)
+        tool_limit = self.tool_concurrency.get(tool)
+        if tool_limit is not None and self._running.get(tool, 0) >= tool_limit:
+            return QuotaExceeded(f"{tool} already has {tool_limit} calls running",
+                                 "concurrency_limited", 1.0)
+
+        waits: List[Tuple[float, str]] = []
+        if session.calls is not None:
+            waits.append((session.calls.wait_time(), "Session call rate limit reached"))
+        if tool in self.tool_rates:
+            waits.append((self._tool_bucket(session, tool).wait_time(), f"{tool} call rate limit reached"))
+        if session.io is not None:
+            # Responses are charged after the fact; wait until the debt is paid off
+            waits.append((session.io.wait_time(0), "Session I/O budget exhausted"))
+        retry_after, message = max(waits, default=(0.0, ""))
+        if retry_after > 0:
+            return QuotaExceeded(message, "rate_limited", retry_after)
+        return None
+
+    def _release(self, permit: Permit):
+        with self._lock:
+            if permit._released:
+                return
+            permit._released = True
+            permit.session.running -= 1
+            self._running[permit.tool] -= 1
+
+
+def create_governor() -> Governor:
+    """Create a governor from the SESSION_* and TOOL_* quota settings."""
+    return Governor(
+        tool_rates=parse_limits(TOOL_RATE_LIMITS),
+        tool_concurrency={tool: int(limit) for tool, (limit, _) in parse_limits(TOOL_MAX_CONCURRENT).items()}
+    )
+
+
+def limit_command(command: str, cpu_seconds: int = COMMAND_CPU_SECONDS,
+                  memory_mb: int = COMMAND_MEMORY_MB) -> str:
+    """
+    Prefix a shell command with ulimit calls for its CPU and memory limits.
+
+    The shell sets the limits on itself before running the command, so they
+    apply to everything the command starts. (A subprocess preexec_fn could
+    do the same, but isn't safe in a process with threads, and tools run on
+    worker threads.) Past the CPU limit the process gets SIGXCPU; heap and
+    private mapping allocations past the memory limit (RLIMIT_DATA) fail.
+    Address space isn't limited, since runtimes such as Java, Go and Node
+    reserve far more of it than they use. Returns the command unchanged
+    where there are no rlimits (Windows) or both limits are disabled.
+    """
+    try:
+        import resource
+    except ImportError:
+        return command
+    # (ulimit flag, rlimit, soft, hard, bytes per ulimit unit)
+    limits = []
+    if cpu_seconds > 0:
+        # The hard limit a second later turns an ignored SIGXCPU into SIGKILL
+        limits.append(("-t", resource.RLIMIT_CPU, cpu_seconds, cpu_seconds + 1, 1))
+    if memory_mb > 0:
+        limits.append(("-d", resource.RLIMIT_DATA, memory_mb * 1024 * 1024, memory_mb * 1024 * 1024, 1024))
+    if not limits:
+        return command
+    settings = []
+    for flag, limit, soft, hard, unit in limits:
+        # An unprivileged process can't raise a hard limit, so stay under the current one
+        current = resource.getrlimit(limit)[1]
+        if current != resource.RLIM_INFINITY:
+            soft, hard = min(soft, current), min(hard, current)
+        # Soft first: a hard limit below the current soft one is rejected
+        settings.append(f"ulimit -S {flag} {soft // unit}; ulimit -H {flag} {hard // unit}")
+    return "; ".join(settings) + "\n" + command
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Logging setup shared by the MCP client and server."""
+
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Any, Dict, Optional
+
+from src.config import LOG_LEVEL, LOG_FORMAT, LOG_PAYLOAD_MAX_CHARS, LOG_TOOL_SAMPLE_RATES
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _Items(list):
+    """First items of a longer list, copied by _freeze(); `total` is the full length."""
+
+    __slots__ = ("total",)
+
+
+def _freeze(obj: Any, max_items: int) -> Any:
+    """Copy the containers of a JSON-like value (at most max_items per list); strings are shared."""
+    if isinstance(obj, dict):
+        return {key: _freeze(value, max_items) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        items = _Items(_freeze(value, max_items) for value in obj[:max_items])
+        items.total = getattr(obj, "total", len(obj))
+        return items
+    return obj
+
+
+def _summarize(obj: Any, max_chars: int) -> Any:
+    """Copy a JSON-like value with every long string cut to max_chars plus its size and hash."""
+    if isinstance(obj, str):
+        if len(obj) <= max_chars:
+            return obj
+        digest = hashlib.sha256(obj.encode("utf-8", "replace")).hexdigest()[:12]
+        return f"{obj[:max_chars]}...<{len(obj)} chars, sha256:{digest}>"
+    if isinstance(obj, dict):
+        return {key: _summarize(value, max_chars) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        total = getattr(obj, "total", len(obj))
+        if total > max_chars:
+            return [_summarize(value, max_chars) for value in obj[:max_chars]] + [f"...<{total} items>"]
+        return [_summarize(value, max_chars) for value in obj]
+    return obj
+
+
+class Payload:
+    """
+    Lazily rendered, size-bounded view of a tool payload for log messages.
+
+    Nothing is formatted unless the record is actually emitted, and then only
+    in the background logging thread. When the record is queued, the
+    payload's containers are copied (see snapshot()), so changes the caller
+    makes afterwards don't show up in the log.
+    """
+
+    __slots__ = ("obj", "max_chars")
+
+    def __init__(self, obj: Any, max_chars: int = LOG_PAYLOAD_MAX_CHARS):
+        self.obj = obj
+        self.max_chars = max_chars
+
+    def snapshot(self) -> "Payload":
+        """Payload over a copy of this one's dicts and lists; the long strings are only referenced."""
+        return Payload(_freeze(self.obj, self.max_chars), self.max_chars)
+
+    def summary(self) -> Any:
+        return _summarize(self.obj, self.max_chars)
+
+    def __str__(self) -> str:
+        summary = self.summary()
+        if isinstance(summary, str):
+            return summary
+        return json.dumps(summary, default=str)
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, Payload):
+        return obj.summary()
+    return str(obj)
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including any `extra` fields."""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=_json_default)
+
+
+def _snapshot(value: Any) -> Any:
+    return value.snapshot() if isinstance(value, Payload) else value
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock implementation formats the message on the calling thread,
+        # which is exactly the work we want off the hot path. Payloads are
+        # copied instead: the caller may change a logged dict before the
+        # listener formats it.
+        if isinstance(record.args, tuple):
+            record.args = tuple(_snapshot(arg) for arg in record.args)
+        elif isinstance(record.args, dict):
+            record.args = {key: _snapshot(arg) for key, arg in record.args.items()}
+        record.msg = _snapshot(record.msg)
+        return record
+
+
+class ToolLogSampler:
+    """
+    Decide which tool calls get their payloads logged.
+
+    Rates come from a spec like "read_file=0.1,execute_command=1,*=0.5"; tools
+    without an explicit rate use "*" (default 1.0).
+    """
+
+    def __init__(self, spec: str = LOG_TOOL_SAMPLE_RATES):
+        self.rates: Dict[str, float] = {}
+        for part in spec.split(","):
+            if "=" in part:
+                name, rate = part.split("=", 1)
+                self.rates[name.strip()] = float(rate)
+        self.default_rate = self.rates.pop("*", 1.0)
+
+    def should_log(self, tool_name: str) -> bool:
+        rate = self.rates.get(tool_name, self.default_rate)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+tool_sampler = ToolLogSampler()
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """
+    Route all logging through a queue drained by a background writer thread.
+
+    Callers only pay for enqueuing a record; formatting and the stderr write
+    happen on the listener thread. Safe to call more than once.
+
+    Args:
+        level: Root log level name
+        fmt: "text" for the classic line format or "json" for structured output
+    """
+    global _listener
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
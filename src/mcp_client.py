@@ -6,111 +6,367 @@ import json
 import logging
 import sys
 import os
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Literal, Optional, Tuple
 from pathlib import Path
 from contextlib import AsyncExitStack
 
+import anyio
 import ollama
+import mcp.types as types
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
-from src.config import OLLAMA_HOST, OLLAMA_MODEL, LOG_LEVEL
-
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from src.config import (
+    OLLAMA_HOST, OLLAMA_MODEL,
+    LLM_CACHE_ENABLED, LLM_DETERMINISTIC, LLM_SEED, CHAT_MAX_TOOL_ROUNDS,
+    METRICS_HTTP_PORT, MCP_POOL_SIZE, MCP_POOL_MAX_USES, MCP_POOL_HEALTH_INTERVAL,
+    TOOL_CACHE_ENABLED, TOOL_SELECTION_ENABLED,
+    MCP_CALL_TIMEOUT, MCP_CALL_RETRIES, MCP_RECONNECT_ATTEMPTS, MCP_RECONNECT_BACKOFF
+)
+from src.conversation_store import Conversation, ConversationStore
+from src.logging_utils import Payload, setup_logging, tool_sampler
+from src.metrics import (
+    REGISTRY, COUNT_BUCKETS, RATE_BUCKETS, ExpositionFileWriter, start_http_server
 )
+from src.response_cache import ResponseCache, get_response_cache, tools_hash
+from src.server_pool import PooledServer, ServerPool
+from src.tool_cache import ToolSchemaCache, watch_tool_list
+from src.tool_selection import ToolSelector, create_selector
+from src.tool_definitions import IDEMPOTENT_TOOLS, INTERNAL_TOOLS
+from src.tracing import tracer
+from src.transport import socket_client
+
+# Configure logging and tracing
+setup_logging()
+tracer.configure("mcp-client")
 logger = logging.getLogger(__name__)
 
+# Metrics
+CHAT_TURN = REGISTRY.histogram("mcp_client_chat_turn_seconds", "End-to-end chat turn time")
+LLM_REQUEST = REGISTRY.histogram("mcp_client_llm_seconds", "Wall time of Ollama chat requests")
+LLM_PROMPT_EVAL = REGISTRY.histogram(
+    "mcp_client_llm_prompt_eval_seconds", "Ollama prompt evaluation time (prompt_eval_duration)"
+)
+LLM_GENERATION = REGISTRY.histogram(
+    "mcp_client_llm_generation_seconds", "Ollama token generation time (eval_duration)"
+)
+LLM_PROMPT_TOKENS = REGISTRY.histogram(
+    "mcp_client_llm_prompt_tokens", "Prompt tokens evaluated per request", COUNT_BUCKETS
+)
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "mcp_client_llm_tokens_per_second", "Generation throughput", RATE_BUCKETS
+)
+LLM_CACHE = REGISTRY.counter("mcp_client_llm_cache_total", "Response cache lookups by result")
+TOOL_ROUNDTRIP = REGISTRY.histogram("mcp_client_tool_call_seconds", "MCP tool call round-trip time")
+SERIALIZATION = REGISTRY.histogram(
+    "mcp_client_serialization_seconds", "Time spent encoding and decoding JSON payloads"
+)
+TOOL_FAILURES = REGISTRY.counter("mcp_client_tool_failures_total", "Tool call attempts that timed out or lost the server")
+TOOL_RETRIES = REGISTRY.counter("mcp_client_tool_retries_total", "Idempotent tool calls retried")
+RECONNECTS = REGISTRY.counter("mcp_client_reconnects_total", "Reconnects to the MCP server by reason and outcome")
+RECONNECT_TIME = REGISTRY.histogram("mcp_client_reconnect_seconds", "Time to respawn or reconnect and re-initialize")
+
+# Seconds to wait for a ping after a timeout, and for a server to exit on close
+PING_TIMEOUT = 5.0
+SHUTDOWN_TIMEOUT = 5.0
+
+_metrics_http_server = None
+_server_pool: Optional[ServerPool] = None
+
+
+class CancelledNotificationParams(types.NotificationParams):
+    requestId: types.RequestId
+    reason: Optional[str] = None
+
+
+class CancelledNotification(types.Notification[CancelledNotificationParams, Literal["notifications/cancelled"]]):
+    """
+    MCP `notifications/cancelled`, which the installed SDK doesn't define.
+
+    ClientSession.send_notification() sends it as is; our server takes it out
+    of the stream before the SDK sees it (see transport.filter_cancellations).
+    """
+
+    method: Literal["notifications/cancelled"]
+    params: CancelledNotificationParams
+
+
+class ToolCallFailed(Exception):
+    """A tool call that got no result: timed out, lost its server, or the server can't be reached."""
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+def _server_params() -> StdioServerParameters:
+    """Parameters for spawning src/mcp_server.py over STDIO."""
+    server_script = Path(__file__).parent.parent / "src" / "mcp_server.py"
+    return StdioServerParameters(
+        command="python3",
+        args=[str(server_script)],
+        # Forward our environment so settings exported by the caller (not
+        # only those in .env) reach the server, e.g. LOG_FORMAT
+        env=dict(os.environ)
+    )
+
+
+def get_server_pool() -> Optional[ServerPool]:
+    """
+    Return the shared warm server pool for this event loop, or None if MCP_POOL_SIZE is 0.
+
+    Whoever runs the event loop should await close_server_pool() before it ends.
+    """
+    global _server_pool
+    if MCP_POOL_SIZE <= 0:
+        return None
+    loop = asyncio.get_running_loop()
+    if _server_pool is None or _server_pool.closed or _server_pool.loop not in (None, loop):
+        _server_pool = ServerPool(
+            _server_params(), MCP_POOL_SIZE,
+            max_uses=MCP_POOL_MAX_USES, health_interval=MCP_POOL_HEALTH_INTERVAL,
+            failure_backoff=MCP_RECONNECT_BACKOFF
+        )
+    return _server_pool
+
+
+async def close_server_pool():
+    """Stop the shared server pool's subprocesses, if one was started."""
+    global _server_pool
+    if _server_pool is not None:
+        await _server_pool.close()
+        _server_pool = None
+
 
 class MCPClient:
     """MCP Client that communicates with MCP Server via STDIO and integrates with Ollama LLM."""
 
-    def __init__(self):
+    def __init__(self, use_cache: Optional[bool] = None,
+                 server_address: Optional[Tuple[str, int]] = None,
+                 pool: Optional[ServerPool] = None, show_tool_calls: bool = True,
+                 session_name: Optional[str] = None):
+        """
+        Args:
+            use_cache: Enable the LLM response cache (defaults to LLM_CACHE_ENABLED)
+            server_address: (host, port) of an already running TCP MCP server to
+                connect to instead of spawning one over STDIO
+            pool: Warm server pool to take a server from (defaults to the shared
+                pool when MCP_POOL_SIZE > 0)
+            show_tool_calls: Print a line to stdout for each tool the model calls
+            session_name: Resume and keep appending to this named conversation
+                in the conversation store
+        """
         self.tools: List[Dict[str, Any]] = []
-        self.ollama_client = ollama.Client(host=OLLAMA_HOST)
-        self.conversation_history: List[Dict[str, Any]] = []
+        self._tools_hash: Optional[str] = None
+        self.tool_selector: Optional[ToolSelector] = None
+        self.tool_cache: Optional[ToolSchemaCache] = ToolSchemaCache() if TOOL_CACHE_ENABLED else None
+        self._tool_cache_key: Optional[str] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Set when the current session's transport closes (server exited or connection dropped)
+        self._session_lost = asyncio.Event()
+        # Async client so concurrent sessions in one event loop don't block each other
+        self.ollama_client = ollama.AsyncClient(host=OLLAMA_HOST)
+        self.server_address = server_address
+        self.pool = pool
+        self.show_tool_calls = show_tool_calls
+        self._pooled: Optional[PooledServer] = None
+        if use_cache is None:
+            use_cache = LLM_CACHE_ENABLED
+        self.response_cache: Optional[ResponseCache] = get_response_cache() if use_cache else None
+        self.llm_options: Optional[Dict[str, Any]] = (
+            {"temperature": 0, "seed": LLM_SEED} if LLM_DETERMINISTIC else None
+        )
+        self.conversation: Optional[Conversation] = (
+            ConversationStore().open(session_name) if session_name else None
+        )
+        self.conversation_history: List[Dict[str, Any]] = (
+            self.conversation.load() if self.conversation is not None else []
+        )
         self.session: Optional[ClientSession] = None
         self._server_params: Optional[StdioServerParameters] = None
         self.exit_stack = AsyncExitStack()
+        self._shutdown_scope: Optional[anyio.CancelScope] = None
+        self.metrics_file = ExpositionFileWriter("client")
 
     async def connect(self):
         """
         Initialize the MCP client by spawning the MCP server and connecting via STDIO.
+
+        With server_address the client connects to a running TCP server instead,
+        and with a warm pool it takes an already initialized server from it.
         """
-        logger.info("Initializing MCP client - spawning MCP server subprocess")
+        global _metrics_http_server
+        if METRICS_HTTP_PORT and _metrics_http_server is None:
+            _metrics_http_server = start_http_server(METRICS_HTTP_PORT)
 
-        # Get the project root directory
-        project_root = Path(__file__).parent.parent
-        server_script = project_root / "src" / "mcp_server.py"
+        try:
+            await self._open_session()
+        except Exception as e:
+            logger.error(f"Failed to connect to MCP server: {e}")
+            await self.close()
+            raise
 
-        # Configure server parameters for STDIO communication
-        self._server_params = StdioServerParameters(
-            command="python3",
-            args=[str(server_script)],
-            env=None
-        )
+    async def _open_session(self):
+        """Connect over the configured transport and initialize a session."""
+        # Outermost context, so _disconnect() can put a deadline on closing the rest
+        self._shutdown_scope = self.exit_stack.enter_context(anyio.CancelScope())
+        if self.server_address is not None:
+            await self._connect_socket(*self.server_address)
+            return
 
-        logger.info(f"Starting MCP server: python3 {server_script}")
+        if self.pool is None:
+            self.pool = get_server_pool()
+        if self.pool is not None:
+            await self._connect_pooled()
+            return
+
+        logger.info("Initializing MCP client - spawning MCP server subprocess")
+        self._server_params = _server_params()
+        logger.info(f"Starting MCP server: {self._server_params.command} {' '.join(self._server_params.args)}")
 
         # Connect to server via STDIO
-        try:
-            # Use AsyncExitStack for cleaner resource management (official MCP pattern)
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(self._server_params)
-            )
-            read_stream, write_stream = stdio_transport
+        # Use AsyncExitStack for cleaner resource management (official MCP pattern)
+        stdio_transport = await self.exit_stack.enter_async_context(
+            stdio_client(self._server_params)
+        )
+        read_stream, write_stream = stdio_transport
+        await self._start_session(read_stream, write_stream)
+
+    async def _connect_pooled(self):
+        """Take an initialized server from the warm pool; its tool list is already loaded."""
+        started = time.perf_counter()
+        self._pooled = await self.pool.acquire()
+        self.session = self._pooled.session
+        # The pool retires a member whose transport closes
+        self._session_lost = self._pooled.retired
+        self._set_tools(self._pooled.tools)
+        # The pool re-lists tools when the server reports a change
+        self._pooled.on_tools_changed = self._set_tools
+        logger.info("MCP client connected to pooled server in %.1fms", (time.perf_counter() - started) * 1000)
+
+    async def _connect_socket(self, host: str, port: int):
+        """Connect to a TCP MCP server started with `mcp_server.py --transport tcp`."""
+        logger.info(f"Connecting to MCP server at {host}:{port}")
+        read_stream, write_stream = await self.exit_stack.enter_async_context(
+            socket_client(host, port)
+        )
+        await self._start_session(read_stream, write_stream)
 
-            # Create client session
-            self.session = await self.exit_stack.enter_async_context(
-                ClientSession(read_stream, write_stream)
-            )
+    async def _start_session(self, read_stream, write_stream):
+        """Create the client session on the given streams, initialize it and load tools."""
+        # Create client session
+        self.session = await self.exit_stack.enter_async_context(
+            ClientSession(read_stream, write_stream)
+        )
 
-            # Initialize the session (MCP handshake)
-            logger.info("Initializing MCP session")
-            await self.session.initialize()
+        # Initialize the session (MCP handshake)
+        logger.info("Initializing MCP session")
+        init_result = await self.session.initialize()
 
-            logger.info("MCP session initialized successfully")
+        logger.info("MCP session initialized successfully")
+        self._session_lost = asyncio.Event()
+        self._watch_task = asyncio.create_task(self._watch_session(self.session, self._session_lost))
 
-            # Discover tools from the MCP server
-            await self._load_tools()
+        # Discover tools from the MCP server (or the tool cache)
+        await self._load_tools(init_result)
 
-            logger.info("MCP client connected and ready")
+        logger.info("MCP client connected and ready")
 
-        except Exception as e:
-            logger.error(f"Failed to connect to MCP server: {e}")
-            await self.close()
-            raise
+    async def _watch_session(self, session: ClientSession, lost: asyncio.Event):
+        """Handle server notifications until the session's transport closes."""
+        try:
+            await watch_tool_list(session, self._start_refresh)
+        finally:
+            lost.set()
+
+    async def _load_tools(self, init_result: Optional[types.InitializeResult] = None):
+        """
+        Discover tools from the MCP server via list_tools() call.
+
+        With the tool cache enabled, a cached list for this server version is
+        used right away and list_tools() runs in the background to validate it.
+        """
+        if self.tool_cache is not None and init_result is not None:
+            self._tool_cache_key = ToolSchemaCache.make_key(init_result)
+            cached = self.tool_cache.get(self._tool_cache_key)
+            if cached is not None:
+                self._use_tools(cached, "tool cache")
+                self._start_refresh(validate=True)
+                return
 
-    async def _load_tools(self):
-        """Discover tools from the MCP server via list_tools() call."""
         logger.info("Discovering tools from MCP server")
 
         try:
             # Call MCP server's list_tools
             tools_result = await self.session.list_tools()
-
-            # Convert MCP Tool format to Ollama format
-            self.tools = []
-            for tool in tools_result.tools:
-                ollama_tool = {
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "parameters": tool.inputSchema
-                    }
-                }
-                self.tools.append(ollama_tool)
-
-            tool_names = [t['function']['name'] for t in self.tools]
-            logger.info(f"Discovered {len(self.tools)} tools from MCP server: {tool_names}")
+            self._set_tools(tools_result)
 
         except Exception as e:
             logger.error(f"Failed to load tools from MCP server: {e}")
             raise
 
+        if self._tool_cache_key is not None:
+            self.tool_cache.put(self._tool_cache_key, self.tools)
+
+    def _start_refresh(self, validate: bool = False):
+        """Re-list tools in the background, superseding a refresh still in flight."""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = asyncio.create_task(self._refresh_tools(validate))
+
+    async def _refresh_tools(self, validate: bool = False):
+        """
+        Fetch the tool list and switch to it if it differs from the current one.
+
+        Args:
+            validate: The current list came from the tool cache; rewrite the
+                cache entry if the server disagrees with it
+        """
+        try:
+            tools = self._convert_tools(await self.session.list_tools())
+        except Exception as e:
+            logger.warning("Background tool list refresh failed: %s", e)
+            return
+        if tools_hash(tools) == self._tools_hash:
+            return
+        if validate:
+            self.tool_cache.stale += 1
+            self.tool_cache.put(self._tool_cache_key, tools)
+        self._use_tools(tools, "MCP server (changed)")
+
+    @staticmethod
+    def _convert_tools(tools_result: types.ListToolsResult) -> List[Dict[str, Any]]:
+        """Convert MCP Tool format to Ollama format, leaving out operator-only tools."""
+        tools = []
+        for tool in tools_result.tools:
+            if tool.name in INTERNAL_TOOLS:
+                continue
+            ollama_tool = {
+                "type": "function",
+                "function": {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.inputSchema
+                }
+            }
+            tools.append(ollama_tool)
+        return tools
+
+    def _set_tools(self, tools_result: types.ListToolsResult):
+        """Use the tools from a list_tools() result."""
+        self._use_tools(self._convert_tools(tools_result), "MCP server")
+
+    def _use_tools(self, tools: List[Dict[str, Any]], source: str):
+        self.tools = tools
+        self._tools_hash = tools_hash(self.tools)
+        if TOOL_SELECTION_ENABLED:
+            self.tool_selector = create_selector(self.tools)
+
+        tool_names = [t['function']['name'] for t in self.tools]
+        logger.info(f"Loaded {len(self.tools)} tools from {source}: {tool_names}")
+
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
         """
         Call a tool via the MCP server.
@@ -120,116 +376,400 @@ class MCPClient:
             arguments: Arguments to pass to the tool
 
         Returns:
-            Tool execution result
+            Tool execution result. Calls that time out or lose the server return
+            {"success": False, "error_type": "timeout" | "disconnected" | "unavailable"}
+            after reconnecting; idempotent tools are retried first.
         """
-        logger.info(f"Calling tool via MCP: {tool_name} with arguments: {arguments}")
-
-        try:
-            # Call tool via MCP protocol
-            result = await self.session.call_tool(tool_name, arguments)
-
-            # Parse the result - MCP returns list of TextContent
-            if result.content and len(result.content) > 0:
-                # Get the first content item (should be JSON)
-                content_item = result.content[0]
-                if hasattr(content_item, 'text'):
-                    # Parse JSON response
-                    tool_result = json.loads(content_item.text)
-                    return tool_result
+        if tool_sampler.should_log(tool_name):
+            logger.info("Calling tool via MCP: %s with arguments: %s", tool_name, Payload(arguments),
+                        extra={"tool": tool_name})
+
+        with tracer.span("mcp_client.call_tool", {"tool": tool_name}) as span:
+            started = time.perf_counter()
+            try:
+                # Call tool via MCP protocol, carrying trace context in the request _meta
+                result = await self._call_with_recovery(tool_name, arguments, tracer.inject())
+                TOOL_ROUNDTRIP.observe(time.perf_counter() - started, tool=tool_name)
+
+                # Parse the result - MCP returns list of TextContent
+                if result.content and len(result.content) > 0:
+                    # Get the first content item (should be JSON)
+                    content_item = result.content[0]
+                    if hasattr(content_item, 'text'):
+                        # Parse JSON response
+                        decode_start = time.perf_counter()
+                        tool_result = json.loads(content_item.text)
+                        SERIALIZATION.observe(time.perf_counter() - decode_start, op="decode_tool_result")
+                        span.set_attribute("response_bytes", len(content_item.text))
+                        return tool_result
+                    else:
+                        return {"success": False, "error": "Unexpected content format"}
                 else:
-                    return {"success": False, "error": "Unexpected content format"}
-            else:
-                return {"success": False, "error": "No content in tool response"}
-
-        except Exception as e:
-            logger.error(f"Error calling tool {tool_name} via MCP: {e}")
-            return {"success": False, "error": str(e)}
-
-    async def chat(self, user_message: str) -> str:
+                    return {"success": False, "error": "No content in tool response"}
+
+            except ToolCallFailed as e:
+                logger.error("Tool %s failed via MCP: %s", tool_name, e, extra={"tool": tool_name})
+                span.record_exception(e)
+                return {"success": False, "error": str(e), "error_type": e.error_type}
+            except Exception as e:
+                logger.error("Error calling tool %s via MCP: %s", tool_name, e, extra={"tool": tool_name})
+                span.record_exception(e)
+                return {"success": False, "error": str(e)}
+
+    async def _call_with_recovery(self, tool_name: str, arguments: Dict[str, Any],
+                                  meta: Optional[Dict[str, Any]] = None) -> types.CallToolResult:
         """
-        Send a message to the LLM and handle tool calls.
+        Call a tool, reconnecting after a timeout or lost server and retrying idempotent tools.
 
-        Args:
-            user_message: User's message
-
-        Returns:
-            Assistant's response
+        Raises:
+            ToolCallFailed: If no attempt produced a result
+        """
+        retries = MCP_CALL_RETRIES if tool_name in IDEMPOTENT_TOOLS else 0
+        for attempt in range(retries + 1):
+            if self._session_lost.is_set():
+                await self._reconnect("disconnected")
+            try:
+                return await self._call_tool_request(tool_name, arguments, meta, MCP_CALL_TIMEOUT)
+            except ToolCallFailed as e:
+                TOOL_FAILURES.inc(tool=tool_name, reason=e.error_type)
+                if e.error_type == "disconnected" or not await self._ping():
+                    await self._reconnect(e.error_type)
+                if attempt == retries:
+                    raise
+                TOOL_RETRIES.inc(tool=tool_name)
+                logger.warning("Retrying tool %s after %s", tool_name, e.error_type, extra={"tool": tool_name})
+
+    async def _call_tool_request(self, tool_name: str, arguments: Dict[str, Any],
+                                 meta: Optional[Dict[str, Any]] = None,
+                                 timeout: float = 0) -> types.CallToolResult:
         """
-        logger.info(f"User message: {user_message}")
+        Send a tools/call request, optionally with a _meta object and a deadline.
 
-        # Add user message to conversation
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
+        ClientSession.call_tool() has no way to pass _meta, but the params model
+        accepts extra fields, so the key survives serialization when set here.
+        When the deadline passes the server is sent `notifications/cancelled`.
 
-        # Call LLM with tools
+        Raises:
+            ToolCallFailed: On timeout ("timeout") or if the transport closes ("disconnected")
+        """
+        params = {"name": tool_name, "arguments": arguments}
+        if meta:
+            params["_meta"] = meta
+        request = types.ClientRequest(types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams.model_validate(params)
+        ))
+        session = self.session
+        request_ids = []
+
+        async def send():
+            # send_request() takes this id before its first await; the SDK doesn't expose it
+            request_ids.append(session._request_id)
+            return await session.send_request(request, types.CallToolResult)
+
+        call = asyncio.ensure_future(send())
+        lost = asyncio.ensure_future(self._session_lost.wait())
         try:
-            response = self.ollama_client.chat(
-                model=OLLAMA_MODEL,
-                messages=self.conversation_history,
-                tools=self.tools
-            )
+            await asyncio.wait({call, lost}, timeout=timeout or None, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            lost.cancel()
+
+        if call.done():
+            try:
+                return call.result()
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream) as e:
+                raise ToolCallFailed("disconnected", f"MCP server connection lost: {e!r}") from e
+        call.cancel()
+        if self._session_lost.is_set():
+            raise ToolCallFailed("disconnected", "MCP server connection lost")
+        if request_ids:
+            try:
+                await session.send_notification(CancelledNotification(
+                    method="notifications/cancelled",
+                    params=CancelledNotificationParams(requestId=request_ids[0], reason="timeout")
+                ))
+            except Exception as e:
+                logger.debug("Could not send cancellation: %r", e)
+        raise ToolCallFailed("timeout", f"Tool {tool_name} timed out after {timeout:g}s")
+
+    async def _ping(self) -> bool:
+        """Check whether the current server still answers (after a timed out call)."""
+        try:
+            await asyncio.wait_for(self.session.send_ping(), PING_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.warning("MCP server did not answer ping: %r", e)
+            return False
 
-            assistant_message = response.get("message", {})
+    async def _reconnect(self, reason: str):
+        """
+        Replace the current server connection: respawn (or reconnect) and re-initialize.
 
-            # Check if LLM wants to use tools
-            if assistant_message.get("tool_calls"):
-                logger.info(f"LLM requested {len(assistant_message['tool_calls'])} tool calls")
+        Raises:
+            ToolCallFailed: If no attempt succeeded ("unavailable")
+        """
+        logger.warning("Reconnecting to MCP server (%s)", reason)
+        started = time.perf_counter()
+        await self._disconnect(reusable=False)
+        error: Optional[Exception] = None
+        for attempt in range(max(1, MCP_RECONNECT_ATTEMPTS)):
+            if attempt:
+                await asyncio.sleep(MCP_RECONNECT_BACKOFF * 2 ** (attempt - 1))
+            try:
+                await self._open_session()
+            except Exception as e:
+                error = e
+                logger.warning("Reconnect attempt %d failed: %s", attempt + 1, e)
+                await self._disconnect(reusable=False)
+                continue
+            RECONNECTS.inc(reason=reason, outcome="ok")
+            RECONNECT_TIME.observe(time.perf_counter() - started)
+            logger.info("Reconnected to MCP server in %.1fms", (time.perf_counter() - started) * 1000)
+            return
+        RECONNECTS.inc(reason=reason, outcome="failed")
+        raise ToolCallFailed("unavailable", f"Could not reconnect to MCP server: {error}")
+
+    async def _disconnect(self, reusable: bool = True):
+        """
+        Close the current session and transport (or hand a pooled server back).
 
-                # Add assistant's tool call request to history
-                self.conversation_history.append(assistant_message)
+        Args:
+            reusable: False when the server is being replaced after a failure;
+                it is then killed rather than given time to exit
+        """
+        for task in (self._watch_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+        if self._pooled is not None:
+            # The pool owns the server; hand it back for the next session
+            self._pooled.on_tools_changed = None
+            self.pool.release(self._pooled, reusable=reusable)
+            self._pooled = None
+        scope = self._shutdown_scope
+        try:
+            if scope is not None:
+                # A hung server doesn't exit when its stdin closes; past the
+                # deadline the transport kills it
+                scope.deadline = anyio.current_time() + (SHUTDOWN_TIMEOUT if reusable else 0)
+            await self.exit_stack.aclose()
+            if reusable and scope is not None and scope.cancelled_caught:
+                logger.warning("MCP server did not exit within %.0fs and was killed", SHUTDOWN_TIMEOUT)
+        finally:
+            self.exit_stack = AsyncExitStack()
+            self._shutdown_scope = None
+            self.session = None
 
-                # Execute each tool call via MCP
-                for tool_call in assistant_message["tool_calls"]:
-                    tool_name = tool_call["function"]["name"]
-                    tool_args = tool_call["function"]["arguments"]
+    async def _ollama_chat(self, messages: List[Dict[str, Any]],
+                     tools: Optional[List[Dict[str, Any]]] = None,
+                     phase: str = "chat") -> Dict[str, Any]:
+        """
+        Send a chat request to Ollama, serving it from the response cache when possible.
 
-                    logger.info(f"Executing tool via MCP: {tool_name}")
-                    print(f"\n[Calling tool via MCP: {tool_name}]")
+        Args:
+            messages: Conversation messages to send
+            tools: Tool definitions to offer the model, if any
+            phase: Label for metrics ("chat" for the first request, "tool_round" for
+                later ones offering tools, "final" for the answer without tools)
 
-                    # Execute tool via MCP server
-                    tool_result = await self.call_tool(tool_name, tool_args)
+        Returns:
+            Ollama chat response
+        """
+        messages = self._resolve(messages)
+        with tracer.span("ollama.chat", {"phase": phase, "llm.model": OLLAMA_MODEL,
+                                         "messages": len(messages), "tools": len(tools or [])}) as span:
+            key = None
+            if self.response_cache is not None:
+                tool_set_hash = self._tools_hash if tools is self.tools else tools_hash(tools)
+                key = ResponseCache.make_key(OLLAMA_MODEL, messages, tool_set_hash, self.llm_options)
+                cached = self.response_cache.get(key)
+                span.set_attribute("cache_hit", cached is not None)
+                if cached is not None:
+                    logger.debug("LLM response cache hit")
+                    LLM_CACHE.inc(result="hit")
+                    return cached
+                LLM_CACHE.inc(result="miss")
+
+            started = time.perf_counter()
+            response = await self.ollama_client.chat(
+                model=OLLAMA_MODEL,
+                messages=messages,
+                tools=tools,
+                options=self.llm_options
+            )
+            LLM_REQUEST.observe(time.perf_counter() - started, phase=phase)
+            self._record_llm_timings(response, phase)
+            for field in ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration"):
+                if response.get(field) is not None:
+                    span.set_attribute(f"llm.{field}", response[field])
+
+            if key is not None:
+                self.response_cache.put(key, dict(response))
+            return response
+
+    @staticmethod
+    def _record_llm_timings(response: Dict[str, Any], phase: str):
+        """Record Ollama's server-side timing fields (reported in nanoseconds)."""
+        prompt_eval_ns = response.get("prompt_eval_duration")
+        if prompt_eval_ns:
+            LLM_PROMPT_EVAL.observe(prompt_eval_ns / 1e9, phase=phase)
+        if response.get("prompt_eval_count"):
+            LLM_PROMPT_TOKENS.observe(response["prompt_eval_count"], phase=phase)
+
+        eval_ns = response.get("eval_duration")
+        if eval_ns:
+            LLM_GENERATION.observe(eval_ns / 1e9, phase=phase)
+            if response.get("eval_count"):
+                LLM_TOKENS_PER_SECOND.observe(response["eval_count"] / (eval_ns / 1e9), phase=phase)
+
+    async def _select_tools(self, user_message: str) -> List[Dict[str, Any]]:
+        """Tools to offer the model for a message (all of them unless tool selection is on)."""
+        if self.tool_selector is None:
+            return self.tools
+        if self.tool_selector.embedder is not None:
+            # Embedding the message is a blocking HTTP call
+            return await asyncio.to_thread(self.tool_selector.select, user_message)
+        return self.tool_selector.select(user_message)
+
+    def _with_fetch_result(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add fetch_result to a selection of tools, so offloaded results can be read."""
+        if any(tool["function"]["name"] == "fetch_result" for tool in tools):
+            return tools
+        return tools + [tool for tool in self.tools if tool["function"]["name"] == "fetch_result"]
 
-                    # Add tool result to conversation
-                    self.conversation_history.append({
-                        "role": "tool",
-                        "content": json.dumps(tool_result)
-                    })
+    async def chat(self, user_message: str) -> str:
+        """
+        Send a message to the LLM and handle tool calls.
 
-                # Get final response from LLM after tool execution
-                final_response = self.ollama_client.chat(
-                    model=OLLAMA_MODEL,
-                    messages=self.conversation_history
-                )
+        Args:
+            user_message: User's message
 
-                final_message = final_response["message"]
-                self.conversation_history.append(final_message)
+        Returns:
+            Assistant's response
+        """
+        with tracer.span("mcp_client.chat", {"llm.model": OLLAMA_MODEL}) as span:
+            logger.info("User message: %s", Payload(user_message))
+
+            # Add user message to conversation
+            self._add_message({
+                "role": "user",
+                "content": user_message
+            })
+
+            turn_start = time.perf_counter()
+
+            # Call LLM with tools
+            try:
+                tools = await self._select_tools(user_message)
+                response = await self._ollama_chat(self.conversation_history, tools)
+                assistant_message = response.get("message", {})
+
+                # Keep running tools while the model asks for them, so it can
+                # follow up on results (e.g. page through one with fetch_result)
+                rounds = 0
+                while assistant_message.get("tool_calls"):
+                    rounds += 1
+                    logger.info(f"LLM requested {len(assistant_message['tool_calls'])} tool calls")
+
+                    # Add assistant's tool call request to history
+                    self._add_message(assistant_message)
+
+                    # Execute each tool call via MCP
+                    for tool_call in assistant_message["tool_calls"]:
+                        tool_name = tool_call["function"]["name"]
+                        tool_args = tool_call["function"]["arguments"]
+
+                        logger.debug("Executing tool via MCP: %s", tool_name)
+                        if self.show_tool_calls:
+                            print(f"\n[Calling tool via MCP: {tool_name}]")
+
+                        # Execute tool via MCP server
+                        tool_result = await self.call_tool(tool_name, tool_args)
+
+                        # Add tool result to conversation
+                        encode_start = time.perf_counter()
+                        content = json.dumps(tool_result)
+                        SERIALIZATION.observe(time.perf_counter() - encode_start, op="encode_tool_result")
+                        self._add_message({
+                            "role": "tool",
+                            "content": content
+                        })
+
+                    if rounds >= CHAT_MAX_TOOL_ROUNDS:
+                        # Out of rounds: ask for an answer without offering tools
+                        logger.info("Reached %d tool rounds; asking for a final answer", rounds)
+                        response = await self._ollama_chat(self.conversation_history, phase="final")
+                        assistant_message = response["message"]
+                        break
+                    tools = self._with_fetch_result(tools)
+                    response = await self._ollama_chat(self.conversation_history, tools, phase="tool_round")
+                    assistant_message = response.get("message", {})
+
+                self._add_message(assistant_message)
+                return assistant_message.get("content", "")
 
-                return final_message["content"]
+            except Exception as e:
+                logger.error(f"Error in chat: {e}")
+                span.record_exception(e)
+                return f"Error: {str(e)}"
+            finally:
+                CHAT_TURN.observe(time.perf_counter() - turn_start)
+                self.metrics_file.maybe_flush()
 
-            else:
-                # No tool calls, just return the response
-                self.conversation_history.append(assistant_message)
-                return assistant_message.get("content", "")
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Collect client-side metrics and the server's metrics (via the metrics tool).
 
-        except Exception as e:
-            logger.error(f"Error in chat: {e}")
-            return f"Error: {str(e)}"
+        Returns:
+            Dictionary with "client", "server", "server_pool", "tool_cache" and
+            "response_cache" sections
+        """
+        server_metrics = None
+        if self.session is not None:
+            result = await self.call_tool("metrics", {})
+            server_metrics = result.get("metrics")
+        return {
+            "client": REGISTRY.snapshot(),
+            "server": server_metrics,
+            "server_pool": self.pool.stats() if self.pool is not None else None,
+            "tool_cache": self.tool_cache.stats() if self.tool_cache else None,
+            "response_cache": self.response_cache.stats() if self.response_cache else None
+        }
+
+    def _add_message(self, message: Dict[str, Any]):
+        """Append a message to the history and, for a named session, to its log."""
+        if self.conversation is not None:
+            try:
+                # Large tool results come back as blob references, which is all the history keeps
+                message = self.conversation.append(message)
+            except OSError as e:
+                logger.warning("Could not save message to session %s: %s", self.conversation.name, e)
+        self.conversation_history.append(message)
+
+    def _resolve(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Read tool results kept in the blob store back into a copy of the history."""
+        if self.conversation is None:
+            return messages
+        return [self.conversation.resolve(message) for message in messages]
 
     def reset_conversation(self):
         """Reset the conversation history."""
         self.conversation_history = []
+        if self.conversation is not None:
+            self.conversation.reset()
         logger.info("Conversation history reset")
 
     async def close(self):
         """Close the MCP client and server connection."""
         logger.info("Closing MCP client")
+        if self.response_cache is not None:
+            logger.info(f"LLM response cache stats: {self.response_cache.stats()}")
+        self.metrics_file.close()
 
         try:
             # AsyncExitStack handles cleanup in reverse order automatically
-            await self.exit_stack.aclose()
-            self.session = None
+            await self._disconnect()
+            if self.conversation is not None:
+                self.conversation.close()
 
             logger.info("MCP client closed successfully")
         except Exception as e:
@@ -6,35 +6,139 @@ import json
 import logging
 import sys
 import os
-from typing import Any, Dict, Optional
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
 # Add parent directory to path for imports
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from mcp.server import Server
+from mcp.server import NotificationOptions, Server
 from mcp.server.stdio import stdio_server
-from mcp.types import Tool, TextContent
-from src.tools import MCPTools, TOOL_DEFINITIONS
-from src.config import MCP_SERVER_NAME, LOG_LEVEL
-
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from mcp.types import Tool, TextContent, CallToolRequest
+from src.tool_definitions import TOOL_DEFINITIONS, INTERNAL_TOOLS
+from src.config import (
+    MCP_SERVER_NAME, MCP_SERVER_HOST, MCP_SERVER_PORT, RESULT_OFFLOAD_BYTES, RESULT_PREVIEW_CHARS
 )
+from src.logging_utils import Payload, setup_logging, tool_sampler
+from src.metrics import REGISTRY, BYTES_BUCKETS, ExpositionFileWriter
+from src.tool_cache import TOOLS_HASH_CAPABILITY, schema_hash
+from src.transport import filter_cancellations, serve_socket
+
+if TYPE_CHECKING:
+    from src.blob_store import BlobStore
+    from src.governance import Governor, Permit, SessionQuota
+    from src.tools import MCPTools
+    from src.tracing import Tracer
+
+# Configure logging (tracing is configured on the first tool call)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+# _meta of the tools/call request being handled (the SDK drops it before our handler)
+_request_meta: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_meta", default=None)
+# Request id -> event set when the client cancels it, for the session being served
+_in_flight: ContextVar[Optional[Dict[Any, asyncio.Event]]] = ContextVar("in_flight", default=None)
+# Holds the quota state of the session being served, created on its first tool call
+_session_quota: ContextVar[Optional[Dict[str, "SessionQuota"]]] = ContextVar("session_quota", default=None)
+
+# Metrics
+TOOL_LATENCY = REGISTRY.histogram("mcp_server_tool_seconds", "Tool execution time")
+TOOL_QUEUE_WAIT = REGISTRY.histogram(
+    "mcp_server_tool_queue_wait_seconds", "Time a tool call waited for a worker thread"
+)
+TOOL_SERIALIZATION = REGISTRY.histogram(
+    "mcp_server_tool_serialization_seconds", "Time spent JSON-encoding tool results"
+)
+TOOL_PAYLOAD = REGISTRY.histogram(
+    "mcp_server_tool_payload_bytes", "Size of JSON tool arguments and results", BYTES_BUCKETS
+)
+TOOL_CALLS = REGISTRY.counter("mcp_server_tool_calls_total", "Tool calls by outcome")
+RESULTS_OFFLOADED = REGISTRY.counter(
+    "mcp_server_offloaded_bytes_total", "Bytes of tool result fields stored as blobs instead of returned"
+)
+
 
 class MCPServerApp:
     """MCP Server application."""
 
     def __init__(self):
         self.server = Server(MCP_SERVER_NAME)
-        self.tools = MCPTools()
+        self.metrics_file = ExpositionFileWriter("server")
+        # Loaded on first use: answering initialize and tools/list needs none of them
+        self._tools: Optional["MCPTools"] = None
+        self._blobs: Optional["BlobStore"] = None
+        self._tracer: Optional["Tracer"] = None
+        self._governor: Optional["Governor"] = None
+        self._load_lock = threading.Lock()
+        # Shared by callers that don't come through _run_session
+        self._default_quota: Dict[str, "SessionQuota"] = {}
+        self.tool_definitions: List[Dict[str, Any]] = list(TOOL_DEFINITIONS)
+        self.tools_hash = schema_hash(self.tool_definitions)
+        # Sessions that have listed tools, to be told when the list changes
+        self._listing_sessions: "weakref.WeakSet" = weakref.WeakSet()
         self._setup_handlers()
 
+    def _load(self, attribute: str, factory: Callable[[], Any]) -> Any:
+        """Create a lazily loaded attribute once, also when first used from worker threads."""
+        with self._load_lock:
+            if getattr(self, attribute) is None:
+                setattr(self, attribute, factory())
+        return getattr(self, attribute)
+
+    @property
+    def tools(self) -> "MCPTools":
+        """The tool implementations."""
+        if self._tools is None:
+            from src.tools import MCPTools
+
+            self._load("_tools", MCPTools)
+        return self._tools
+
+    @property
+    def blobs(self) -> "BlobStore":
+        """Where _offload() stores oversized result fields."""
+        if self._blobs is None:
+            from src.blob_store import BlobStore
+
+            self._load("_blobs", BlobStore)
+        return self._blobs
+
+    @property
+    def tracer(self) -> "Tracer":
+        """The process tracer, configured for the server."""
+        if self._tracer is None:
+            from src.tracing import tracer
+
+            def configure() -> "Tracer":
+                tracer.configure("mcp-server")
+                return tracer
+
+            self._load("_tracer", configure)
+        return self._tracer
+
+    @property
+    def governor(self) -> "Governor":
+        """The quota governor, created on the first tool call (initialize doesn't need it)."""
+        if self._governor is None:
+            from src.governance import create_governor
+
+            self._governor = create_governor()
+        return self._governor
+
+    def _session(self) -> "SessionQuota":
+        """Quota state of the session being served."""
+        holder = _session_quota.get()
+        if holder is None:
+            holder = self._default_quota
+        if "quota" not in holder:
+            holder["quota"] = self.governor.new_session()
+        return holder["quota"]
+
     def _setup_handlers(self):
         """Setup request handlers for the MCP server."""
 
@@ -42,8 +146,9 @@ class MCPServerApp:
         async def list_tools() -> list[Tool]:
             """List all available tools."""
             logger.info("Listing available tools")
+            self._listing_sessions.add(self.server.request_context.session)
             tools = []
-            for tool_def in TOOL_DEFINITIONS:
+            for tool_def in self.tool_definitions:
                 tools.append(Tool(
                     name=tool_def["name"],
                     description=tool_def["description"],
@@ -54,75 +159,316 @@ class MCPServerApp:
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Dict[str, Any]) -> list[TextContent]:
             """Execute a tool with given arguments."""
-            logger.info(f"Calling tool: {name} with arguments: {arguments}")
+            log_payload = tool_sampler.should_log(name)
+            if log_payload:
+                logger.info("Calling tool: %s with arguments: %s", name, Payload(arguments),
+                            extra={"tool": name})
+
+            parent = self.tracer.extract(_request_meta.get())
+            with self.tracer.span("mcp_server.call_tool", {"tool": name}, parent=parent) as span:
+                try:
+                    from src.governance import QuotaExceeded
+
+                    try:
+                        permit = self.governor.admit(self._session(), name)
+                    except QuotaExceeded as e:
+                        TOOL_CALLS.inc(tool=name, status="rejected")
+                        span.set_attribute("rejected", e.error_type)
+                        return [TextContent(
+                            type="text",
+                            text=json.dumps(e.to_result(), indent=2)
+                        )]
+
+                    result = await self._await_tool(name, arguments, permit)
+                    if result is None:
+                        logger.warning("Tool %s cancelled by the client", name, extra={"tool": name})
+                        TOOL_CALLS.inc(tool=name, status="cancelled")
+                        span.set_attribute("cancelled", True)
+                        return [TextContent(
+                            type="text",
+                            text=json.dumps({
+                                "success": False,
+                                "error": "Cancelled by client",
+                                "error_type": "cancelled"
+                            }, indent=2)
+                        )]
 
+                    if log_payload:
+                        logger.info("Tool %s result: %s", name, Payload(result), extra={"tool": name})
+
+                    serialize_start = time.perf_counter()
+                    text = json.dumps(result, indent=2)
+                    TOOL_SERIALIZATION.observe(time.perf_counter() - serialize_start, tool=name)
+                    TOOL_PAYLOAD.observe(len(text), tool=name, direction="response")
+                    permit.charge_io(len(text))
+                    TOOL_CALLS.inc(tool=name, status="ok" if result.get("success") else "error")
+                    span.set_attribute("response_bytes", len(text))
+                    span.set_attribute("success", bool(result.get("success")))
+
+                    return [TextContent(
+                        type="text",
+                        text=text
+                    )]
+
+                except Exception as e:
+                    logger.error("Error executing tool %s: %s", name, e, extra={"tool": name})
+                    TOOL_CALLS.inc(tool=name, status="exception")
+                    span.record_exception(e)
+                    return [TextContent(
+                        type="text",
+                        text=json.dumps({
+                            "success": False,
+                            "error": str(e)
+                        }, indent=2)
+                    )]
+                finally:
+                    self.metrics_file.maybe_flush()
+
+        # Wrap the SDK's tools/call handler so the tool can see the request _meta
+        # (it carries the caller's trace context)
+        sdk_call_tool_handler = self.server.request_handlers[CallToolRequest]
+
+        async def call_tool_with_meta(req: CallToolRequest):
+            token = _request_meta.set((req.params.model_extra or {}).get("_meta"))
             try:
-                # Route to appropriate tool method
-                if name == "calculator":
-                    result = self.tools.calculator(arguments.get("expression", ""))
-                elif name == "get_current_time":
-                    result = self.tools.get_current_time()
-                elif name == "list_files":
-                    result = self.tools.list_files(arguments.get("directory", "."))
-                elif name == "read_file":
-                    result = self.tools.read_file(
-                        arguments.get("file_path", ""),
-                        arguments.get("max_lines", 100)
-                    )
-                elif name == "write_file":
-                    result = self.tools.write_file(
-                        arguments.get("file_path", ""),
-                        arguments.get("content", "")
-                    )
-                elif name == "create_directory":
-                    result = self.tools.create_directory(arguments.get("directory_path", ""))
-                elif name == "system_info":
-                    result = self.tools.system_info()
-                elif name == "execute_command":
-                    result = self.tools.execute_command(arguments.get("command", ""))
-                else:
-                    result = {
-                        "success": False,
-                        "error": f"Unknown tool: {name}"
-                    }
-
-                logger.info(f"Tool {name} result: {result}")
-
-                return [TextContent(
-                    type="text",
-                    text=json.dumps(result, indent=2)
-                )]
+                return await sdk_call_tool_handler(req)
+            finally:
+                _request_meta.reset(token)
 
+        self.server.request_handlers[CallToolRequest] = call_tool_with_meta
+
+    async def _await_tool(self, name: str, arguments: Dict[str, Any],
+                          permit: "Permit") -> Optional[Dict[str, Any]]:
+        """
+        Run a tool on a worker thread until it finishes or the client cancels the request.
+
+        The permit is released when the worker thread finishes, not when this
+        returns, so a cancelled call holds its concurrency slot while it runs.
+
+        Returns:
+            The tool result, or None if the request was cancelled. The worker
+            thread can't be interrupted and finishes in the background, but the
+            session is free to handle the client's next request.
+        """
+        # Run the tool on a worker thread so slow tools don't stall the transport
+        tool = asyncio.ensure_future(
+            asyncio.to_thread(self._run_tool, name, arguments, time.perf_counter(), permit)
+        )
+        # Cancelled before the thread picked it up, _run_tool never runs to release it
+        tool.add_done_callback(lambda future: future.cancelled() and permit.release())
+        in_flight = _in_flight.get()
+        if in_flight is None:
+            return await tool
+
+        request_id = self.server.request_context.request_id
+        cancelled = in_flight[request_id] = asyncio.Event()
+        cancel_wait = asyncio.ensure_future(cancelled.wait())
+        try:
+            await asyncio.wait({tool, cancel_wait}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancel_wait.cancel()
+            in_flight.pop(request_id, None)
+        return tool.result() if tool.done() else None
+
+    async def set_tool_definitions(self, definitions: List[Dict[str, Any]]):
+        """
+        Replace the advertised tool list and notify clients that have listed tools.
+
+        Args:
+            definitions: Tool definitions in the TOOL_DEFINITIONS format
+        """
+        self.tool_definitions = list(definitions)
+        tools_hash = schema_hash(self.tool_definitions)
+        if tools_hash == self.tools_hash:
+            return
+        self.tools_hash = tools_hash
+        logger.info("Tool list changed (%d tools), notifying %d sessions",
+                    len(self.tool_definitions), len(self._listing_sessions))
+        for session in list(self._listing_sessions):
+            try:
+                await session.send_tool_list_changed()
             except Exception as e:
-                logger.error(f"Error executing tool {name}: {e}")
-                return [TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "success": False,
-                        "error": str(e)
-                    }, indent=2)
-                )]
+                logger.warning("Could not send tools/list_changed: %s", e)
+                self._listing_sessions.discard(session)
+
+    def _run_tool(self, name: str, arguments: Dict[str, Any], submitted: float,
+                  permit: Optional["Permit"] = None) -> Dict[str, Any]:
+        """Run a tool on a worker thread, recording queue wait and execution time."""
+        started = time.perf_counter()
+        TOOL_QUEUE_WAIT.observe(started - submitted, tool=name)
+        TOOL_PAYLOAD.observe(len(json.dumps(arguments)), tool=name, direction="request")
+        try:
+            with self.tracer.span(f"tool.{name}"):
+                # Operator tools (metrics, profile) don't use up the profiling budget
+                if name in INTERNAL_TOOLS:
+                    return self._dispatch(name, arguments)
+                from src.profiling import profiler
+
+                with profiler.capture(name):
+                    result = self._dispatch(name, arguments)
+                # fetch_result slices are already bounded; offloading them would loop
+                if name == "fetch_result":
+                    return result
+                return self._offload(name, result)
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - started, tool=name)
+            if permit is not None:
+                permit.release()
+
+    def _offload(self, name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace oversized result fields with handles to blobs holding their content.
+
+        The largest fields are moved to the blob store until the result is
+        within RESULT_OFFLOAD_BYTES. Each is replaced by its handle, size, line
+        count and a preview; the model reads the rest with fetch_result.
+        String fields are stored as is, others as indented JSON.
+        """
+        if RESULT_OFFLOAD_BYTES <= 0:
+            return result
+        payloads = {key: (value if isinstance(value, str) else json.dumps(value, indent=2)).encode("utf-8")
+                    for key, value in result.items()}
+        total = sum(len(data) for data in payloads.values())
+        if total <= RESULT_OFFLOAD_BYTES:
+            return result
+
+        result = dict(result)
+        offloaded = []
+        for key in sorted(payloads, key=lambda key: len(payloads[key]), reverse=True):
+            data = payloads[key]
+            if total <= RESULT_OFFLOAD_BYTES or len(data) <= RESULT_PREVIEW_CHARS:
+                break
+            text = data.decode("utf-8")
+            preview = text[:RESULT_PREVIEW_CHARS]
+            result[key] = {
+                "handle": self.blobs.put(data),
+                "bytes": len(data),
+                "lines": len(text.splitlines()),
+                "preview": preview,
+                "note": "Preview only; call fetch_result with this handle for more"
+            }
+            total -= len(data) - len(preview.encode("utf-8"))
+            offloaded.append(key)
+            RESULTS_OFFLOADED.inc(len(data), tool=name)
+        result["offloaded"] = offloaded
+        logger.info("Offloaded %s of %s result to blobs", offloaded, name, extra={"tool": name})
+        return result
+
+    def _dispatch(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Route a tool call to the matching MCPTools method."""
+        if name == "calculator":
+            return self.tools.calculator(arguments.get("expression", ""))
+        elif name == "get_current_time":
+            return self.tools.get_current_time()
+        elif name == "list_files":
+            return self.tools.list_files(arguments.get("directory", "."))
+        elif name == "read_file":
+            return self.tools.read_file(
+                arguments.get("file_path", ""),
+                arguments.get("max_lines", 100)
+            )
+        elif name == "semantic_search":
+            return self.tools.semantic_search(
+                arguments.get("query", ""),
+                arguments.get("path", "."),
+                arguments.get("top_k", 5)
+            )
+        elif name == "fetch_result":
+            return self.tools.fetch_result(
+                arguments.get("handle", ""),
+                arguments.get("offset", 0),
+                arguments.get("length", 4096),
+                self.blobs
+            )
+        elif name == "write_file":
+            return self.tools.write_file(
+                arguments.get("file_path", ""),
+                arguments.get("content", "")
+            )
+        elif name == "create_directory":
+            return self.tools.create_directory(arguments.get("directory_path", ""))
+        elif name == "system_info":
+            return self.tools.system_info()
+        elif name == "execute_command":
+            return self.tools.execute_command(arguments.get("command", ""))
+        elif name == "metrics":
+            return self.tools.metrics(arguments.get("format", "json"))
+        elif name == "profile":
+            return self.tools.profile(
+                arguments.get("action", "status"),
+                arguments.get("calls", 0),
+                arguments.get("slow_threshold", 0.0),
+                arguments.get("memory", False),
+                arguments.get("tools")
+            )
+        else:
+            return {
+                "success": False,
+                "error": f"Unknown tool: {name}"
+            }
 
     async def run(self):
-        """Run the MCP server."""
+        """Run the MCP server over STDIO."""
         logger.info(f"Starting MCP Server: {MCP_SERVER_NAME}")
         logger.info("Server is ready to accept connections via STDIO")
         async with stdio_server() as (read_stream, write_stream):
             logger.info("Client connected via STDIO")
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+            await self._run_session(read_stream, write_stream)
             logger.info("Server connection closed")
+        self.metrics_file.close()
+
+    async def run_socket(self, host: str = MCP_SERVER_HOST, port: int = MCP_SERVER_PORT):
+        """Run the MCP server over TCP, serving one session per connection."""
+        logger.info(f"Starting MCP Server: {MCP_SERVER_NAME}")
+        try:
+            await serve_socket(self._run_session, host, port)
+        finally:
+            self.metrics_file.close()
+
+    async def _run_session(self, read_stream, write_stream):
+        """Serve one client session on a pair of JSON-RPC message streams."""
+        in_flight: Dict[Any, asyncio.Event] = {}
+
+        def on_cancel(request_id, reason: Optional[str]):
+            cancelled = in_flight.get(request_id)
+            if cancelled is not None:
+                logger.info("Client cancelled request %s: %s", request_id, reason)
+                cancelled.set()
+
+        token = _in_flight.set(in_flight)
+        quota_token = _session_quota.set({})
+        try:
+            async with filter_cancellations(read_stream, on_cancel) as requests:
+                await self.server.run(
+                    requests,
+                    write_stream,
+                    self.server.create_initialization_options(
+                        NotificationOptions(tools_changed=True),
+                        # Lets clients key their cached tool schemas by the current list
+                        {TOOLS_HASH_CAPABILITY: {"sha256": self.tools_hash}}
+                    )
+                )
+        finally:
+            _session_quota.reset(quota_token)
+            _in_flight.reset(token)
 
 
 async def main():
     """Main entry point for the MCP server."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MCP server")
+    parser.add_argument("--transport", choices=["stdio", "tcp"], default="stdio")
+    parser.add_argument("--host", default=MCP_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=MCP_SERVER_PORT)
+    args = parser.parse_args()
+
     server_app = MCPServerApp()
-    await server_app.run()
+    if args.transport == "tcp":
+        await server_app.run_socket(args.host, args.port)
+    else:
+        await server_app.run()
 
 
 if __name__ == "__main__":
     asyncio.run(main())
-
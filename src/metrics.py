@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""In-process metrics with Prometheus text exposition."""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from src.config import DATA_DIR, METRICS_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608, 33554432)
+COUNT_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 35, 50, 75, 100, 200, 500)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonically increasing counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {_format_labels(key) or "{}": value for key, value in self._values.items()}
+
+
+class Histogram:
+    """Fixed-bucket histogram with optional labels, as in Prometheus client libraries."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count, min, max]
+        self._series: Dict[LabelKey, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, value, value]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+            series[3] = min(series[3], value)
+            series[4] = max(series[4], value)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate a quantile by linear interpolation within buckets (like histogram_quantile)."""
+        series = self._series.get(_label_key(labels))
+        return self._quantile(series, q) if series else None
+
+    def _quantile(self, series: list, q: float) -> Optional[float]:
+        counts, _, total, low, high = series
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else high
+                estimate = lower + (upper - lower) * (rank - cumulative) / count
+                # Bucket interpolation can overshoot the observed range; clamp to it
+                return min(max(estimate, low), high)
+            cumulative += count
+        return high
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total_sum, total, _, _) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {total}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total_sum:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {total}")
+        return "\n".join(lines)
+
+    def snapshot(self) -> Dict[str, Any]:
+        result = {}
+        with self._lock:
+            for key, series in self._series.items():
+                _, total_sum, total, low, high = series
+                result[_format_labels(key) or "{}"] = {
+                    "count": total,
+                    "sum": round(total_sum, 6),
+                    "avg": round(total_sum / total, 6) if total else None,
+                    "min": low,
+                    "max": high,
+                    "p50": self._quantile(series, 0.50),
+                    "p95": self._quantile(series, 0.95),
+                    "p99": self._quantile(series, 0.99)
+                }
+        return result
+
+
+class MetricsRegistry:
+    """Named collection of counters and histograms for one process."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text)
+            return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for _, metric in sorted(self._metrics.items())) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return all metrics as plain dictionaries (histograms summarized with quantiles)."""
+        return {name: {"type": metric.kind, "series": metric.snapshot()}
+                for name, metric in sorted(self._metrics.items())}
+
+
+REGISTRY = MetricsRegistry()
+
+
+class ExpositionFileWriter:
+    """
+    Periodically write a registry to DATA_DIR/metrics/<component>-<pid>.prom.
+
+    A file describes a running process: close() removes it, and the first
+    flush removes files of processes that are gone without closing theirs
+    (e.g. killed pool members), so the directory holds one file per live
+    process instead of one per process ever started.
+    """
+
+    def __init__(self, component: str, registry: MetricsRegistry = REGISTRY,
+                 interval: float = METRICS_FLUSH_INTERVAL, directory: Optional[Path] = None):
+        self.registry = registry
+        self.interval = interval
+        self.directory = Path(directory or DATA_DIR / "metrics")
+        self.path = self.directory / f"{component}-{os.getpid()}.prom"
+        self._last_flush = 0.0
+        self._pruned = False
+
+    def maybe_flush(self):
+        """Write the exposition file if the flush interval has elapsed."""
+        if self.interval > 0 and time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if not self._pruned:
+                self._pruned = True
+                self._remove_stale()
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(self.registry.render(), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not write metrics to %s: %s", self.path, e)
+
+    def close(self):
+        """Remove this process's exposition file; call when the process is done."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove %s: %s", self.path, e)
+
+    def _remove_stale(self):
+        """Remove exposition files whose process no longer exists."""
+        if os.name != "posix":
+            # os.kill(pid, 0) is a liveness check only on POSIX
+            return
+        for path in self.directory.glob("*-*.prom"):
+            pid = path.stem.rpartition("-")[2]
+            if not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                path.unlink(missing_ok=True)
+                logger.debug("Removed metrics of exited process %s", pid)
+            except OSError:
+                # Running under another user
+                pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1",
+                      registry: MetricsRegistry = REGISTRY) -> "ThreadingHTTPServer":
+    """Serve the registry at http://host:port/metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""On-demand cProfile and tracemalloc capture for individual tool calls."""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.config import (
+    DATA_DIR, PROFILE_NEXT_CALLS, PROFILE_SLOW_THRESHOLD, PROFILE_MEMORY, PROFILE_TOOLS
+)
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = DATA_DIR / "profiles"
+# Frames kept per allocation traceback while tracemalloc is running
+TRACEMALLOC_FRAMES = 10
+
+
+class ToolProfiler:
+    """
+    Decide which tool calls to profile and write their captures to disk.
+
+    Two triggers, usable together:
+    - next N calls: the next `calls` matching tool calls are always captured
+    - slow calls: every matching call runs under cProfile and the capture is
+      kept only if it took longer than `slow_threshold` seconds
+
+    Each capture writes `<stem>.prof` (load with pstats or snakeviz) and, with
+    memory profiling on, `<stem>.heap` (a tracemalloc snapshot, load with
+    tracemalloc.Snapshot.load). A summary line is appended to index.jsonl.
+    """
+
+    def __init__(self, directory: Path = PROFILE_DIR, calls: int = 0, slow_threshold: float = 0.0,
+                 memory: bool = False, tools: Optional[Iterable[str]] = None):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._tracemalloc_users = 0
+        self._sequence = 0
+        self.recent: List[Dict[str, Any]] = []
+        self.arm(calls, slow_threshold, memory, tools)
+
+    def arm(self, calls: int = 0, slow_threshold: float = 0.0, memory: bool = False,
+            tools: Optional[Iterable[str]] = None):
+        """
+        Set the capture triggers, replacing any previous ones.
+
+        Args:
+            calls: Capture the next N matching calls
+            slow_threshold: Keep captures of calls slower than this many seconds (0 disables)
+            memory: Also capture tracemalloc snapshots
+            tools: Only profile these tools (None or empty for all)
+        """
+        with self._lock:
+            self.remaining = max(0, int(calls))
+            self.slow_threshold = max(0.0, float(slow_threshold))
+            self.memory = bool(memory)
+            self.tools = set(tools or ())
+        if self.active:
+            logger.info("Tool profiling armed: %s", self.status())
+
+    def disarm(self):
+        """Stop profiling new calls."""
+        self.arm()
+
+    @property
+    def active(self) -> bool:
+        return self.remaining > 0 or self.slow_threshold > 0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "next_calls": self.remaining,
+            "slow_threshold_seconds": self.slow_threshold,
+            "memory": self.memory,
+            "tools": sorted(self.tools),
+            "directory": str(self.directory),
+            "captures": len(self.recent)
+        }
+
+    def _claim(self, tool: str) -> Optional[str]:
+        """Return why this call should be profiled ("next_n" or "slow"), or None."""
+        if not self.active or (self.tools and tool not in self.tools):
+            return None
+        with self._lock:
+            if self.remaining > 0:
+                self.remaining -= 1
+                return "next_n"
+        return "slow" if self.slow_threshold > 0 else None
+
+    @contextmanager
+    def capture(self, tool: str):
+        """
+        Profile the enclosed tool call if a trigger matches.
+
+        Must be entered on the thread that runs the tool: cProfile only sees
+        the thread that enabled it. tracemalloc is process-wide, so heap
+        snapshots of overlapping calls include each other's allocations.
+        """
+        reason = self._claim(tool)
+        if reason is None:
+            yield
+            return
+
+        memory = self.memory
+        heap_before = None
+        if memory:
+            import tracemalloc
+
+            self._start_tracemalloc()
+            heap_before = tracemalloc.take_snapshot()
+
+        import cProfile
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            heap_after = tracemalloc.take_snapshot() if memory else None
+            if memory:
+                self._stop_tracemalloc()
+            if reason == "next_n" or duration >= self.slow_threshold:
+                try:
+                    self._write(tool, reason, duration, profiler, heap_before, heap_after)
+                except OSError as e:
+                    logger.warning("Could not write profile for %s: %s", tool, e)
+
+    def _start_tracemalloc(self):
+        import tracemalloc
+
+        with self._lock:
+            if self._tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._tracemalloc_users += 1
+
+    def _stop_tracemalloc(self):
+        import tracemalloc
+
+        with self._lock:
+            self._tracemalloc_users -= 1
+            if self._tracemalloc_users == 0:
+                tracemalloc.stop()
+
+    def _write(self, tool: str, reason: str, duration: float, profiler: "cProfile.Profile",
+               heap_before: Optional["tracemalloc.Snapshot"], heap_after: Optional["tracemalloc.Snapshot"]):
+        """Dump the capture files and append a summary to index.jsonl."""
+        import pstats
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        stem = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{tool}-{os.getpid()}-{sequence}"
+
+        profile_path = self.directory / f"{stem}.prof"
+        profiler.dump_stats(str(profile_path))
+        stats = pstats.Stats(profiler)
+        top_functions = [
+            {"function": f"{filename}:{line}({name})", "calls": calls, "cumulative_seconds": round(cumtime, 6)}
+            for (filename, line, name), (_, calls, _, cumtime, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][3], reverse=True
+            )[:10]
+        ]
+
+        record: Dict[str, Any] = {
+            "timestamp": datetime.now().isoformat(),
+            "tool": tool,
+            "reason": reason,
+            "duration_seconds": round(duration, 6),
+            "profile": str(profile_path),
+            "top_functions": top_functions
+        }
+        if heap_after is not None:
+            heap_path = self.directory / f"{stem}.heap"
+            heap_after.dump(str(heap_path))
+            growth = heap_after.compare_to(heap_before, "lineno")[:10]
+            record["heap"] = str(heap_path)
+            record["heap_growth_bytes"] = sum(stat.size_diff for stat in growth)
+            record["top_allocations"] = [
+                {"location": str(stat.traceback[0]), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in growth
+            ]
+
+        with open(self.directory / "index.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        with self._lock:
+            self.recent = (self.recent + [record])[-20:]
+        logger.info("Profiled tool %s (%s, %.3fs): %s", tool, reason, duration, profile_path)
+
+
+def _parse_tools(spec: str) -> List[str]:
+    return [name.strip() for name in spec.split(",") if name.strip()]
+
+
+profiler = ToolProfiler(
+    calls=PROFILE_NEXT_CALLS,
+    slow_threshold=PROFILE_SLOW_THRESHOLD,
+    memory=PROFILE_MEMORY,
+    tools=_parse_tools(PROFILE_TOOLS)
+)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""On-disk cache of LLM chat responses keyed by model, messages and tool set."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.config import DATA_DIR, LLM_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(obj: Any) -> str:
+    """Return the SHA-256 of the canonical JSON encoding of an object."""
+    encoded = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reduce chat messages to the fields that influence the model's answer.
+
+    Whitespace around content is stripped and tool calls are reduced to their
+    name and arguments, so cosmetic differences do not cause cache misses.
+    """
+    normalized = []
+    for message in messages:
+        entry = {
+            "role": message.get("role"),
+            "content": (message.get("content") or "").strip()
+        }
+        tool_calls = message.get("tool_calls")
+        if tool_calls:
+            entry["tool_calls"] = [
+                {"name": call["function"]["name"], "arguments": call["function"].get("arguments")}
+                for call in tool_calls
+            ]
+        normalized.append(entry)
+    return normalized
+
+
+def tools_hash(tools: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+    """Return a stable hash of an Ollama tool list, or None when no tools are sent."""
+    if not tools:
+        return None
+    return _digest(sorted(tools, key=lambda t: t["function"]["name"]))
+
+
+class ResponseCache:
+    """
+    Content-keyed cache of Ollama chat responses stored as JSON files.
+
+    Entries live under DATA_DIR/llm_cache/<key[:2]>/<key>.json. When the total
+    size exceeds max_bytes the least recently used entries are evicted.
+
+    Sizes and access times are tracked in memory, so every client in a
+    process should use the same instance (see get_response_cache()).
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.directory = Path(directory or DATA_DIR / "llm_cache")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> [size_bytes, last_access_time]
+        self._entries: Dict[str, List[float]] = {}
+        self._total_bytes = 0
+        self._scan()
+
+    def _scan(self):
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    st = entry.stat()
+                    self._entries[entry.name[:-5]] = [st.st_size, st.st_atime]
+                    self._total_bytes += st.st_size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], tool_set_hash: Optional[str],
+                 options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the cache key for a chat request.
+
+        Args:
+            model: Ollama model name
+            messages: Conversation messages sent to the model
+            tool_set_hash: Hash of the tool list (see tools_hash), or None
+            options: Sampling options sent with the request
+
+        Returns:
+            Hex digest identifying the request
+        """
+        return _digest({
+            "model": model,
+            "messages": normalize_messages(messages),
+            "tools": tool_set_hash,
+            "options": options
+        })
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for a key, or None on a miss."""
+        if key not in self._entries:
+            self.misses += 1
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                response = json.load(f)
+        except (OSError, ValueError):
+            self._forget(key)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+            self._entries[key][1] = path.stat().st_atime
+        except OSError:
+            # Evicted by another process since it was read; the response is still good
+            pass
+        self.hits += 1
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Store a response and evict old entries if the cache is over budget."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # A unique temp file: other processes may be storing the same key
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(response, f, default=str)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        if key in self._entries:
+            self._total_bytes -= self._entries[key][0]
+        st = path.stat()
+        self._entries[key] = [st.st_size, st.st_atime]
+        self._total_bytes += st.st_size
+        self._evict()
+
+    def _forget(self, key: str):
+        size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._forget(key)
+            self.evictions += 1
+        logger.debug("Response cache evicted down to %d bytes", self._total_bytes)
+
+    def clear(self):
+        """Remove every cached response."""
+        for key in list(self._entries):
+            self._forget(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+
+_shared: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Return the process-wide response cache, creating it on first use.
+
+    Clients share it so that LLM_CACHE_MAX_BYTES bounds the cache directory
+    as a whole, rather than once per client.
+    """
+    global _shared
+    if _shared is None:
+        _shared = ResponseCache()
+    return _shared
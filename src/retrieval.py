@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""Semantic retrieval over local files using embeddings from Ollama."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import (
+    DATA_DIR,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_DIM,
+    EMBEDDING_MODEL,
+    OLLAMA_HOST,
+    RETRIEVAL_CHUNK_LINES,
+    RETRIEVAL_CHUNK_OVERLAP,
+    RETRIEVAL_MAX_FILE_BYTES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Directories that are never worth embedding
+SKIP_DIRS = {".git", "__pycache__", "venv", ".venv", "node_modules", ".mypy_cache", ".pytest_cache"}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def content_hash(text: str) -> str:
+    """Return the hex SHA-256 of a chunk of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_text(
+    text: str,
+    chunk_lines: int = RETRIEVAL_CHUNK_LINES,
+    overlap: int = RETRIEVAL_CHUNK_OVERLAP
+) -> List[Tuple[int, int, str]]:
+    """
+    Split text into overlapping line windows.
+
+    Args:
+        text: Text to split
+        chunk_lines: Number of lines per chunk
+        overlap: Number of lines shared between consecutive chunks
+
+    Returns:
+        List of (start_line, end_line, chunk_text) with 1-based inclusive line numbers
+    """
+    lines = text.splitlines(keepends=True)
+    step = max(1, chunk_lines - overlap)
+    chunks = []
+    for start in range(0, len(lines), step):
+        window = lines[start:start + chunk_lines]
+        chunk = "".join(window)
+        if chunk.strip():
+            chunks.append((start + 1, start + len(window), chunk))
+        if start + chunk_lines >= len(lines):
+            break
+    return chunks
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so that cosine similarity becomes a dot product."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class OllamaEmbedder:
+    """Batch embedder backed by the Ollama embeddings API."""
+
+    def __init__(self, model: str = EMBEDDING_MODEL, host: str = OLLAMA_HOST,
+                 batch_size: int = EMBEDDING_BATCH_SIZE):
+        import ollama
+
+        self.model = model
+        self.batch_size = batch_size
+        self.client = ollama.Client(host=host)
+
+    @property
+    def name(self) -> str:
+        return f"ollama-{self.model}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts in batches and return a (len(texts), dim) float32 matrix."""
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = list(texts[i:i + self.batch_size])
+            response = self.client.embed(model=self.model, input=batch)
+            vectors.extend(response["embeddings"])
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class HashEmbedder:
+    """Deterministic feature-hashing embedder, a local stand-in for tests and offline use."""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    @property
+    def name(self) -> str:
+        return f"hash-{self.dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts by hashing lowercase word tokens into a fixed number of buckets."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN_RE.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                vectors[row, (value >> 1) % self.dim] += sign
+        return vectors
+
+
+def create_embedder(backend: str = EMBEDDING_BACKEND):
+    """Create the embedder selected by EMBEDDING_BACKEND ("ollama" or "hash")."""
+    if backend == "hash":
+        return HashEmbedder()
+    if backend == "ollama":
+        return OllamaEmbedder()
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+class VectorStore:
+    """
+    Append-only matrix of normalized embeddings stored in a NumPy memmap.
+
+    Rows are keyed by the content hash of the embedded text, so identical chunks
+    (in any file, or after a file is re-indexed) are only ever embedded once.
+    Not thread-safe; SemanticIndex serializes access.
+    """
+
+    MIN_CAPACITY = 1024
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory / "vectors.f32"
+        self._index_path = self.directory / "index.json"
+        self.dim: Optional[int] = None
+        self.keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._capacity = 0
+        self._mm: Optional[np.memmap] = None
+        self._load()
+
+    def _load(self):
+        if not self._index_path.exists():
+            return
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.dim = index["dim"]
+        self.keys = index["keys"]
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+        self._capacity = os.path.getsize(self._vectors_path) // (4 * self.dim)
+        self._open()
+
+    def _open(self):
+        self._mm = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                             shape=(self._capacity, self.dim))
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2, self.MIN_CAPACITY)
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._capacity = capacity
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def row(self, key: str) -> int:
+        return self._rows[key]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of all stored vectors, shape (len(self), dim)."""
+        if self._mm is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._mm[:len(self.keys)]
+
+    def add(self, keys: Sequence[str], vectors: np.ndarray):
+        """Append vectors for keys that are not stored yet."""
+        if len(keys) == 0:
+            return
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension changed from {self.dim} to {vectors.shape[1]}")
+
+        start = len(self.keys)
+        self._ensure_capacity(start + len(keys))
+        self._mm[start:start + len(keys)] = _normalize(vectors)
+        for offset, key in enumerate(keys):
+            self._rows[key] = start + offset
+        self.keys.extend(keys)
+
+    def flush(self):
+        """Flush vectors to disk and atomically rewrite the key index."""
+        if self._mm is None:
+            return
+        self._mm.flush()
+        tmp_path = self._index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "keys": self.keys}, f)
+        os.replace(tmp_path, self._index_path)
+
+
+class SemanticIndex:
+    """
+    Chunked, incrementally updated embedding index over files on disk.
+
+    Safe to use from several threads: indexing runs one at a time, and a
+    search never reads the vector store while it is being grown and
+    remapped.
+    """
+
+    def __init__(self, embedder=None, directory: Optional[Path] = None):
+        self._lock = threading.Lock()
+        self.embedder = embedder or create_embedder()
+        self.directory = Path(directory or DATA_DIR / "embeddings" / self.embedder.name.replace(":", "_"))
+        self.store = VectorStore(self.directory)
+        self._files_path = self.directory / "files.json"
+        # path -> {"mtime": float, "size": int, "chunks": [[key, start_line, end_line], ...]}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if self._files_path.exists():
+            with open(self._files_path, "r", encoding="utf-8") as f:
+                self.files = json.load(f)
+
+    @staticmethod
+    def _iter_files(root: Path) -> Iterator[Path]:
+        if root.is_file():
+            yield root
+            return
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+            for filename in filenames:
+                yield Path(dirpath) / filename
+
+    @staticmethod
+    def _read_text(path: Path) -> Optional[str]:
+        """Read a file as UTF-8 text, returning None for binary or undecodable files."""
+        with open(path, "rb") as f:
+            data = f.read()
+        if b"\0" in data[:1024]:
+            return None
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+    def index_path(self, path: str = ".") -> Dict[str, int]:
+        """
+        Bring the index up to date for every text file under a path.
+
+        Unchanged files (same mtime and size) are skipped, and chunks whose content
+        hash is already in the vector store are not re-embedded.
+
+        Args:
+            path: File or directory to index
+
+        Returns:
+            Dictionary with indexing statistics
+        """
+        with self._lock:
+            return self._index_path(Path(path).expanduser().absolute())
+
+    def _index_path(self, root: Path) -> Dict[str, int]:
+        stats = {"files_indexed": 0, "files_unchanged": 0, "chunks_embedded": 0, "chunks_cached": 0}
+        pending: Dict[str, str] = {}
+        seen = set()
+
+        for file_path in self._iter_files(root):
+            seen.add(str(file_path))
+            try:
+                st = file_path.stat()
+            except OSError:
+                continue
+            if st.st_size == 0 or st.st_size > RETRIEVAL_MAX_FILE_BYTES:
+                continue
+
+            key = str(file_path)
+            entry = self.files.get(key)
+            if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+                stats["files_unchanged"] += 1
+                continue
+
+            text = self._read_text(file_path)
+            if text is None:
+                continue
+
+            chunks = []
+            for start, end, chunk in chunk_text(text):
+                chunk_key = content_hash(chunk)
+                chunks.append([chunk_key, start, end])
+                if chunk_key in self.store or chunk_key in pending:
+                    stats["chunks_cached"] += 1
+                else:
+                    pending[chunk_key] = chunk
+            self.files[key] = {"mtime": st.st_mtime, "size": st.st_size, "chunks": chunks}
+            stats["files_indexed"] += 1
+
+        prefix = str(root).rstrip(os.sep) + os.sep
+        removed = [k for k in self.files if (k == str(root) or k.startswith(prefix)) and k not in seen]
+        for key in removed:
+            del self.files[key]
+
+        if pending:
+            keys = list(pending)
+            logger.info("Embedding %d new chunks with %s", len(keys), self.embedder.name)
+            vectors = self.embedder.embed([pending[k] for k in keys])
+            self.store.add(keys, vectors)
+            stats["chunks_embedded"] = len(keys)
+
+        if stats["files_indexed"] or removed:
+            self._save()
+        return stats
+
+    def _save(self):
+        self.store.flush()
+        tmp_path = self._files_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.files, f)
+        os.replace(tmp_path, self._files_path)
+
+    def search(self, query: str, path: str = ".", top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Return the top-k chunks under a path most similar to the query.
+
+        Args:
+            query: Natural language query
+            path: Only chunks from files under this path are considered
+            top_k: Number of results to return
+
+        Returns:
+            List of matches with file, line range, score and snippet text
+
+        Raises:
+            ValueError: If top_k is not a positive integer
+        """
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+            raise ValueError(f"top_k must be a positive integer, got {top_k!r}")
+        root = str(Path(path).expanduser().absolute())
+        # Embedded before taking the lock; it is a call to the embedding model
+        query_vector = _normalize(self.embedder.embed([query]))[0]
+        with self._lock:
+            candidates = [
+                (file_path, start, end, self.store.row(key))
+                for file_path, entry in self.files.items()
+                if file_path == root or file_path.startswith(root.rstrip(os.sep) + os.sep)
+                for key, start, end in entry["chunks"]
+                if key in self.store
+            ]
+            if not candidates:
+                return []
+            rows = np.fromiter((c[3] for c in candidates), dtype=np.int64, count=len(candidates))
+            # Fancy indexing copies the rows, so the memmap isn't used after the lock is released
+            scores = self.store.matrix[rows] @ query_vector
+
+        k = min(top_k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        file_lines: Dict[str, List[str]] = {}
+        for i in top:
+            file_path, start, end, _ = candidates[i]
+            if file_path not in file_lines:
+                try:
+                    text = self._read_text(Path(file_path)) or ""
+                except OSError:
+                    text = ""
+                file_lines[file_path] = text.splitlines(keepends=True)
+            results.append({
+                "file": file_path,
+                "start_line": start,
+                "end_line": end,
+                "score": round(float(scores[i]), 4),
+                "snippet": "".join(file_lines[file_path][start - 1:end])
+            })
+        return results
+
+
+_index: Optional[SemanticIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_semantic_index() -> SemanticIndex:
+    """Return the process-wide semantic index, creating it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            # Another thread may have created it while we waited
+            if _index is None:
+                _index = SemanticIndex()
+    return _index
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Pool of pre-initialized MCP server subprocesses for fast client session start."""
+
+import asyncio
+import collections
+import logging
+import time
+from typing import Callable, Deque, List, Optional
+
+import anyio
+import mcp.types as types
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from src.metrics import REGISTRY
+from src.tool_cache import watch_tool_list
+
+logger = logging.getLogger(__name__)
+
+POOL_ACQUIRE = REGISTRY.histogram(
+    "mcp_client_pool_acquire_seconds", "Time to obtain a server from the pool"
+)
+POOL_EVENTS = REGISTRY.counter("mcp_client_pool_events_total", "Pool member spawns, retirements and checks")
+
+# Seconds a retired server gets to exit before it is killed
+SHUTDOWN_TIMEOUT = 5.0
+# Longest wait before replacing a server that failed to start
+MAX_FAILURE_BACKOFF = 30.0
+
+
+class PooledServer:
+    """
+    One server subprocess with an initialized ClientSession.
+
+    The stdio transport and session are entered by a dedicated task (anyio
+    requires a context to be exited by the task that entered it), which holds
+    them open until the member is retired.
+    """
+
+    def __init__(self):
+        self.session: Optional[ClientSession] = None
+        self.tools: Optional[types.ListToolsResult] = None
+        self.error: Optional[BaseException] = None
+        self.uses = 0
+        self.assigned = False
+        self.last_used = time.monotonic()
+        self.ready = asyncio.Event()
+        self.retired = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        # Set by the session holding the member; called with the new tools/list result
+        self.on_tools_changed: Optional[Callable[[types.ListToolsResult], None]] = None
+        self.refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and not self.retired.is_set() and not self.task.done()
+
+
+class ServerPool:
+    """
+    Keep `size` initialized servers running and hand them out to sessions.
+
+    acquire() returns an idle member, or the oldest one still starting, or
+    spawns an extra one when all `size` are busy. release() puts the member
+    back for the next session; it is retired (and replaced) after `max_uses`
+    sessions, a failed health check, or if it is a burst extra beyond `size`.
+    Idle members are pinged every `health_interval` seconds.
+
+    A server that fails to start is replaced after `failure_backoff`
+    seconds, doubled for each consecutive failure. After `max_failures` in a
+    row the pool stops starting servers until the next acquire(), so a
+    broken command or environment doesn't become a crash loop.
+
+    Call close() before the event loop ends: the SDK's stdio transport does
+    not shut its subprocess down cleanly when asyncio.run() cancels it.
+
+    Args:
+        server_params: How to spawn a server
+        size: Number of servers to keep warm
+        max_uses: Sessions served before a member is replaced (0 = unlimited)
+        health_interval: Seconds between pings of idle members (0 disables)
+        health_timeout: Seconds to wait for a ping response
+        start_timeout: Seconds a server gets to initialize before it counts as failed
+        failure_backoff: Seconds before replacing a server that failed to start
+        max_failures: Consecutive start failures before replenishing stops
+    """
+
+    def __init__(self, server_params: StdioServerParameters, size: int = 2, max_uses: int = 0,
+                 health_interval: float = 30.0, health_timeout: float = 5.0, start_timeout: float = 30.0,
+                 failure_backoff: float = 0.5, max_failures: int = 5):
+        self.server_params = server_params
+        self.size = max(0, size)
+        self.max_uses = max_uses
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.start_timeout = start_timeout
+        self.failure_backoff = failure_backoff
+        self.max_failures = max(1, max_failures)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.closed = False
+        self._idle: Deque[PooledServer] = collections.deque()
+        self._warming: Deque[PooledServer] = collections.deque()
+        self._members: List[PooledServer] = []
+        self._health_task: Optional[asyncio.Task] = None
+        # Servers that failed to start in a row, and the pending delayed _replenish()
+        self._failures = 0
+        self._backoff: Optional[asyncio.TimerHandle] = None
+
+    async def start(self):
+        """Start warming servers (acquire() does this too)."""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            if self.health_interval > 0:
+                self._health_task = asyncio.create_task(self._health_loop())
+        self._replenish()
+
+    async def acquire(self) -> PooledServer:
+        """
+        Take a ready server from the pool, waiting for one to start if none is idle.
+
+        Returns:
+            A member with an initialized session and its tools/list result
+
+        Raises:
+            Exception: If the server could not be started
+        """
+        if self._failures >= self.max_failures:
+            # Replenishing stopped after repeated failures; give starting servers another try
+            self._failures = 0
+        await self.start()
+        started = time.perf_counter()
+        outcome = "warm"
+        member = None
+        while self._idle:
+            candidate = self._idle.popleft()
+            if await self._check(candidate, stale_only=True):
+                member = candidate
+                break
+        if member is None:
+            outcome = "starting" if self._warming else "cold"
+            member = self._warming.popleft() if self._warming else self._spawn()
+        member.assigned = True
+
+        await member.ready.wait()
+        POOL_ACQUIRE.observe(time.perf_counter() - started, outcome=outcome)
+        if member.error is not None:
+            self._retire(member)
+            raise member.error
+        return member
+
+    def release(self, member: PooledServer, reusable: bool = True):
+        """
+        Return a member after its session ends.
+
+        Args:
+            member: Member obtained from acquire()
+            reusable: False if the session saw errors and the server should be replaced
+        """
+        member.assigned = False
+        member.uses += 1
+        member.last_used = time.monotonic()
+        if (self.closed or not reusable or not member.alive or len(self._live()) > self.size
+                or (self.max_uses and member.uses >= self.max_uses)):
+            self._retire(member)
+            self._replenish()
+            return
+        self._idle.append(member)
+        POOL_EVENTS.inc(event="recycled")
+
+    async def close(self):
+        """Stop all servers, including those still handed out."""
+        self.closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+        if self._backoff is not None:
+            self._backoff.cancel()
+            self._backoff = None
+        for member in list(self._members):
+            self._retire(member)
+        tasks = [member.task for member in self._members if member.task is not None]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._idle.clear()
+        self._warming.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "warming": len(self._warming),
+            "in_use": sum(1 for member in self._members if member.assigned),
+            "processes": len(self._members)
+        }
+
+    def _live(self) -> List[PooledServer]:
+        return [member for member in self._members if not member.retired.is_set()]
+
+    def _replenish(self):
+        """Start servers until `size` are running (idle, busy or starting)."""
+        # Backing off after a failed start, or stopped until the next acquire()
+        if self._backoff is not None or self._failures >= self.max_failures:
+            return
+        while not self.closed and len(self._live()) < self.size:
+            self._warming.append(self._spawn())
+
+    def _start_failed(self):
+        """Count a server that failed to start and delay (or stop) replacing it."""
+        self._failures += 1
+        if self._failures >= self.max_failures:
+            logger.error("%d pooled MCP servers failed to start in a row; not starting more until "
+                         "the next session asks for one", self._failures)
+            POOL_EVENTS.inc(event="suspended")
+            return
+        delay = min(self.failure_backoff * 2 ** (self._failures - 1), MAX_FAILURE_BACKOFF)
+        logger.warning("Replacing the failed pooled MCP server in %.1fs", delay)
+        if self._backoff is None:
+            self._backoff = self.loop.call_later(delay, self._end_backoff)
+
+    def _end_backoff(self):
+        self._backoff = None
+        self._replenish()
+
+    def _spawn(self) -> PooledServer:
+        member = PooledServer()
+        member.task = asyncio.create_task(self._run_member(member))
+        self._members.append(member)
+        POOL_EVENTS.inc(event="spawned")
+        return member
+
+    async def _run_member(self, member: PooledServer):
+        """Own one server's transport and session for the member's lifetime."""
+        try:
+            with anyio.CancelScope() as shutdown:
+                async with stdio_client(self.server_params) as (read_stream, write_stream):
+                    async with ClientSession(read_stream, write_stream) as session:
+                        # initialize() never returns if the server exits before answering
+                        with anyio.fail_after(self.start_timeout):
+                            await session.initialize()
+                        watcher = asyncio.create_task(
+                            watch_tool_list(session, lambda: self._tools_changed(member))
+                        )
+                        # The watcher ends when the transport closes: the server is gone
+                        watcher.add_done_callback(lambda _: self._retire(member))
+                        try:
+                            with anyio.fail_after(self.start_timeout):
+                                member.tools = await session.list_tools()
+                            member.session = session
+                            self._on_ready(member)
+                            await member.retired.wait()
+                        finally:
+                            watcher.cancel()
+                            if member.refresh_task is not None:
+                                member.refresh_task.cancel()
+                        # A hung server doesn't exit when its stdin closes; past
+                        # the deadline the transport kills it
+                        shutdown.deadline = anyio.current_time() + SHUTDOWN_TIMEOUT
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Pooled MCP server failed: %s", e)
+            member.error = e
+            if member.session is None:
+                self._start_failed()
+        finally:
+            member.session = None
+            member.ready.set()
+            member.retired.set()
+            if member in self._idle:
+                self._idle.remove(member)
+            if member in self._warming:
+                self._warming.remove(member)
+            if member in self._members:
+                self._members.remove(member)
+            # Replace servers that exited on their own
+            self._replenish()
+
+    def _on_ready(self, member: PooledServer):
+        self._failures = 0
+        member.ready.set()
+        if not member.assigned and member in self._warming:
+            self._warming.remove(member)
+            self._idle.append(member)
+
+    def _tools_changed(self, member: PooledServer):
+        if member.refresh_task is not None and not member.refresh_task.done():
+            member.refresh_task.cancel()
+        member.refresh_task = asyncio.create_task(self._relist_tools(member))
+
+    async def _relist_tools(self, member: PooledServer):
+        """Refresh a member's tool list after the server reported a change."""
+        if member.session is None:
+            # Still starting; its initial list_tools() sees the new list
+            return
+        try:
+            member.tools = await member.session.list_tools()
+        except Exception as e:
+            logger.warning("Could not re-list tools of pooled MCP server: %r", e)
+            return
+        if member.on_tools_changed is not None:
+            member.on_tools_changed(member.tools)
+
+    def _retire(self, member: PooledServer):
+        if not member.retired.is_set():
+            POOL_EVENTS.inc(event="retired")
+        member.retired.set()
+        if member in self._idle:
+            self._idle.remove(member)
+        if member in self._warming:
+            self._warming.remove(member)
+
+    async def _check(self, member: PooledServer, stale_only: bool = False) -> bool:
+        """
+        Ping a member; retire it if the ping fails.
+
+        Args:
+            member: Member to check
+            stale_only: Skip the ping if the member was used within health_interval
+        """
+        if not member.alive:
+            self._retire(member)
+            return False
+        if stale_only and time.monotonic() - member.last_used < self.health_interval:
+            return True
+        try:
+            await asyncio.wait_for(member.session.send_ping(), self.health_timeout)
+            POOL_EVENTS.inc(event="health_ok")
+            return True
+        except Exception as e:
+            logger.warning("Pooled MCP server failed health check, replacing it: %r", e)
+            POOL_EVENTS.inc(event="health_failed")
+            self._retire(member)
+            return False
+
+    async def _health_loop(self):
+        while not self.closed:
+            await asyncio.sleep(self.health_interval)
+            for member in list(self._idle):
+                # Take it out while pinging so acquire() can't hand it out mid-check
+                if member not in self._idle:
+                    continue
+                self._idle.remove(member)
+                if await self._check(member):
+                    self._idle.append(member)
+            self._replenish()
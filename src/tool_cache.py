@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Client-side cache of converted tool schemas and tools/list_changed tracking."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import mcp.types as types
+
+from src.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Experimental capability the server uses to advertise a hash of its tool list
+TOOLS_HASH_CAPABILITY = "toolsHash"
+
+
+def schema_hash(definitions: List[Dict[str, Any]]) -> str:
+    """Return a short stable hash of a list of MCP tool definitions."""
+    encoded = json.dumps(definitions, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class ToolSchemaCache:
+    """
+    Ollama-format tool lists stored as JSON files, one per server version.
+
+    Entries live under DATA_DIR/tool_cache/<key>.json, where the key combines
+    the server's name and version from the initialize result with the tool
+    list hash the server advertises (if any). A hit lets a client skip the
+    tools/list round trip before its first chat turn; the client still
+    re-lists in the background to validate the entry.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory or DATA_DIR / "tool_cache")
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def make_key(init_result: types.InitializeResult) -> str:
+        """
+        Build the cache key for the server that sent an initialize result.
+
+        Args:
+            init_result: Result of ClientSession.initialize()
+
+        Returns:
+            Hex digest identifying the server's tool list
+        """
+        experimental = init_result.capabilities.experimental or {}
+        advertised = experimental.get(TOOLS_HASH_CAPABILITY, {}).get("sha256")
+        identity = [init_result.serverInfo.name, init_result.serverInfo.version, advertised]
+        return hashlib.sha256(json.dumps(identity).encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached tool list for a key, or None on a miss."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                tools = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable tool cache entry %s: %s", key, e)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tools
+
+    def put(self, key: str, tools: List[Dict[str, Any]]):
+        """Store a tool list, replacing any previous entry for the key."""
+        path = self._path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # A unique temp file: other clients, in this process or another, may store the same key
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{key}.", suffix=".tmp")
+        except OSError as e:
+            logger.warning("Could not write tool cache entry %s: %s", key, e)
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(tools, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write tool cache entry %s: %s", key, e)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters (stale counts hits the background refresh corrected)."""
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale}
+
+
+async def watch_tool_list(session, on_change: Callable[[], None]):
+    """
+    Read a ClientSession's incoming messages, calling on_change() on tools/list_changed.
+
+    The SDK hands server notifications to an unbuffered stream; without a
+    reader the session's receive loop blocks on the first notification and
+    every pending request stalls with it. Run this as a task for the
+    lifetime of the session.
+    """
+    async for message in session.incoming_messages:
+        if isinstance(message, Exception):
+            logger.warning("MCP session error: %s", message)
+        elif (isinstance(message, types.ServerNotification)
+              and isinstance(message.root, types.ToolListChangedNotification)):
+            logger.info("MCP server reported a tool list change")
+            on_change()
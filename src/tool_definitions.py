@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Tool names and JSON schemas, kept apart from the implementations in src.tools."""
+
+# Tools meant for operators rather than the LLM; clients don't offer them to the model
+INTERNAL_TOOLS = {"metrics", "profile"}
+
+# Tools without side effects; the client may retry them after a timeout or reconnect
+IDEMPOTENT_TOOLS = {
+    "calculator", "get_current_time", "list_files", "read_file", "semantic_search",
+    "fetch_result", "system_info", "metrics"
+}
+
+# Tool definitions for MCP server
+TOOL_DEFINITIONS = [
+    {
+        "name": "calculator",
+        "description": "Evaluate a mathematical expression. Supports basic arithmetic operations like +, -, *, /, **, %",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "expression": {
+                    "type": "string",
+                    "description": "Mathematical expression to evaluate (e.g., '2 + 2', '10 * 5')"
+                }
+            },
+            "required": ["expression"]
+        }
+    },
+    {
+        "name": "get_current_time",
+        "description": "Get the current date and time with timezone information",
+        "inputSchema": {
+            "type": "object",
+            "properties": {}
+        }
+    },
+    {
+        "name": "list_files",
+        "description": "List files and directories in a given path",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "directory": {
+                    "type": "string",
+                    "description": "Path to list (defaults to current directory)"
+                }
+            }
+        }
+    },
+    {
+        "name": "read_file",
+        "description": "Read contents of a text file",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to read"
+                },
+                "max_lines": {
+                    "type": "integer",
+                    "description": "Maximum number of lines to read (default 100)"
+                }
+            },
+            "required": ["file_path"]
+        }
+    },
+    {
+        "name": "semantic_search",
+        "description": "Search text files by meaning and return only the most relevant snippets. Prefer this over read_file when looking for where something is implemented or mentioned.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "What to look for, in natural language"
+                },
+                "path": {
+                    "type": "string",
+                    "description": "File or directory to search (defaults to current directory)"
+                },
+                "top_k": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "description": "Number of snippets to return (default 5)"
+                }
+            },
+            "required": ["query"]
+        }
+    },
+    {
+        "name": "fetch_result",
+        "description": "Read more of a large tool result that was replaced by a handle with a preview. Returns the bytes from offset; call again with next_offset to continue.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "handle": {
+                    "type": "string",
+                    "description": "The handle from the tool result"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Byte offset to start reading at (default 0)"
+                },
+                "length": {
+                    "type": "integer",
+                    "description": "Number of bytes to read (default 4096)"
+                }
+            },
+            "required": ["handle"]
+        }
+    },
+    {
+        "name": "write_file",
+        "description": "Write content to a file",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to write"
+                },
+                "content": {
+                    "type": "string",
+                    "description": "Content to write to the file"
+                }
+            },
+            "required": ["file_path", "content"]
+        }
+    },
+    {
+        "name": "create_directory",
+        "description": "Create a directory at the specified path. Creates parent directories if needed.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "directory_path": {
+                    "type": "string",
+                    "description": "Path where the directory should be created"
+                }
+            },
+            "required": ["directory_path"]
+        }
+    },
+    {
+        "name": "system_info",
+        "description": "Get system information including OS, hostname, and Python version",
+        "inputSchema": {
+            "type": "object",
+            "properties": {}
+        }
+    },
+    {
+        "name": "execute_command",
+        "description": "Execute a shell command and return the output. Use with caution!",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "Shell command to execute"
+                }
+            },
+            "required": ["command"]
+        }
+    },
+    {
+        "name": "metrics",
+        "description": "Get server metrics: tool latency, queue wait and payload size histograms and call counts",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "format": {
+                    "type": "string",
+                    "enum": ["json", "prometheus"],
+                    "description": "Output format (default json)"
+                }
+            }
+        }
+    },
+    {
+        "name": "profile",
+        "description": "Capture cProfile stats and tracemalloc snapshots for upcoming or slow tool calls",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["arm", "disarm", "status"],
+                    "description": "What to do (default status)"
+                },
+                "calls": {
+                    "type": "integer",
+                    "description": "Profile the next N tool calls"
+                },
+                "slow_threshold": {
+                    "type": "number",
+                    "description": "Keep profiles of calls slower than this many seconds"
+                },
+                "memory": {
+                    "type": "boolean",
+                    "description": "Also capture tracemalloc snapshots"
+                },
+                "tools": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Only profile these tools (default all)"
+                }
+            }
+        }
+    }
+]
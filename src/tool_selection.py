@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Per-message selection of the most relevant tools, to keep unused schemas out of the prompt."""
+
+import json
+import logging
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.config import (
+    TOOL_SELECTION_ALWAYS, TOOL_SELECTION_EMBEDDINGS, TOOL_SELECTION_TOP_K
+)
+from src.metrics import REGISTRY, COUNT_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+TOOLS_OFFERED = REGISTRY.histogram(
+    "mcp_client_tools_offered", "Tools sent to the model per request after selection", COUNT_BUCKETS
+)
+PROMPT_TOKENS_SAVED = REGISTRY.counter(
+    "mcp_client_tool_selection_saved_tokens_total", "Estimated prompt tokens saved by tool selection"
+)
+
+# Rough size of a token in JSON schema text; Ollama doesn't tokenize for us up front
+CHARS_PER_TOKEN = 4
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Longest first; crude, but enough to match "calculate"/"calculator", "files"/"file"
+_SUFFIXES = ("ations", "ation", "ators", "ator", "ions", "ion", "ing", "ies", "ate", "es", "ed",
+             "er", "or", "e", "s", "y")
+_STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "please", "that", "the", "this", "to", "use",
+    "what", "with", "you"
+}
+
+
+def _stem(word: str) -> str:
+    """Strip a common English suffix, keeping at least three characters."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics (including "_"), drop stop words and stem."""
+    return [_stem(word) for word in _WORD_RE.findall(text.lower()) if word not in _STOP_WORDS]
+
+
+def estimate_tokens(tools: List[Dict[str, Any]]) -> int:
+    """Estimate the prompt tokens taken by a list of Ollama tool schemas."""
+    if not tools:
+        return 0
+    return len(json.dumps(tools)) // CHARS_PER_TOKEN
+
+
+def tool_text(tool: Dict[str, Any]) -> str:
+    """Searchable text of an Ollama-format tool: name, description and parameters."""
+    function = tool["function"]
+    parts = [function["name"].replace("_", " "), function.get("description") or ""]
+    for name, schema in ((function.get("parameters") or {}).get("properties") or {}).items():
+        parts.append(name.replace("_", " "))
+        parts.append(schema.get("description") or "")
+    return " ".join(parts)
+
+
+class ToolSelector:
+    """
+    Rank tools against a user message and keep the top_k.
+
+    Scoring is BM25 over each tool's name, description and parameter
+    descriptions. With an embedder, the normalized BM25 score is blended with
+    the cosine similarity between the message and the tool text, and a tool
+    with no keyword match needs a similarity of at least min_similarity to be
+    considered. The keyword index is built when the selector is created and
+    the tool embeddings on the first select(), so each tool list is only
+    indexed once.
+
+    If no tool matches the message at all, every tool is offered: it is
+    cheaper to pay for the full prompt than to hide the tool the model needs.
+
+    Args:
+        tools: Ollama-format tool list
+        top_k: Tools to offer per message
+        always: Tool names offered regardless of score (not counted in top_k)
+        embedder: Object with embed(texts) -> matrix (see src.retrieval), or None
+        embedding_weight: Share of the embedding similarity in the blended score
+        min_similarity: Similarity at which a tool matches without sharing a keyword
+    """
+
+    def __init__(self, tools: List[Dict[str, Any]], top_k: int = TOOL_SELECTION_TOP_K,
+                 always: Optional[Iterable[str]] = None, embedder=None,
+                 embedding_weight: float = 0.5, min_similarity: float = 0.5,
+                 k1: float = 1.2, b: float = 0.75):
+        self.tools = tools
+        self.top_k = max(1, top_k)
+        self.always = set(always or ())
+        self.embedder = embedder
+        self.embedding_weight = embedding_weight
+        self.min_similarity = min_similarity
+        self.k1 = k1
+        self.b = b
+        self.full_tokens = estimate_tokens(tools)
+
+        self._term_counts = [Counter(tokenize(tool_text(tool))) for tool in tools]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        document_frequency: Counter = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        total = len(tools)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+        self._tool_vectors = None
+
+    def keyword_scores(self, message: str) -> List[float]:
+        """BM25 score of every tool for a message."""
+        terms = set(tokenize(message)) & self._idf.keys()
+        scores = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            score = 0.0
+            for term in terms:
+                frequency = counts.get(term, 0)
+                if frequency:
+                    norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+                    score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def _embedding_scores(self, message: str) -> Optional[List[float]]:
+        """Cosine similarity of the message to every tool, or None if embedding fails."""
+        import numpy as np
+
+        from src.retrieval import _normalize
+
+        try:
+            if self._tool_vectors is None:
+                self._tool_vectors = _normalize(self.embedder.embed([tool_text(t) for t in self.tools]))
+            query = _normalize(self.embedder.embed([message]))[0]
+        except Exception as e:
+            logger.warning("Tool selection embeddings unavailable, using keywords only: %s", e)
+            self.embedder = None
+            return None
+        return [float(value) for value in np.clip(self._tool_vectors @ query, 0.0, 1.0)]
+
+    def scores(self, message: str) -> List[float]:
+        """Relevance of every tool for a message (0 means no match)."""
+        scores = self.keyword_scores(message)
+        similarities = self._embedding_scores(message) if self.embedder is not None else None
+        if similarities is not None:
+            best = max(scores, default=0.0) or 1.0
+            scores = [
+                (1 - self.embedding_weight) * score / best + self.embedding_weight * similarity
+                if score > 0 or similarity >= self.min_similarity else 0.0
+                for score, similarity in zip(scores, similarities)
+            ]
+        return scores
+
+    def select(self, message: str) -> List[Dict[str, Any]]:
+        """
+        Pick the tools to offer the model for a message.
+
+        Args:
+            message: Latest user message
+
+        Returns:
+            Subset of the tool list, in its original order
+        """
+        if len(self.tools) <= self.top_k:
+            return self.tools
+        scores = self.scores(message)
+        ranked = sorted((index for index, score in enumerate(scores) if score > 0),
+                        key=lambda index: scores[index], reverse=True)
+        if not ranked:
+            selected = self.tools
+        else:
+            keep = set(ranked[:self.top_k])
+            selected = [tool for index, tool in enumerate(self.tools)
+                        if index in keep or tool["function"]["name"] in self.always]
+
+        saved = self.full_tokens - estimate_tokens(selected)
+        TOOLS_OFFERED.observe(len(selected))
+        if saved > 0:
+            PROMPT_TOKENS_SAVED.inc(saved)
+        logger.info("Offering %d of %d tools (~%d prompt tokens saved): %s", len(selected), len(self.tools),
+                    saved, [tool["function"]["name"] for tool in selected])
+        return selected
+
+
+def create_selector(tools: List[Dict[str, Any]]) -> ToolSelector:
+    """Create a selector for a tool list from the TOOL_SELECTION_* settings."""
+    embedder = None
+    if TOOL_SELECTION_EMBEDDINGS:
+        from src.retrieval import create_embedder
+
+        embedder = create_embedder()
+    always = [name.strip() for name in TOOL_SELECTION_ALWAYS.split(",") if name.strip()]
+    return ToolSelector(tools, TOOL_SELECTION_TOP_K, always, embedder)
@@ -1,13 +1,34 @@
 #!/usr/bin/env python3
 """MCP Server Tools - Collection of useful tools for the LLM."""
 
+import codecs
+import io
 import os
-import subprocess
 import json
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List, Optional, Tuple
+
+from src.config import (
+    COMMAND_CPU_SECONDS, COMMAND_MAX_OUTPUT_BYTES, READ_FILE_MAX_BYTES, RESULT_OFFLOAD_BYTES
+)
+
+# Re-exported; the schemas live apart so the server can list tools without importing this module
+from src.tool_definitions import IDEMPOTENT_TOOLS, INTERNAL_TOOLS, TOOL_DEFINITIONS
+
+if TYPE_CHECKING:
+    from src.blob_store import BlobStore
+
+
+def _read_output(f: BinaryIO, max_bytes: int) -> Tuple[str, bool]:
+    """Return up to max_bytes of a captured output file as text, and whether it was cut."""
+    f.seek(0)
+    data = f.read(max_bytes + 1) if max_bytes > 0 else f.read()
+    truncated = max_bytes > 0 and len(data) > max_bytes
+    if truncated:
+        data = data[:max_bytes]
+    return data.decode("utf-8", errors="replace"), truncated
 
 
 class MCPTools:
@@ -98,13 +119,17 @@ class MCPTools:
             }
 
     @staticmethod
-    def read_file(file_path: str, max_lines: int = 100) -> Dict[str, Any]:
+    def read_file(file_path: str, max_lines: int = 100, max_bytes: int = READ_FILE_MAX_BYTES) -> Dict[str, Any]:
         """
         Read contents of a text file.
 
+        At most max_bytes are read, however large the file; past that budget
+        the result is truncated and total_lines is None.
+
         Args:
             file_path: Path to the file to read
             max_lines: Maximum number of lines to read (default 100)
+            max_bytes: Maximum bytes to read from disk (0 = whole file)
 
         Returns:
             Dictionary with file contents or error
@@ -123,17 +148,129 @@ class MCPTools:
                     "error": f"Path is not a file: {file_path}"
                 }
 
-            with open(path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                content = ''.join(lines[:max_lines])
+            with open(path, 'rb') as f:
+                data = f.read(max_bytes + 1) if max_bytes > 0 else f.read()
+            complete = max_bytes <= 0 or len(data) <= max_bytes
+            # The budget may cut a UTF-8 sequence in half; a non-final decode drops the partial tail
+            text = codecs.getincrementaldecoder('utf-8')().decode(data[:max_bytes] if not complete else data,
+                                                                  final=complete)
+            lines = io.StringIO(text, newline=None).readlines()
+            content = ''.join(lines[:max_lines])
 
             return {
                 "success": True,
                 "file": str(path.absolute()),
                 "content": content,
                 "lines_read": min(len(lines), max_lines),
-                "total_lines": len(lines),
-                "truncated": len(lines) > max_lines
+                "total_lines": len(lines) if complete else None,
+                "truncated": len(lines) > max_lines or not complete,
+                "byte_limit_reached": not complete
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    @staticmethod
+    def semantic_search(query: str, path: str = ".", top_k: int = 5) -> Dict[str, Any]:
+        """
+        Find the file snippets most relevant to a query using embeddings.
+
+        Files under the path are chunked and embedded on first use; later calls
+        only embed chunks whose content changed.
+
+        Args:
+            query: Natural language description of what to find
+            path: File or directory to search (defaults to current directory)
+            top_k: Number of snippets to return (default 5)
+
+        Returns:
+            Dictionary with the best matching snippets or error
+        """
+        # bool is an int subclass; JSON true/false is not a count
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+            return {
+                "success": False,
+                "error": f"top_k must be a positive integer, got {top_k!r}"
+            }
+
+        try:
+            from src.retrieval import get_semantic_index
+
+            index = get_semantic_index()
+            stats = index.index_path(path)
+            results = index.search(query, path, top_k)
+
+            return {
+                "success": True,
+                "query": query,
+                "path": str(Path(path).expanduser().absolute()),
+                "results": results,
+                "count": len(results),
+                "index": stats
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    @staticmethod
+    def fetch_result(handle: str, offset: int = 0, length: int = 4096,
+                     store: Optional["BlobStore"] = None) -> Dict[str, Any]:
+        """
+        Read a slice of a large tool result that the server stored out of line.
+
+        The slice is shrunk to whole UTF-8 characters (but always holds at
+        least one); continue from next_offset. Slices are at most
+        RESULT_OFFLOAD_BYTES, the size at which the server offloads a
+        result field.
+
+        Args:
+            handle: Handle from an offloaded result
+            offset: Byte offset to start at (default 0)
+            length: Bytes to read (default 4096)
+            store: Blob store holding the result (defaults to DATA_DIR/blobs)
+
+        Returns:
+            Dictionary with the slice and where the next one starts, or error
+        """
+        try:
+            if store is None:
+                from src.blob_store import BlobStore
+
+                store = BlobStore()
+            total = store.size(handle)
+            offset = min(max(0, offset), total)
+            if RESULT_OFFLOAD_BYTES > 0:
+                length = min(length, RESULT_OFFLOAD_BYTES)
+            # A character is at most 4 bytes, so every slice holds at least one
+            length = max(4, length)
+            # Read 3 bytes more to skip the tail of a character cut by the offset
+            data = store.read(handle, offset, length + 3)
+            skip = 0
+            while skip < min(3, len(data)) and data[skip] & 0xC0 == 0x80:
+                skip += 1
+            offset += skip
+            data = data[skip:skip + length]
+            # Leave out a character cut at the end; the next slice starts with it
+            at_end = offset + len(data) == total
+            content = codecs.getincrementaldecoder('utf-8')().decode(data, final=at_end)
+            end = offset + len(content.encode('utf-8'))
+
+            return {
+                "success": True,
+                "handle": handle,
+                "offset": offset,
+                "content": content,
+                "total_bytes": total,
+                "next_offset": end if end < total else None
+            }
+        except FileNotFoundError:
+            return {
+                "success": False,
+                "error": f"Unknown result handle: {handle}"
             }
         except Exception as e:
             return {
@@ -230,32 +367,53 @@ class MCPTools:
             }
 
     @staticmethod
-    def execute_command(command: str) -> Dict[str, Any]:
+    def execute_command(command: str, max_output_bytes: int = COMMAND_MAX_OUTPUT_BYTES) -> Dict[str, Any]:
         """
         Execute a shell command (use with caution).
 
+        The command runs under the COMMAND_CPU_SECONDS and COMMAND_MEMORY_MB
+        resource limits. Output goes to temporary files rather than memory,
+        and only the first max_output_bytes of each stream are returned.
+
         Args:
             command: Shell command to execute
+            max_output_bytes: Bytes of stdout and of stderr to return (0 = all)
 
         Returns:
             Dictionary with command output or error
         """
-        try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+        import signal
+        import subprocess
+        import tempfile
 
-            return {
+        from src.governance import limit_command
+
+        try:
+            with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+                result = subprocess.run(
+                    limit_command(command),
+                    shell=True,
+                    stdout=stdout,
+                    stderr=stderr,
+                    timeout=30
+                )
+                stdout_text, stdout_truncated = _read_output(stdout, max_output_bytes)
+                stderr_text, stderr_truncated = _read_output(stderr, max_output_bytes)
+
+            response = {
                 "success": result.returncode == 0,
                 "command": command,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
+                "stdout": stdout_text,
+                "stderr": stderr_text,
                 "returncode": result.returncode
             }
+            if stdout_truncated or stderr_truncated:
+                response["output_truncated"] = True
+            # Killed by SIGXCPU, directly or as the shell's child
+            if result.returncode in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+                response["error"] = f"Command exceeded its CPU time limit of {COMMAND_CPU_SECONDS} seconds"
+                response["error_type"] = "cpu_limit"
+            return response
         except subprocess.TimeoutExpired:
             return {
                 "success": False,
@@ -267,115 +425,62 @@ class MCPTools:
                 "error": str(e)
             }
 
+    @staticmethod
+    def metrics(format: str = "json") -> Dict[str, Any]:
+        """
+        Get latency, payload size and call count metrics for this server.
 
-# Tool definitions for MCP server
-TOOL_DEFINITIONS = [
-    {
-        "name": "calculator",
-        "description": "Evaluate a mathematical expression. Supports basic arithmetic operations like +, -, *, /, **, %",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "expression": {
-                    "type": "string",
-                    "description": "Mathematical expression to evaluate (e.g., '2 + 2', '10 * 5')"
-                }
-            },
-            "required": ["expression"]
-        }
-    },
-    {
-        "name": "get_current_time",
-        "description": "Get the current date and time with timezone information",
-        "inputSchema": {
-            "type": "object",
-            "properties": {}
-        }
-    },
-    {
-        "name": "list_files",
-        "description": "List files and directories in a given path",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "directory": {
-                    "type": "string",
-                    "description": "Path to list (defaults to current directory)"
-                }
+        Args:
+            format: "json" for summarized histograms or "prometheus" for text exposition
+
+        Returns:
+            Dictionary with metrics
+        """
+        from src.metrics import REGISTRY
+
+        if format == "prometheus":
+            return {
+                "success": True,
+                "format": "prometheus",
+                "exposition": REGISTRY.render()
             }
+        return {
+            "success": True,
+            "format": "json",
+            "metrics": REGISTRY.snapshot()
         }
-    },
-    {
-        "name": "read_file",
-        "description": "Read contents of a text file",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "file_path": {
-                    "type": "string",
-                    "description": "Path to the file to read"
-                },
-                "max_lines": {
-                    "type": "integer",
-                    "description": "Maximum number of lines to read (default 100)"
-                }
-            },
-            "required": ["file_path"]
-        }
-    },
-    {
-        "name": "write_file",
-        "description": "Write content to a file",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "file_path": {
-                    "type": "string",
-                    "description": "Path to the file to write"
-                },
-                "content": {
-                    "type": "string",
-                    "description": "Content to write to the file"
-                }
-            },
-            "required": ["file_path", "content"]
-        }
-    },
-    {
-        "name": "create_directory",
-        "description": "Create a directory at the specified path. Creates parent directories if needed.",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "directory_path": {
-                    "type": "string",
-                    "description": "Path where the directory should be created"
-                }
-            },
-            "required": ["directory_path"]
-        }
-    },
-    {
-        "name": "system_info",
-        "description": "Get system information including OS, hostname, and Python version",
-        "inputSchema": {
-            "type": "object",
-            "properties": {}
-        }
-    },
-    {
-        "name": "execute_command",
-        "description": "Execute a shell command and return the output. Use with caution!",
-        "inputSchema": {
-            "type": "object",
-            "properties": {
-                "command": {
-                    "type": "string",
-                    "description": "Shell command to execute"
-                }
-            },
-            "required": ["command"]
-        }
-    }
-]
 
+    @staticmethod
+    def profile(action: str = "status", calls: int = 0, slow_threshold: float = 0.0,
+                memory: bool = False, tools: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Arm, disarm or inspect per-call cProfile / tracemalloc capture.
+
+        Args:
+            action: "arm", "disarm" or "status"
+            calls: When arming, capture the next N tool calls
+            slow_threshold: When arming, keep captures of calls slower than this many seconds
+            memory: When arming, also capture tracemalloc snapshots
+            tools: When arming, only profile these tools (default all)
+
+        Returns:
+            Dictionary with the profiler status and recent captures
+        """
+        from src.profiling import profiler
+
+        if action == "arm":
+            if calls <= 0 and slow_threshold <= 0:
+                return {"success": False, "error": "Arming needs calls > 0 or slow_threshold > 0"}
+            profiler.arm(calls, slow_threshold, memory, tools)
+        elif action == "disarm":
+            profiler.disarm()
+        elif action != "status":
+            return {"success": False, "error": f"Unknown action: {action}"}
+        return {
+            "success": True,
+            "status": profiler.status(),
+            "recent": [
+                {key: record[key] for key in ("timestamp", "tool", "reason", "duration_seconds", "profile")}
+                for record in profiler.recent
+            ]
+        }
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Lightweight span tracing for the MCP client and server.
+
+Spans follow the OpenTelemetry data model (trace/span ids, parent links,
+attributes, status) and are propagated between processes as a W3C
+``traceparent`` string in the MCP request ``_meta``. Finished spans are
+exported from a background thread to a local JSONL file or to an OTLP/HTTP
+JSON collector; ``python -m src.tracing`` runs a stand-in collector and turns
+span files into folded stacks for flame graphs.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.config import (
+    DATA_DIR,
+    TRACING_ENABLED,
+    TRACE_EXPORTER,
+    TRACE_FILE,
+    OTLP_ENDPOINT,
+)
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class SpanContext:
+    """Identifiers needed to parent a span, possibly created in another process."""
+
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, value: Optional[str]) -> Optional["SpanContext"]:
+        if not value:
+            return None
+        parts = value.split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        return cls(parts[1], parts[2])
+
+
+class Span:
+    """A timed operation with attributes; use Tracer.span() to create one."""
+
+    __slots__ = ("name", "context", "parent_span_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.context = SpanContext(trace_id, secrets.token_hex(8))
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "OK"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException):
+        self.status = "ERROR"
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+
+    def to_dict(self, service: str) -> Dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "service": service,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled, so call sites need no checks."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSpanExporter:
+    """Append finished spans, one JSON object per line, to a local file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: List[Dict[str, Any]]):
+        data = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        # One O_APPEND write per batch keeps lines intact when client and
+        # server processes share the file
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """Post spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, spans: List[Dict[str, Any]]):
+        by_service: Dict[str, List[Dict[str, Any]]] = {}
+        for span in spans:
+            by_service.setdefault(span["service"], []).append({
+                "traceId": span["trace_id"],
+                "spanId": span["span_id"],
+                "parentSpanId": span["parent_span_id"] or "",
+                "name": span["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(span["start_time_unix_nano"]),
+                "endTimeUnixNano": str(span["end_time_unix_nano"]),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span["attributes"].items()],
+                "status": {"code": 2 if span["status"] == "ERROR" else 1}
+            })
+        body = {"resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": "mcp-basic"}, "spans": service_spans}]
+            }
+            for service, service_spans in by_service.items()
+        ]}
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.url, data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        urllib.request.urlopen(request, timeout=self.timeout).close()
+
+
+class Tracer:
+    """Creates spans and hands finished ones to a background exporter thread."""
+
+    def __init__(self, service: str = "mcp", enabled: bool = TRACING_ENABLED, exporter=None):
+        self.service = service
+        self.enabled = enabled
+        self._exporter = exporter
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, service: str, enabled: bool = TRACING_ENABLED, exporter=None):
+        """Set the service name and exporter; call once at process start."""
+        self.service = service
+        self.enabled = enabled
+        if enabled:
+            self._exporter = exporter or self._exporter or create_exporter()
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+             parent: Optional[SpanContext] = None) -> Iterator[Any]:
+        """
+        Time a block of code as a span, nested under the current span by default.
+
+        Args:
+            name: Span name
+            attributes: Initial span attributes
+            parent: Explicit parent, e.g. extracted from a remote traceparent
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        current = _current_span.get()
+        if parent is None and current is not None:
+            parent = current.context
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self._submit(span.to_dict(self.service))
+
+    def inject(self) -> Dict[str, str]:
+        """Return the propagation fields for the current span (empty if none)."""
+        span = _current_span.get()
+        if not self.enabled or span is None:
+            return {}
+        return {"traceparent": span.context.to_traceparent()}
+
+    @staticmethod
+    def extract(carrier: Optional[Dict[str, Any]]) -> Optional[SpanContext]:
+        """Read a parent span context from propagation fields."""
+        if not carrier:
+            return None
+        return SpanContext.from_traceparent(carrier.get("traceparent"))
+
+    def _submit(self, span: Dict[str, Any]):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._export_loop, name="span-exporter", daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+        self._queue.put(span)
+
+    def _export_loop(self):
+        while True:
+            span = self._queue.get()
+            if span is None:
+                return
+            batch = [span]
+            while len(batch) < 512:
+                try:
+                    span = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if span is None:
+                    self._export(batch)
+                    return
+                batch.append(span)
+            self._export(batch)
+
+    def _export(self, batch: List[Dict[str, Any]]):
+        try:
+            self._exporter.export(batch)
+        except Exception as e:
+            logger.warning("Dropped %d spans: %s", len(batch), e)
+
+    def shutdown(self, timeout: float = 2.0):
+        """Flush queued spans and stop the exporter thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self._thread = None
+
+
+def create_exporter():
+    """Create the exporter selected by TRACE_EXPORTER ("jsonl" or "otlp")."""
+    if TRACE_EXPORTER == "otlp":
+        return OtlpHttpExporter(OTLP_ENDPOINT)
+    if TRACE_EXPORTER == "jsonl":
+        return JsonlSpanExporter(Path(TRACE_FILE) if TRACE_FILE else DATA_DIR / "traces" / "spans.jsonl")
+    raise ValueError(f"Unknown trace exporter: {TRACE_EXPORTER}")
+
+
+tracer = Tracer()
+
+
+def folded_stacks(spans: List[Dict[str, Any]]) -> List[str]:
+    """
+    Convert spans to folded stack lines ("root;child;leaf <self time in us>").
+
+    The output can be fed to flamegraph.pl, speedscope or inferno.
+    """
+    by_id = {span["span_id"]: span for span in spans}
+    child_time: Dict[str, int] = {}
+    for span in spans:
+        parent_id = span.get("parent_span_id")
+        if parent_id in by_id:
+            duration = span["end_time_unix_nano"] - span["start_time_unix_nano"]
+            child_time[parent_id] = child_time.get(parent_id, 0) + duration
+
+    totals: Dict[str, int] = {}
+    for span in spans:
+        frames = []
+        node = span
+        while node is not None:
+            frames.append(f"{node['service']}:{node['name']}")
+            node = by_id.get(node.get("parent_span_id"))
+        duration = span["end_time_unix_nano"] - span["start_time_unix_nano"]
+        self_us = max(0, duration - child_time.get(span["span_id"], 0)) // 1000
+        stack = ";".join(reversed(frames))
+        totals[stack] = totals.get(stack, 0) + self_us
+    return [f"{stack} {us}" for stack, us in sorted(totals.items())]
+
+
+def run_collector(port: int, output: Path, host: str = "127.0.0.1"):
+    """Run a stand-in OTLP/HTTP collector that appends received spans to a JSONL file."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    exporter = JsonlSpanExporter(output)
+
+    def attribute_value(value: Dict[str, Any]) -> Any:
+        for key in ("stringValue", "doubleValue", "boolValue"):
+            if key in value:
+                return value[key]
+        if "intValue" in value:
+            return int(value["intValue"])
+        return None
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            spans = []
+            for resource_spans in payload.get("resourceSpans", []):
+                service = next((attribute_value(a["value"]) for a in resource_spans["resource"]["attributes"]
+                                if a["key"] == "service.name"), "unknown")
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for span in scope_spans.get("spans", []):
+                        start, end = int(span["startTimeUnixNano"]), int(span["endTimeUnixNano"])
+                        spans.append({
+                            "trace_id": span["traceId"],
+                            "span_id": span["spanId"],
+                            "parent_span_id": span.get("parentSpanId") or None,
+                            "name": span["name"],
+                            "service": service,
+                            "start_time_unix_nano": start,
+                            "end_time_unix_nano": end,
+                            "duration_ms": round((end - start) / 1e6, 3),
+                            "status": "ERROR" if span.get("status", {}).get("code") == 2 else "OK",
+                            "attributes": {a["key"]: attribute_value(a["value"]) for a in span.get("attributes", [])}
+                        })
+            exporter.export(spans)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), CollectorHandler)
+    print(f"Collecting OTLP spans on http://{host}:{port}/v1/traces into {output}", file=sys.stderr)
+    server.serve_forever()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Trace collection and flame graph helpers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    collect = commands.add_parser("collect", help="Run a stand-in OTLP/HTTP collector")
+    collect.add_argument("--port", type=int, default=4318)
+    collect.add_argument("--output", type=Path, default=DATA_DIR / "traces" / "collected.jsonl")
+
+    folded = commands.add_parser("folded", help="Print folded stacks for a JSONL span file")
+    folded.add_argument("spans", type=Path)
+    folded.add_argument("--trace-id", help="Only include one trace")
+
+    args = parser.parse_args()
+    if args.command == "collect":
+        run_collector(args.port, args.output)
+    else:
+        with open(args.spans, "r", encoding="utf-8") as f:
+            spans = [json.loads(line) for line in f if line.strip()]
+        if args.trace_id:
+            spans = [s for s in spans if s["trace_id"] == args.trace_id]
+        print("\n".join(folded_stacks(spans)))
+
+
+if __name__ == "__main__":
+    main()
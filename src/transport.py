@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Newline-delimited JSON-RPC transport over TCP sockets (same framing as STDIO)."""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+import anyio
+import anyio.abc
+import anyio.lowlevel
+
+import mcp.types as types
+
+from src.config import MCP_SERVER_HOST, MCP_SERVER_PORT, TRANSPORT_MAX_MESSAGE_BYTES
+
+logger = logging.getLogger(__name__)
+
+# MCP cancellation; the installed SDK doesn't define it and rejects it as an unknown notification
+CANCELLED_METHOD = "notifications/cancelled"
+# Messages a session may have queued while the server is busy with a request;
+# cancellations behind them are only seen once there is room
+CANCEL_FILTER_BUFFER = 100
+
+
+@asynccontextmanager
+async def json_rpc_streams(stream: anyio.abc.ByteStream):
+    """
+    Adapt a byte stream to the (read_stream, write_stream) pair used by MCP sessions.
+
+    Args:
+        stream: Connected byte stream (e.g. a TCP socket)
+
+    Yields:
+        Tuple of memory streams carrying JSONRPCMessage objects
+    """
+    from anyio.streams.buffered import BufferedByteReceiveStream
+
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+    buffered = BufferedByteReceiveStream(stream)
+
+    async def reader():
+        try:
+            async with read_stream_writer:
+                while True:
+                    try:
+                        line = await buffered.receive_until(b"\n", TRANSPORT_MAX_MESSAGE_BYTES)
+                    except (anyio.IncompleteRead, anyio.EndOfStream, anyio.BrokenResourceError):
+                        return
+                    try:
+                        message = types.JSONRPCMessage.model_validate_json(line)
+                    except Exception as exc:
+                        await read_stream_writer.send(exc)
+                        continue
+                    await read_stream_writer.send(message)
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async def writer():
+        try:
+            async with write_stream_reader:
+                async for message in write_stream_reader:
+                    data = message.model_dump_json(by_alias=True, exclude_none=True)
+                    await stream.send(data.encode("utf-8") + b"\n")
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            await anyio.lowlevel.checkpoint()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(reader)
+        tg.start_soon(writer)
+        try:
+            yield read_stream, write_stream
+        finally:
+            tg.cancel_scope.cancel()
+
+
+@asynccontextmanager
+async def filter_cancellations(read_stream, on_cancel: Callable[[Any, Optional[str]], None]):
+    """
+    Take `notifications/cancelled` out of a server's incoming message stream.
+
+    The SDK would fail the session on this unknown notification, and it
+    handles one request at a time, so the cancellation for a running request
+    would wait behind it anyway. Here it is read immediately and passed to
+    on_cancel(request_id, reason).
+
+    Args:
+        read_stream: Incoming message stream from the transport
+        on_cancel: Called for each cancellation notification
+
+    Yields:
+        Stream with every other message, for Server.run()
+    """
+    send_stream, receive_stream = anyio.create_memory_object_stream(CANCEL_FILTER_BUFFER)
+
+    async def forward():
+        async with send_stream:
+            async for message in read_stream:
+                if (isinstance(message, types.JSONRPCMessage)
+                        and isinstance(message.root, types.JSONRPCNotification)
+                        and message.root.method == CANCELLED_METHOD):
+                    params = message.root.params or {}
+                    on_cancel(params.get("requestId"), params.get("reason"))
+                    continue
+                await send_stream.send(message)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(forward)
+        try:
+            yield receive_stream
+        finally:
+            tg.cancel_scope.cancel()
+
+
+@asynccontextmanager
+async def socket_client(host: str = MCP_SERVER_HOST, port: int = MCP_SERVER_PORT):
+    """
+    Client transport for TCP: connect to a server started with --transport tcp.
+
+    Yields:
+        Tuple of (read_stream, write_stream) for ClientSession
+    """
+    stream = await anyio.connect_tcp(host, port)
+    async with stream, json_rpc_streams(stream) as streams:
+        yield streams
+
+
+async def serve_socket(
+    handle_session: Callable[..., Awaitable[None]],
+    host: str = MCP_SERVER_HOST,
+    port: int = MCP_SERVER_PORT
+):
+    """
+    Accept TCP connections forever, running one MCP session per connection.
+
+    Args:
+        handle_session: Coroutine called with (read_stream, write_stream) per connection
+        host: Interface to bind
+        port: Port to bind
+    """
+    listener = await anyio.create_tcp_listener(local_host=host, local_port=port)
+    logger.info("Listening for MCP connections on %s:%d", host, port)
+
+    async def handle(stream: anyio.abc.SocketStream):
+        async with stream:
+            try:
+                async with json_rpc_streams(stream) as (read_stream, write_stream):
+                    await handle_session(read_stream, write_stream)
+            except Exception as e:
+                logger.error("MCP connection failed: %s", e)
+
+    await listener.serve(handle)
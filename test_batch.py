@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Test batch mode: input parsing, result lines, the stderr summary and the exit code."""
+
+import sys
+import os
+import asyncio
+import contextlib
+import io
+import json
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import src.cli as cli
+
+
+class StubClient:
+    """Stands in for MCPClient: answers from the prompt text, without a server or model."""
+
+    instances = []
+    fail_connect = False
+
+    def __init__(self, server_address=None, show_tool_calls=True):
+        self.conversation_history = []
+        self.closed = False
+        StubClient.instances.append(self)
+
+    async def connect(self):
+        if StubClient.fail_connect:
+            raise ConnectionError("no server")
+
+    def reset_conversation(self):
+        self.conversation_history = []
+
+    async def chat(self, prompt: str) -> str:
+        assert not self.conversation_history, "conversation not reset between prompts"
+        self.conversation_history.append({"role": "user", "content": prompt})
+        if prompt == "slow":
+            await asyncio.sleep(0.2)
+        if prompt == "fail":
+            return "Error: model unavailable"
+        if prompt == "calc":
+            self.conversation_history.append({"role": "assistant", "content": "", "tool_calls": [
+                {"function": {"name": "calculator", "arguments": {"expression": "2 + 2"}}}
+            ]})
+            return "4"
+        return prompt.upper()
+
+    async def close(self):
+        self.closed = True
+
+
+def _run(lines, concurrency: int = 2):
+    """Run a batch; return (failed count, result lines, stderr)."""
+    output, stderr = io.StringIO(), io.StringIO()
+    runner = cli.BatchRunner(io.StringIO("\n".join(lines) + "\n"), output, concurrency)
+    with contextlib.redirect_stderr(stderr):
+        errors = asyncio.run(runner.run())
+    return errors, [json.loads(line) for line in output.getvalue().splitlines()], stderr.getvalue()
+
+
+def test_batch():
+    """Drive BatchRunner and main() with a stub client in place of MCPClient."""
+    print("=" * 50)
+    print("Testing Batch Mode")
+    print("=" * 50)
+
+    original = cli.MCPClient
+    cli.MCPClient = StubClient
+    try:
+        # Test parsing and result lines
+        print("\n1. Testing prompts, bad lines and errors...")
+        lines = [
+            '{"prompt": "slow", "id": "first"}',
+            '"bare string"',
+            "",
+            "not json",
+            '{"text": "no prompt"}',
+            '{"prompt": "fail"}',
+            '{"prompt": "calc"}',
+        ]
+        errors, results, stderr = _run(lines)
+        by_index = {result["index"]: result for result in results}
+        for result in results:
+            print(f"   {result}")
+        assert errors == 3 and len(results) == 6 and sorted(by_index) == [0, 1, 3, 4, 5, 6]
+        assert by_index[0]["id"] == "first" and by_index[0]["response"] == "SLOW"
+        assert by_index[1]["id"] == 1 and by_index[1]["response"] == "BARE STRING"
+        assert by_index[3]["error"].startswith("Invalid input line")
+        assert "prompt" in by_index[4]["error"]
+        assert by_index[5]["error"] == "Error: model unavailable"
+        assert by_index[6]["tool_calls"] == ["calculator"] and "error" not in by_index[6]
+
+        # Test output order
+        print("\n2. Testing results are written in completion order...")
+        print(f"   Indexes as written: {[result['index'] for result in results]}")
+        assert results[-1]["index"] == 0, "slow prompt held back the others"
+        assert {result["worker"] for result in results} == {0, 1}
+        assert all(client.closed for client in StubClient.instances)
+
+        # Test the summary
+        print("\n3. Testing the stderr summary...")
+        print(f"   {stderr.strip()}")
+        assert "6 prompts, 3 errors" in stderr and "p50=" in stderr
+
+        # Test a failed connection
+        print("\n4. Testing prompts still get a result when sessions can't connect...")
+        StubClient.instances.clear()
+        StubClient.fail_connect = True
+        errors, results, _ = _run(['"a"', '"b"', '"c"'])
+        print(f"   {results[0]['error']}")
+        assert errors == 3 and len(results) == 3
+        assert all(result["error"].startswith("Failed to connect") for result in results)
+        assert not any(client.closed for client in StubClient.instances)
+        StubClient.fail_connect = False
+
+        # Test the exit code
+        print("\n5. Testing the exit code of main()...")
+        with tempfile.TemporaryDirectory() as tmp:
+            good, bad, out = Path(tmp) / "good.jsonl", Path(tmp) / "bad.jsonl", Path(tmp) / "out.jsonl"
+            good.write_text('"a"\n"b"\n')
+            bad.write_text('"a"\n{"prompt": "fail"}\n')
+            with contextlib.redirect_stderr(io.StringIO()):
+                ok = asyncio.run(cli.main(["--batch", str(good), "--output", str(out)]))
+                written = len(out.read_text().splitlines())
+                failed = asyncio.run(cli.main(["--batch", str(bad), "--output", str(out), "--concurrency", "1"]))
+            print(f"   Clean batch: {ok}, batch with a failed prompt: {failed}")
+            assert ok == 0 and failed == 1 and written == 2
+    finally:
+        cli.MCPClient = original
+        StubClient.fail_connect = False
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_batch()
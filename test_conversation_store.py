@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Test the conversation log: resume, reset, blob offloading and crash recovery."""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.blob_store import BlobStore
+from src.conversation_store import INDEX_ENTRY, ConversationStore
+
+
+def test_conversation_store():
+    """Write sessions, damage their files like a crash would, and resume them."""
+    print("=" * 50)
+    print("Testing Conversation Store")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ConversationStore(Path(tmp) / "conversations", BlobStore(Path(tmp) / "blobs"),
+                                  inline_max_bytes=100)
+
+        # Test append and resume
+        print("\n1. Testing append and load...")
+        conversation = store.open("demo")
+        conversation.append({"role": "user", "content": "hello"})
+        conversation.append({"role": "assistant", "content": "hi"})
+        conversation.close()
+        conversation = store.open("demo")
+        messages = conversation.load()
+        print(f"   Resumed: {messages}")
+        assert messages == [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "hi"}]
+
+        # Test large tool results
+        print("\n2. Testing tool results stored as blobs...")
+        big = "x" * 1000
+        kept = conversation.append({"role": "tool", "content": big})
+        log_size = conversation.log_path.stat().st_size
+        print(f"   Log size with a 1000 byte result: {log_size} bytes")
+        print(f"   Kept in memory: {kept}")
+        assert log_size < 1000 and "content" not in kept and kept["content_bytes"] == 1000
+        resumed = conversation.load()[-1]
+        assert resumed == kept, "resume should keep the reference, not the result"
+        assert conversation.resolve(resumed) == {"role": "tool", "content": big}
+        small = {"role": "tool", "content": "ok"}
+        assert conversation.append(small) is small and conversation.resolve(small) is small
+        # A result whose blob is gone resolves to an error the model can read
+        missing = dict(kept, content_blob="0" * 64)
+        assert "missing" in conversation.resolve(missing)["content"]
+
+        # Test reset
+        print("\n3. Testing reset...")
+        conversation.reset()
+        conversation.append({"role": "user", "content": "after reset"})
+        messages = conversation.load()
+        print(f"   After reset: {messages}")
+        assert messages == [{"role": "user", "content": "after reset"}]
+
+        # Test the resume window
+        print("\n4. Testing load(limit) starts at a user message...")
+        for turn in range(3):
+            conversation.append({"role": "user", "content": f"q{turn}"})
+            conversation.append({"role": "assistant", "content": "", "tool_calls": [{}]})
+            conversation.append({"role": "tool", "content": "result"})
+            conversation.append({"role": "assistant", "content": f"a{turn}"})
+        messages = conversation.load(limit=6)
+        print(f"   Roles: {[m['role'] for m in messages]}")
+        assert messages[0] == {"role": "user", "content": "q2"} and len(messages) == 4
+
+        # Test the lock
+        print("\n5. Testing a second writer is refused...")
+        try:
+            store.open("demo")
+            raise AssertionError("second open succeeded")
+        except RuntimeError as e:
+            print(f"   Refused: {e}")
+        records = conversation.records
+        conversation.close()
+
+        # Test recovery from a torn last record
+        print("\n6. Testing recovery from a partly written record...")
+        log_path = Path(tmp) / "conversations" / "demo.jsonl"
+        with open(log_path, "ab") as f:
+            f.write(b'{"ts": "2026-01-01", "message": {"role": "us')
+        conversation = store.open("demo")
+        print(f"   Records: {conversation.records} (was {records})")
+        assert conversation.records == records and conversation.load()[-1]["content"] == "a2"
+        conversation.append({"role": "user", "content": "after crash"})
+        assert conversation.load()[-1]["content"] == "after crash"
+        records = conversation.records
+        conversation.close()
+
+        # Test recovery from an index that is behind the log
+        print("\n7. Testing recovery from a stale index...")
+        index_path = log_path.with_suffix(".idx")
+        with open(index_path, "r+b") as f:
+            # Drop the last two entries and leave half of one behind
+            f.truncate((records - 2) * INDEX_ENTRY.size + 3)
+        conversation = store.open("demo")
+        print(f"   Records: {conversation.records} (was {records})")
+        assert conversation.records == records
+        assert index_path.stat().st_size == records * INDEX_ENTRY.size
+        assert conversation.load()[-1]["content"] == "after crash"
+        conversation.close()
+
+        print("\n8. Testing list_sessions...")
+        sessions = store.list_sessions()
+        print(f"   Sessions: {[(s['name'], s['records']) for s in sessions]}")
+        assert [s["name"] for s in sessions] == ["demo"] and sessions[0]["records"] == records
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_conversation_store()
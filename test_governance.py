@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Test quotas: token buckets, the governor's admission rules and command limits."""
+
+import sys
+import os
+import subprocess
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.governance import Governor, QuotaExceeded, TokenBucket, limit_command, parse_limits
+
+
+def _rejected(governor: Governor, session, tool: str) -> str:
+    """Return the rejection type of a call that must be rejected."""
+    try:
+        governor.admit(session, tool)
+    except QuotaExceeded as e:
+        return e.error_type
+    raise AssertionError(f"{tool} was admitted")
+
+
+def test_governance():
+    """Check each quota with time moved by hand, so nothing depends on timing."""
+    print("=" * 50)
+    print("Testing Governance")
+    print("=" * 50)
+
+    # Test token bucket
+    print("\n1. Testing TokenBucket...")
+    bucket = TokenBucket(rate=2, burst=3)
+    bucket.charge(3)
+    print(f"   Empty bucket waits {bucket.wait_time():.2f}s for a token")
+    assert abs(bucket.wait_time() - 0.5) < 0.01
+    bucket.charge(2)
+    assert abs(bucket.wait_time() - 1.5) < 0.01, "debt should delay the next token"
+    bucket.updated -= 10
+    print(f"   After 10s idle: {bucket.wait_time():.2f}s wait, {bucket.tokens:.0f} tokens")
+    assert bucket.wait_time() == 0 and bucket.tokens == 3
+
+    # Test limit specs
+    print("\n2. Testing parse_limits...")
+    limits = parse_limits("execute_command=1:5, read_file=10,")
+    print(f"   Limits: {limits}")
+    assert limits == {"execute_command": (1.0, 5.0), "read_file": (10.0, 10.0)}
+
+    # Test rate limits
+    print("\n3. Testing session and tool rate limits...")
+    governor = Governor(session_rate=1, session_burst=3, tool_rates={"execute_command": (1, 1)},
+                        session_concurrency=0, io_rate=0)
+    session = governor.new_session()
+    governor.admit(session, "execute_command").release()
+    print(f"   Second execute_command: {_rejected(governor, session, 'execute_command')}")
+    governor.admit(session, "calculator").release()
+    governor.admit(session, "calculator").release()
+    print(f"   Fourth call in the burst: {_rejected(governor, session, 'calculator')}")
+    other = governor.new_session()
+    governor.admit(other, "calculator").release()
+    print("   Another session is not affected")
+    # Rejected calls don't use up tokens: one second later exactly one call fits
+    session.calls.updated -= 1
+    governor.admit(session, "calculator").release()
+    assert _rejected(governor, session, "calculator") == "rate_limited"
+
+    # Test concurrency limits
+    print("\n4. Testing concurrency limits...")
+    governor = Governor(session_rate=0, session_concurrency=2, tool_concurrency={"semantic_search": 1}, io_rate=0)
+    first, second = governor.new_session(), governor.new_session()
+    search = governor.admit(first, "semantic_search")
+    print(f"   semantic_search from another session: {_rejected(governor, second, 'semantic_search')}")
+    calculator = governor.admit(first, "calculator")
+    print(f"   Third call in one session: {_rejected(governor, first, 'list_files')}")
+    search.release()
+    search.release()
+    print("   Releasing twice frees one slot")
+    assert first.running == 1 and governor._running["semantic_search"] == 0
+    governor.admit(second, "semantic_search").release()
+    calculator.release()
+
+    # Test the I/O budget
+    print("\n5. Testing the response byte budget...")
+    governor = Governor(session_rate=0, session_concurrency=0, io_rate=100)
+    session = governor.new_session()
+    permit = governor.admit(session, "read_file")
+    permit.charge_io(1500)
+    permit.release()
+    try:
+        governor.admit(session, "read_file")
+        raise AssertionError("admitted while over the I/O budget")
+    except QuotaExceeded as e:
+        print(f"   Over budget by 500 bytes: retry after {e.retry_after:.1f}s")
+        assert e.error_type == "rate_limited" and abs(e.retry_after - 5) < 0.1
+
+    # Test command limits
+    print("\n6. Testing limit_command...")
+    command = limit_command("ulimit -St; ulimit -Ht; ulimit -d", cpu_seconds=7, memory_mb=64)
+    output = subprocess.run(command, shell=True, capture_output=True, text=True).stdout.split()
+    print(f"   CPU soft/hard and data limit seen by the command: {output}")
+    if os.name == "posix":
+        assert output == ["7", "8", str(64 * 1024)]
+    assert limit_command("true", cpu_seconds=0, memory_mb=0) == "true"
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_governance()
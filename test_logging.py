@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Test logging helpers: payload truncation, queued payload snapshots, JSON lines and sampling."""
+
+import sys
+import os
+import hashlib
+import json
+import logging
+import queue
+import random
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.logging_utils import JsonFormatter, Payload, ToolLogSampler, _DeferredQueueHandler
+
+
+def test_logging():
+    """Check what ends up in a log line, without starting the listener thread."""
+    print("=" * 50)
+    print("Testing Logging")
+    print("=" * 50)
+
+    # Test truncation and hashing
+    print("\n1. Testing payload truncation...")
+    long_text = "é" * 50
+    summary = Payload({"text": long_text, "short": "ok", "n": 3, "items": list(range(12))}, max_chars=10).summary()
+    print(f"   {summary}")
+    digest = hashlib.sha256(long_text.encode("utf-8")).hexdigest()[:12]
+    assert summary["text"] == "é" * 10 + f"...<50 chars, sha256:{digest}>"
+    assert summary["short"] == "ok" and summary["n"] == 3
+    assert summary["items"] == list(range(10)) + ["...<12 items>"]
+    assert str(Payload("x" * 20, max_chars=5)).startswith("xxxxx...<20 chars")
+    assert json.loads(str(Payload({"a": [1, 2]}))) == {"a": [1, 2]}
+
+    # Test payloads are copied when queued
+    print("\n2. Testing a payload changed after logging is logged as it was...")
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    logger = logging.getLogger("test_logging")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(_DeferredQueueHandler(records))
+    arguments = {"file_path": "a.txt", "lines": [1, 2]}
+    logger.info("Calling tool with %s", Payload(arguments))
+    logger.info("Result: %(result)s", {"result": Payload(arguments)})
+    arguments["file_path"] = "changed.txt"
+    arguments["lines"].append(3)
+    positional, named = records.get().getMessage(), records.get().getMessage()
+    print(f"   {positional}")
+    assert positional == 'Calling tool with {"file_path": "a.txt", "lines": [1, 2]}'
+    assert named == 'Result: {"file_path": "a.txt", "lines": [1, 2]}'
+
+    # Long lists are only copied as far as they are logged
+    big = Payload(list(range(1000)), max_chars=5).snapshot()
+    assert len(big.obj) == 5 and big.summary()[-1] == "...<1000 items>"
+
+    # Test the JSON formatter
+    print("\n3. Testing JsonFormatter...")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logger.makeRecord("test_logging", logging.ERROR, __file__, 1, "Tool %s failed", ("calc",),
+                                   sys.exc_info(), extra={"tool": "calc", "arguments": Payload({"x": "y" * 300})})
+    line = JsonFormatter().format(record)
+    entry = json.loads(line)
+    print(f"   Keys: {sorted(entry)}")
+    assert entry["level"] == "ERROR" and entry["logger"] == "test_logging" and entry["msg"] == "Tool calc failed"
+    assert entry["tool"] == "calc" and entry["arguments"]["x"].startswith("y" * 10) and len(entry["arguments"]["x"]) < 300
+    assert "ValueError: boom" in entry["exc"] and "\n" not in line
+
+    # Test sampling
+    print("\n4. Testing ToolLogSampler...")
+    sampler = ToolLogSampler("read_file=0.1, execute_command=1, write_file=0, *=0.5")
+    print(f"   Rates: {sampler.rates}, default {sampler.default_rate}")
+    assert sampler.rates == {"read_file": 0.1, "execute_command": 1.0, "write_file": 0.0}
+    assert sampler.default_rate == 0.5 and ToolLogSampler("").default_rate == 1.0
+    random.seed(0)
+    assert all(sampler.should_log("execute_command") for _ in range(100))
+    assert not any(sampler.should_log("write_file") for _ in range(100))
+    sampled = sum(sampler.should_log("read_file") for _ in range(10000))
+    other = sum(sampler.should_log("calculator") for _ in range(10000))
+    print(f"   Logged read_file {sampled}/10000, calculator {other}/10000")
+    assert 800 < sampled < 1200 and 4500 < other < 5500
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_logging()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Test metrics: counters, histograms, the exposition format and exposition files."""
+
+import sys
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.metrics import ExpositionFileWriter, MetricsRegistry
+
+
+def test_metrics():
+    """Record into a private registry and check what Prometheus would read."""
+    print("=" * 50)
+    print("Testing Metrics")
+    print("=" * 50)
+
+    registry = MetricsRegistry()
+
+    # Test counters
+    print("\n1. Testing counters...")
+    calls = registry.counter("calls_total", "Tool calls")
+    assert registry.counter("calls_total", "ignored") is calls, "same name should return the same metric"
+    calls.inc(tool="read_file")
+    calls.inc(2, tool="read_file")
+    calls.inc(tool='say "hi"\n')
+    print(f"   {calls.snapshot()}")
+    assert calls.value(tool="read_file") == 3 and calls.value(tool="write_file") == 0
+    rendered = calls.render().splitlines()
+    assert rendered == [
+        "# HELP calls_total Tool calls",
+        "# TYPE calls_total counter",
+        'calls_total{tool="read_file"} 3',
+        'calls_total{tool="say \\"hi\\"\\n"} 1',
+    ], rendered
+
+    # Test histograms
+    print("\n2. Testing histograms...")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0, 10.0))
+    for value in (0.05, 0.5, 0.5, 5.0, 50.0):
+        latency.observe(value)
+    lines = latency.render().splitlines()
+    print("   " + "\n   ".join(lines[2:]))
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="10"} 4',
+        'latency_seconds_bucket{le="+Inf"} 5',
+        "latency_seconds_sum 56.05",
+        "latency_seconds_count 5",
+    ]
+    # Values equal to a bound fall in that bucket (le is inclusive)
+    latency.observe(1.0, tool="x")
+    assert 'latency_seconds_bucket{tool="x",le="1"} 1' in latency.render()
+
+    # Test quantiles
+    print("\n3. Testing quantiles...")
+    summary = latency.snapshot()["{}"]
+    print(f"   p50={summary['p50']:.3f} p99={summary['p99']:.3f} min={summary['min']} max={summary['max']}")
+    assert 0.1 <= summary["p50"] <= 1.0
+    assert summary["p99"] <= 50.0 and latency.quantile(0.0) >= 0.05, "quantile outside the observed range"
+    assert latency.quantile(0.5, tool="missing") is None
+
+    # Test the registry
+    print("\n4. Testing the registry exposition...")
+    text = registry.render()
+    assert text.endswith("\n") and text.index("calls_total") < text.index("latency_seconds")
+    assert registry.snapshot()["latency_seconds"]["type"] == "histogram"
+
+    # Test exposition files
+    print("\n5. Testing exposition files...")
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "metrics"
+        off = ExpositionFileWriter("client", registry, interval=0, directory=directory)
+        off.maybe_flush()
+        assert not directory.exists(), "interval 0 should not write"
+
+        # A file left by a process that has exited
+        exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                                capture_output=True, text=True)
+        directory.mkdir()
+        stale = directory / f"server-{exited.stdout.strip()}.prom"
+        stale.write_text("stale")
+        alive = directory / f"server-{os.getppid()}.prom"
+        alive.write_text("alive")
+
+        writer = ExpositionFileWriter("client", registry, interval=60, directory=directory)
+        writer.maybe_flush()
+        writer.maybe_flush()
+        print(f"   Files: {sorted(p.name for p in directory.iterdir())}")
+        assert writer.path.read_text() == text
+        assert alive.exists(), "file of a running process was removed"
+        if os.name == "posix":
+            assert not stale.exists(), "file of an exited process was kept"
+        writer.close()
+        writer.close()
+        assert not writer.path.exists() and alive.exists()
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_metrics()
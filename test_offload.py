@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Test large tool result offloading and paging through results with fetch_result."""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.blob_store import BlobStore
+from src.config import RESULT_OFFLOAD_BYTES, RESULT_PREVIEW_CHARS
+from src.mcp_server import MCPServerApp
+from src.tools import MCPTools
+
+
+def _page(store: BlobStore, handle: str, offset: int, length: int) -> str:
+    """Read a result from offset to the end by following next_offset."""
+    parts = []
+    while offset is not None:
+        result = MCPTools.fetch_result(handle, offset, length, store)
+        assert result["success"], result
+        assert result["next_offset"] is None or result["next_offset"] > offset, "fetch_result did not advance"
+        parts.append(result["content"])
+        offset = result["next_offset"]
+    return "".join(parts)
+
+
+def test_offload():
+    """Offload a multibyte result, then read it back in slices of every awkward size."""
+    print("=" * 50)
+    print("Testing Result Offloading")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = MCPServerApp()
+        app._blobs = store = BlobStore(Path(tmp) / "blobs")
+
+        # Test small results
+        print("\n1. Testing small results are returned as is...")
+        small = {"success": True, "content": "short"}
+        assert app._offload("read_file", small) is small
+
+        if RESULT_OFFLOAD_BYTES <= 0:
+            print("\n   RESULT_OFFLOAD_BYTES is 0; skipping offload tests")
+            return
+
+        # Test offloading
+        print("\n2. Testing a large result is replaced by a handle...")
+        text = "".join(f"line {i}: aé€😀\n" for i in range(RESULT_OFFLOAD_BYTES // 10))
+        data = text.encode("utf-8")
+        result = app._offload("read_file", {"success": True, "file": "big.txt", "content": text})
+        handle = result["content"]
+        print(f"   Handle: {handle['handle'][:16]}..., {handle['bytes']} bytes, {handle['lines']} lines")
+        assert result["offloaded"] == ["content"] and result["file"] == "big.txt"
+        assert handle["bytes"] == len(data) and handle["lines"] == RESULT_OFFLOAD_BYTES // 10
+        assert handle["preview"] == text[:RESULT_PREVIEW_CHARS]
+        assert store.get(handle["handle"]) == data
+
+        # The threshold counts bytes: under it in characters but over it in bytes is offloaded
+        multibyte = "€" * (RESULT_OFFLOAD_BYTES // 2)
+        assert app._offload("read_file", {"content": multibyte}).get("offloaded") == ["content"]
+
+        # Test paging
+        print("\n3. Testing fetch_result paging...")
+        short = store.put(text[:100])
+        for blob, length in [(short, 1), (short, 2), (short, 3), (short, 4), (short, 5),
+                             (handle["handle"], 4096)]:
+            blob_data = store.get(blob)
+            for offset in (0, 1, 2, 3):
+                content = _page(store, blob, offset, length)
+                start = offset
+                while start < len(blob_data) and blob_data[start] & 0xC0 == 0x80:
+                    start += 1
+                assert content == blob_data[start:].decode("utf-8"), (length, offset)
+        print("   Every slice length and start offset reassembles the result")
+        last = MCPTools.fetch_result(handle["handle"], len(data), 10, store)
+        assert last["content"] == "" and last["next_offset"] is None
+
+        # Test bad handles
+        print("\n4. Testing unknown and invalid handles...")
+        unknown = MCPTools.fetch_result("0" * 64, 0, 10, store)
+        invalid = MCPTools.fetch_result("../../etc/passwd", 0, 10, store)
+        print(f"   Unknown: {unknown['error']}")
+        print(f"   Invalid: {invalid['error']}")
+        assert not unknown["success"] and not invalid["success"]
+
+        # Test dispatch through the server; slices are never offloaded themselves
+        print("\n5. Testing fetch_result through the server...")
+        sliced = app._run_tool("fetch_result", {"handle": handle["handle"], "length": RESULT_OFFLOAD_BYTES}, 0)
+        assert "offloaded" not in sliced and sliced["content"] == text[:len(sliced["content"])]
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_offload()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Test tool profiling: capture triggers, the slow threshold and heap snapshots."""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.profiling import ToolProfiler
+
+
+def _index(directory: Path) -> list:
+    path = directory / "index.jsonl"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_profiling():
+    """Arm a private profiler and check which calls leave captures behind."""
+    print("=" * 50)
+    print("Testing Tool Profiling")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "profiles"
+        profiler = ToolProfiler(directory)
+        assert not profiler.active and profiler._claim("calculator") is None
+
+        # Test the next-N countdown and the tool filter
+        print("\n1. Testing the next N calls of selected tools are claimed...")
+        profiler.arm(calls=2, tools=["calculator"])
+        claims = [profiler._claim(tool) for tool in ("read_file", "calculator", "read_file", "calculator",
+                                                     "calculator")]
+        print(f"   Claims: {claims}")
+        assert claims == [None, "next_n", None, "next_n", None]
+        assert not profiler.active and profiler.status()["next_calls"] == 0
+
+        profiler.arm(calls=1, slow_threshold=1.0)
+        assert [profiler._claim("read_file") for _ in range(3)] == ["next_n", "slow", "slow"]
+        profiler.disarm()
+        assert profiler._claim("read_file") is None
+
+        # Test a claimed call is written
+        print("\n2. Testing a capture is written...")
+        profiler.arm(calls=1)
+        with profiler.capture("calculator"):
+            sum(range(10000))
+        with profiler.capture("calculator"):
+            pass
+        records = _index(directory)
+        print(f"   {[(r['tool'], r['reason']) for r in records]}")
+        assert len(records) == 1 and records[0]["reason"] == "next_n" and records[0]["top_functions"]
+        assert Path(records[0]["profile"]).exists() and "heap" not in records[0]
+        assert profiler.recent == records
+
+        # Test the slow threshold
+        print("\n3. Testing only calls over the slow threshold are kept...")
+        profiler.arm(slow_threshold=0.1)
+        with profiler.capture("list_files"):
+            pass
+        with profiler.capture("list_files"):
+            time.sleep(0.15)
+        slow = _index(directory)[1:]
+        print(f"   Kept: {[(r['tool'], r['duration_seconds']) for r in slow]}")
+        assert len(slow) == 1 and slow[0]["reason"] == "slow" and slow[0]["duration_seconds"] >= 0.1
+        assert profiler.active, "slow trigger disarmed itself"
+
+        # Test tracemalloc is shared by overlapping captures
+        print("\n4. Testing tracemalloc runs while any memory capture is open...")
+        assert not tracemalloc.is_tracing()
+        profiler.arm(calls=2, memory=True)
+        entered, release = threading.Event(), threading.Event()
+
+        def long_call():
+            with profiler.capture("read_file"):
+                entered.set()
+                release.wait(10)
+
+        thread = threading.Thread(target=long_call)
+        thread.start()
+        assert entered.wait(10)
+        with profiler.capture("read_file"):
+            data = [bytes(1000) for _ in range(1000)]
+        print(f"   After the first call ends: tracing={tracemalloc.is_tracing()}, "
+              f"users={profiler._tracemalloc_users}")
+        assert tracemalloc.is_tracing() and profiler._tracemalloc_users == 1, "stopped under a running capture"
+        release.set()
+        thread.join()
+        assert not tracemalloc.is_tracing() and profiler._tracemalloc_users == 0
+
+        heaps = [r for r in _index(directory) if "heap" in r]
+        print(f"   Heap growth of the allocating call: {max(r['heap_growth_bytes'] for r in heaps)} bytes")
+        assert len(heaps) == 2 and all(Path(r["heap"]).exists() for r in heaps)
+        assert max(r["heap_growth_bytes"] for r in heaps) >= len(data) * 1000
+        snapshot = tracemalloc.Snapshot.load(heaps[0]["heap"])
+        assert snapshot.traceback_limit > 1
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_profiling()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test the LLM response cache: keys, hits, LRU eviction and reloading from disk."""
+
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.response_cache import ResponseCache, tools_hash
+
+
+def test_response_cache():
+    """Fill a small cache past its budget and check what survives."""
+    print("=" * 50)
+    print("Testing Response Cache")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "llm_cache"
+
+        # Test keys
+        print("\n1. Testing make_key...")
+        messages = [{"role": "user", "content": "What is 2 + 2?"}]
+        key = ResponseCache.make_key("model", messages, None)
+        same = ResponseCache.make_key("model", [{"role": "user", "content": "  What is 2 + 2?\n"}], None)
+        tools = [{"function": {"name": "b"}}, {"function": {"name": "a"}}]
+        with_tools = ResponseCache.make_key("model", messages, tools_hash(tools))
+        print(f"   Key: {key[:16]}...")
+        assert key == same, "surrounding whitespace should not change the key"
+        assert with_tools != key and tools_hash(tools) == tools_hash(tools[::-1])
+
+        # Test hits and misses
+        print("\n2. Testing get and put...")
+        cache = ResponseCache(directory, max_bytes=1000)
+        assert cache.get(key) is None
+        cache.put(key, {"message": {"role": "assistant", "content": "4"}})
+        assert cache.get(key)["message"]["content"] == "4"
+        print(f"   Stats: {cache.stats()}")
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+        # Test eviction
+        print("\n3. Testing LRU eviction...")
+        cache.clear()
+        keys = [f"{i:02d}" + "0" * 62 for i in range(10)]
+        for i, entry_key in enumerate(keys):
+            cache.put(entry_key, {"content": str(i) * 150})
+            # Touch the first entry so it stays the most recently used
+            if i:
+                time.sleep(0.01)
+                assert cache.get(keys[0]) is not None
+        stats = cache.stats()
+        print(f"   Stats: {stats}")
+        assert stats["bytes"] <= 1000 and stats["evictions"] > 0
+        assert cache.get(keys[0]) is not None, "recently read entry was evicted"
+        assert cache.get(keys[1]) is None, "least recently used entry survived"
+        assert cache.get(keys[-1]) is not None
+
+        # Test reloading the index from disk
+        print("\n4. Testing a new instance sees the same entries...")
+        on_disk = sum(f.stat().st_size for f in directory.rglob("*.json"))
+        reloaded = ResponseCache(directory, max_bytes=1000)
+        print(f"   Entries: {reloaded.stats()['entries']}, {on_disk} bytes on disk")
+        assert reloaded.stats()["bytes"] == on_disk == stats["bytes"]
+        assert reloaded.get(keys[-1]) is not None
+        assert not list(directory.rglob("*.tmp")), "temp files left behind"
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_response_cache()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Test semantic retrieval with the offline hash embedder."""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.retrieval import HashEmbedder, SemanticIndex, chunk_text
+from src.tools import MCPTools
+
+
+def test_retrieval():
+    """Index a small tree and check that search finds the right snippet."""
+    print("=" * 50)
+    print("Testing Semantic Retrieval")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "docs"
+        root.mkdir()
+        (root / "cooking.txt").write_text("How to bake bread with flour, yeast and water.\n" * 3)
+        (root / "network.txt").write_text("Configure the firewall to allow port 8000 traffic.\n" * 3)
+
+        # Test chunking
+        print("\n1. Testing chunk_text...")
+        chunks = chunk_text("\n".join(f"line {i}" for i in range(100)), chunk_lines=40, overlap=5)
+        print(f"   Chunks: {[(start, end) for start, end, _ in chunks]}")
+        assert chunks[0][:2] == (1, 40) and chunks[-1][1] == 100
+
+        # Test indexing
+        print("\n2. Testing index_path...")
+        index = SemanticIndex(HashEmbedder(dim=256), Path(tmp) / "index")
+        stats = index.index_path(str(root))
+        print(f"   Stats: {stats}")
+        assert stats["files_indexed"] == 2
+
+        # Test search
+        print("\n3. Testing search...")
+        results = index.search("firewall port", str(root), top_k=1)
+        print(f"   Top result: {results[0]['file']} (score {results[0]['score']})")
+        assert results[0]["file"].endswith("network.txt")
+
+        # Test incremental re-index from disk
+        print("\n4. Testing reload and incremental indexing...")
+        reloaded = SemanticIndex(HashEmbedder(dim=256), Path(tmp) / "index")
+        stats = reloaded.index_path(str(root))
+        print(f"   Stats: {stats}")
+        assert stats["files_unchanged"] == 2 and stats["chunks_embedded"] == 0
+
+        # Test invalid result counts
+        print("\n5. Testing top_k is validated...")
+        for top_k in (0, -1, 2.5, "3", True, None):
+            result = MCPTools.semantic_search("firewall port", str(root), top_k)
+            assert result["success"] is False and "top_k" in result["error"], top_k
+            try:
+                reloaded.search("firewall port", str(root), top_k)
+                raise AssertionError(f"search accepted top_k={top_k!r}")
+            except ValueError:
+                pass
+        print(f"   {result['error']}")
+        assert len(reloaded.search("firewall port", str(root), top_k=10)) == 2
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_retrieval()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Test the warm server pool: acquire/release, recycling, health checks and failed starts."""
+
+import sys
+import os
+import asyncio
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mcp import StdioServerParameters
+
+from src.mcp_client import _server_params
+from src.server_pool import MAX_FAILURE_BACKOFF, POOL_EVENTS, ServerPool
+
+
+class RecordingLoop:
+    """Event loop stand-in that records backoff delays and runs the callback right away."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.delays = []
+
+    def call_later(self, delay, callback, *args):
+        self.delays.append(delay)
+        return self.loop.call_later(0, callback, *args)
+
+
+def _timed_out(error: BaseException) -> bool:
+    """Whether a start failure is the start_timeout, possibly inside the SDK's exception groups."""
+    if isinstance(error, TimeoutError):
+        return True
+    return any(_timed_out(inner) for inner in getattr(error, "exceptions", ()))
+
+
+async def _wait_for(condition, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the pool"
+        await asyncio.sleep(0.05)
+
+
+async def _round_trip():
+    """Hand out a real server, recycle it, then retire it after max_uses."""
+    pool = ServerPool(_server_params(), size=1, max_uses=2, health_interval=0.3)
+    try:
+        # Test acquire
+        print("\n1. Testing acquire and release...")
+        member = await pool.acquire()
+        result = await member.session.call_tool("calculator", {"expression": "6 * 7"})
+        print(f"   Tools: {len(member.tools.tools)}, calculator: {result.content[0].text}")
+        assert member.tools.tools and "42" in result.content[0].text
+        assert pool.stats()["in_use"] == 1
+        pool.release(member)
+        print(f"   Stats after release: {pool.stats()}")
+        assert pool.stats() == {"size": 1, "idle": 1, "warming": 0, "in_use": 0, "processes": 1}
+
+        # Test health checks of idle members
+        print("\n2. Testing idle members are pinged...")
+        pings = POOL_EVENTS.value(event="health_ok")
+        await _wait_for(lambda: POOL_EVENTS.value(event="health_ok") > pings)
+        assert pool.stats()["idle"] == 1
+
+        # Test recycling
+        print("\n3. Testing the same server is handed out again...")
+        again = await pool.acquire()
+        assert again is member and again.uses == 1
+        pool.release(again)
+        print(f"   Retired after {again.uses} uses: {again.retired.is_set()}")
+        assert again.retired.is_set(), "member outlived max_uses"
+
+        # A replacement starts in the background
+        await _wait_for(lambda: pool.stats()["idle"] == 1)
+        replacement = await pool.acquire()
+        assert replacement is not member and replacement.uses == 0
+
+        # Test a session that saw errors gives its server up
+        pool.release(replacement, reusable=False)
+        assert replacement.retired.is_set()
+    finally:
+        await pool.close()
+    assert pool.stats()["processes"] == 0
+
+
+async def _failed_starts():
+    """Spawn a server that exits at once and check the backoff and suspension."""
+    broken = StdioServerParameters(command=sys.executable, args=["-c", "pass"])
+    pool = ServerPool(broken, size=1, health_interval=0, start_timeout=0.5,
+                      failure_backoff=10.0, max_failures=4)
+    await pool.start()
+    pool.loop = loop = RecordingLoop(pool.loop)
+    try:
+        # Test a failing spawn
+        print("\n4. Testing a server that never initializes...")
+        try:
+            await pool.acquire()
+            raise AssertionError("acquire() returned a server that failed to start")
+        except AssertionError:
+            raise
+        except Exception as e:
+            assert _timed_out(e), e
+            print("   acquire() failed with a timeout after start_timeout")
+
+        # Test the backoff and suspension
+        print("\n5. Testing backoff and suspension after max_failures...")
+        suspended = POOL_EVENTS.value(event="suspended")
+        await _wait_for(lambda: POOL_EVENTS.value(event="suspended") > suspended)
+        print(f"   Delays: {loop.delays}")
+        assert loop.delays == [10.0, 20.0, MAX_FAILURE_BACKOFF], "backoff doesn't double up to the cap"
+        await asyncio.sleep(1.0)
+        assert pool.stats()["processes"] == 0, "suspended pool kept starting servers"
+
+        # Test the next acquire() tries again
+        print("\n6. Testing acquire() resumes a suspended pool...")
+        spawned = POOL_EVENTS.value(event="spawned")
+        try:
+            await pool.acquire()
+            raise AssertionError("acquire() returned a server that failed to start")
+        except AssertionError:
+            raise
+        except Exception as e:
+            assert _timed_out(e), e
+        assert POOL_EVENTS.value(event="spawned") > spawned and pool._failures == 1
+    finally:
+        await pool.close()
+
+
+def test_server_pool():
+    """Run a pool of real servers and one of a broken server command."""
+    print("=" * 50)
+    print("Testing Server Pool")
+    print("=" * 50)
+
+    asyncio.run(_round_trip())
+    asyncio.run(_failed_starts())
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_server_pool()
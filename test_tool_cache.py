@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Test the client tool schema cache: keys, entries and invalidation on tool list changes."""
+
+import sys
+import os
+import asyncio
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import anyio
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mcp.types as types
+
+from src.mcp_client import MCPClient
+from src.mcp_server import MCPServerApp
+from src.tool_cache import TOOLS_HASH_CAPABILITY, ToolSchemaCache, schema_hash
+
+
+def _init_result(version: str, tools_hash: str = None) -> types.InitializeResult:
+    experimental = {TOOLS_HASH_CAPABILITY: {"sha256": tools_hash}} if tools_hash else None
+    return types.InitializeResult(
+        protocolVersion=types.LATEST_PROTOCOL_VERSION,
+        capabilities=types.ServerCapabilities(experimental=experimental),
+        serverInfo=types.Implementation(name="mcp-server", version=version),
+    )
+
+
+def _names(client: MCPClient) -> set:
+    return {tool["function"]["name"] for tool in client.tools}
+
+
+async def _wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.05)
+
+
+async def _connect(port: int, directory: Path) -> MCPClient:
+    client = MCPClient(use_cache=False, server_address=("127.0.0.1", port))
+    client.tool_cache = ToolSchemaCache(directory)
+    await client.connect()
+    return client
+
+
+async def _list_changed(directory: Path):
+    """Serve over TCP, change the tool list and watch connected and new clients follow."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    app = MCPServerApp()
+    definitions = list(app.tool_definitions)
+    server = asyncio.create_task(app.run_socket("127.0.0.1", port))
+    clients = []
+    try:
+        async def listening() -> bool:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                return False
+            writer.close()
+            return True
+
+        deadline = time.monotonic() + 10
+        while not await listening():
+            assert time.monotonic() < deadline, "server did not start"
+            await asyncio.sleep(0.05)
+
+        # Test tools/list_changed reaches a connected client
+        print("\n5. Testing tools/list_changed reaches a connected client...")
+        first = await _connect(port, directory)
+        clients.append(first)
+        assert "system_info" in _names(first) and first.tool_cache.stats()["misses"] == 1
+        await app.set_tool_definitions([d for d in definitions if d["name"] != "system_info"])
+        await _wait_for(lambda: "system_info" not in _names(first))
+        print(f"   Client now has {len(first.tools)} tools")
+
+        # Test a new client doesn't get the old list from the cache
+        print("\n6. Testing a client connecting after the change misses the old entry...")
+        second = await _connect(port, directory)
+        clients.append(second)
+        print(f"   Stats: {second.tool_cache.stats()}, {len(list(directory.glob('*.json')))} entries")
+        assert "system_info" not in _names(second) and second.tool_cache.stats()["misses"] == 1
+        assert len(list(directory.glob("*.json"))) == 2
+
+        # Test the background refresh corrects a stale entry
+        print("\n7. Testing a stale entry is corrected after a cache hit...")
+        stale = [tool for tool in first.tools if tool["function"]["name"] != "calculator"]
+        second.tool_cache.put(second._tool_cache_key, stale)
+        third = await _connect(port, directory)
+        clients.append(third)
+        await _wait_for(lambda: third.tool_cache.stale == 1)
+        print(f"   Stats: {third.tool_cache.stats()}")
+        assert third.tool_cache.stats()["hits"] == 1 and "calculator" in _names(third)
+        assert "calculator" in {tool["function"]["name"] for tool in third.tool_cache.get(third._tool_cache_key)}
+    finally:
+        # Opened in this task, so their cancel scopes nest: close the last one first
+        for client in reversed(clients):
+            await client.close()
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+
+
+def test_tool_cache():
+    """Change the server's tool list and check the cache key follows it."""
+    print("=" * 50)
+    print("Testing Tool Schema Cache")
+    print("=" * 50)
+
+    # Test the tool list hash
+    print("\n1. Testing schema_hash...")
+    app = MCPServerApp()
+    definitions = app.tool_definitions
+    print(f"   Hash of {len(definitions)} tools: {app.tools_hash}")
+    assert app.tools_hash == schema_hash([dict(d) for d in definitions])
+
+    # Test keys
+    print("\n2. Testing make_key...")
+    key = ToolSchemaCache.make_key(_init_result("1.0", app.tools_hash))
+    assert key == ToolSchemaCache.make_key(_init_result("1.0", app.tools_hash))
+    assert key != ToolSchemaCache.make_key(_init_result("1.1", app.tools_hash)), "new version reused the key"
+    assert key != ToolSchemaCache.make_key(_init_result("1.0")), "advertised hash ignored"
+    print(f"   Key: {key}")
+
+    # Test invalidation when the server's tool list changes
+    print("\n3. Testing a changed tool list changes the key...")
+    anyio.run(app.set_tool_definitions, definitions[:-1])
+    changed = ToolSchemaCache.make_key(_init_result("1.0", app.tools_hash))
+    print(f"   Without {definitions[-1]['name']}: {changed}")
+    assert changed != key
+    anyio.run(app.set_tool_definitions, definitions)
+    assert ToolSchemaCache.make_key(_init_result("1.0", app.tools_hash)) == key
+
+    # Test entries
+    print("\n4. Testing get and put...")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ToolSchemaCache(Path(tmp) / "tool_cache")
+        tools = [{"type": "function", "function": {"name": "calculator", "parameters": {}}}]
+        assert cache.get(key) is None
+        cache.put(key, tools)
+        assert cache.get(key) == tools and cache.get(changed) is None
+        (Path(tmp) / "tool_cache" / f"{changed}.json").write_text("{not json")
+        assert cache.get(changed) is None, "unreadable entry was returned"
+        print(f"   Stats: {cache.stats()}")
+        assert cache.stats() == {"hits": 1, "misses": 3, "stale": 0}
+        assert not list((Path(tmp) / "tool_cache").glob("*.tmp")), "temp files left behind"
+
+        # Clients in one process may store the same entry at the same time
+        writers = [threading.Thread(target=cache.put, args=(key, tools * n)) for n in range(1, 17)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        assert len(cache.get(key)) in range(1, 17) and not list((Path(tmp) / "tool_cache").glob("*.tmp"))
+
+        asyncio.run(_list_changed(Path(tmp) / "clients"))
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_tool_cache()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Test per-message tool selection: BM25 ranking, fallbacks and embedding blending."""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.retrieval import HashEmbedder
+from src.tool_selection import (PROMPT_TOKENS_SAVED, TOOLS_OFFERED, ToolSelector, create_selector,
+                                estimate_tokens, tokenize)
+from src.tools import INTERNAL_TOOLS, TOOL_DEFINITIONS
+
+
+class BrokenEmbedder:
+    """Embedder whose backend is down."""
+
+    def embed(self, texts):
+        raise ConnectionError("embedding backend unreachable")
+
+
+def _names(tools) -> list:
+    return [tool["function"]["name"] for tool in tools]
+
+
+def test_tool_selection():
+    """Rank the server's own tools against a few typical messages."""
+    print("=" * 50)
+    print("Testing Tool Selection")
+    print("=" * 50)
+
+    # Same conversion as the client's _convert_tools
+    tools = [
+        {"type": "function",
+         "function": {"name": d["name"], "description": d["description"], "parameters": d["inputSchema"]}}
+        for d in TOOL_DEFINITIONS if d["name"] not in INTERNAL_TOOLS
+    ]
+
+    # Test tokenizing
+    print("\n1. Testing tokenize...")
+    print(f"   {tokenize('Please calculate the files in read_file')}")
+    assert tokenize("calculate") == tokenize("calculator") and tokenize("files") == tokenize("file")
+    assert tokenize("What is the time?") == tokenize("time")
+
+    # Test ranking
+    print("\n2. Testing keyword selection...")
+    selector = ToolSelector(tools, top_k=3, always=["fetch_result"])
+    for message, expected in [("read the file notes.txt", "read_file"),
+                              ("what time is it", "get_current_time"),
+                              ("run the command ls -la", "execute_command"),
+                              ("create a directory called out", "create_directory")]:
+        selected = _names(selector.select(message))
+        print(f"   {message!r}: {selected}")
+        assert expected in selected and "fetch_result" in selected
+        assert len(selected) <= 4 and selected == [n for n in _names(tools) if n in selected], "order changed"
+    scores = selector.keyword_scores("read the file notes.txt")
+    assert max(range(len(tools)), key=scores.__getitem__) == _names(tools).index("read_file")
+
+    # Test the fallback to every tool
+    print("\n3. Testing a message matching nothing offers every tool...")
+    assert selector.select("hello there") == tools
+    assert ToolSelector(tools[:2], top_k=3).select("what time is it") == tools[:2]
+    saved = estimate_tokens(tools) - estimate_tokens(selector.select("what time is it"))
+    print(f"   Offering 2 tools instead of {len(tools)} saves ~{saved} prompt tokens")
+    assert saved > 0
+
+    # Test blending with embeddings
+    print("\n4. Testing embedding similarity...")
+    blended = ToolSelector(tools, top_k=3, embedder=HashEmbedder())
+    selected = _names(blended.select("calculate 2+2"))
+    print(f"   'calculate 2+2': {selected}")
+    assert selected[0] == "calculator"
+    assert all(0.0 <= score <= 1.0 for score in blended.scores("calculate 2+2"))
+
+    # Test an embedder that fails
+    print("\n5. Testing a failing embedder falls back to keywords...")
+    fallback = ToolSelector(tools, top_k=3, embedder=BrokenEmbedder())
+    assert fallback.scores("what time is it") == selector.keyword_scores("what time is it")
+    assert fallback.embedder is None, "failed embedder kept in use"
+
+    # Test the metrics
+    print("\n6. Testing offered tools and saved tokens are recorded...")
+    saved_before = PROMPT_TOKENS_SAVED.value()
+    offered_before = TOOLS_OFFERED.snapshot().get("{}", {}).get("count", 0)
+    selected = selector.select("what time is it")
+    selector.select("hello there")
+    print(f"   Saved ~{PROMPT_TOKENS_SAVED.value() - saved_before:g} tokens over 2 requests")
+    assert PROMPT_TOKENS_SAVED.value() - saved_before == estimate_tokens(tools) - estimate_tokens(selected)
+    assert TOOLS_OFFERED.snapshot()["{}"]["count"] == offered_before + 2
+
+    # Test the default selector
+    default = create_selector(tools)
+    assert default.tools == tools and default.top_k > 0
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_tool_selection()
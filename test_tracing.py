@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Test tracing: traceparent propagation, span nesting and the span exporters."""
+
+import sys
+import os
+import asyncio
+import json
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import src.mcp_client as mcp_client
+from src.mcp_client import MCPClient
+from src.mcp_server import MCPServerApp
+from src.tracing import (JsonlSpanExporter, OtlpHttpExporter, SpanContext, Tracer, folded_stacks,
+                         run_collector)
+
+
+class ListExporter:
+    """Keeps exported spans in memory."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _call_through_server(client_tracer: Tracer, server_tracer: Tracer):
+    """Call a tool from a traced client on a traced in-process TCP server."""
+    port = _free_port()
+    app = MCPServerApp()
+    app._tracer = server_tracer
+    server = asyncio.create_task(app.run_socket("127.0.0.1", port))
+    original = mcp_client.tracer
+    mcp_client.tracer = client_tracer
+    client = None
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                break
+            except OSError:
+                assert time.monotonic() < deadline, "server did not start"
+                await asyncio.sleep(0.05)
+        client = MCPClient(use_cache=False, server_address=("127.0.0.1", port))
+        client.tool_cache = None
+        await client.connect()
+        return await client.call_tool("calculator", {"expression": "6 * 7"})
+    finally:
+        mcp_client.tracer = original
+        if client is not None:
+            await client.close()
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+
+
+def test_tracing():
+    """Trace in-process, across a real MCP session and through both exporters."""
+    print("=" * 50)
+    print("Testing Tracing")
+    print("=" * 50)
+
+    # Test traceparent strings
+    print("\n1. Testing traceparent parsing...")
+    context = SpanContext("a" * 32, "b" * 16)
+    print(f"   {context.to_traceparent()}")
+    parsed = SpanContext.from_traceparent(context.to_traceparent())
+    assert (parsed.trace_id, parsed.span_id) == ("a" * 32, "b" * 16)
+    for bad in (None, "", "garbage", "00-abc-def-01", f"00-{'a' * 32}-{'b' * 15}-01"):
+        assert SpanContext.from_traceparent(bad) is None, bad
+    assert Tracer.extract(None) is None and Tracer.extract({"other": "x"}) is None
+
+    # Test nesting in one process
+    print("\n2. Testing parent/child linking...")
+    exporter = ListExporter()
+    tracer = Tracer("test", enabled=True, exporter=exporter)
+    with tracer.span("root", {"n": 1}) as root:
+        carrier = tracer.inject()
+        with tracer.span("child"):
+            pass
+        try:
+            with tracer.span("failing"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+    with tracer.span("remote", parent=Tracer.extract(carrier)):
+        pass
+    with tracer.span("other root"):
+        pass
+    tracer.shutdown()
+    spans = {span["name"]: span for span in exporter.spans}
+    for span in exporter.spans:
+        print(f"   {span['name']}: parent={span['parent_span_id']} status={span['status']}")
+    assert carrier == {"traceparent": root.context.to_traceparent()}
+    assert spans["root"]["parent_span_id"] is None and spans["root"]["attributes"] == {"n": 1}
+    for name in ("child", "failing", "remote"):
+        assert spans[name]["parent_span_id"] == root.context.span_id, name
+        assert spans[name]["trace_id"] == root.context.trace_id, name
+    assert spans["failing"]["status"] == "ERROR" and spans["failing"]["attributes"]["exception.type"] == "ValueError"
+    assert spans["other root"]["trace_id"] != root.context.trace_id
+    names = [span["name"] for span in exporter.spans]
+    assert names.index("root") > names.index("failing"), "parent ended before its children"
+
+    # Test a disabled tracer
+    disabled = Tracer("test", enabled=False, exporter=exporter)
+    with disabled.span("ignored") as span:
+        span.set_attribute("x", 1)
+        assert disabled.inject() == {}
+    assert disabled._thread is None
+
+    # Test propagation through the request _meta
+    print("\n3. Testing the server span is a child of the client span...")
+    client_spans, server_spans = ListExporter(), ListExporter()
+    client_tracer = Tracer("mcp-client", enabled=True, exporter=client_spans)
+    server_tracer = Tracer("mcp-server", enabled=True, exporter=server_spans)
+    result = asyncio.run(_call_through_server(client_tracer, server_tracer))
+    client_tracer.shutdown()
+    server_tracer.shutdown()
+    assert result["success"] and result["result"] == 42
+    client_span = next(s for s in client_spans.spans if s["name"] == "mcp_client.call_tool")
+    server_span = next(s for s in server_spans.spans if s["name"] == "mcp_server.call_tool")
+    print(f"   Client span {client_span['span_id']} -> server span parent {server_span['parent_span_id']}")
+    assert server_span["parent_span_id"] == client_span["span_id"]
+    assert server_span["trace_id"] == client_span["trace_id"]
+    assert server_span["service"] == "mcp-server" and server_span["attributes"]["tool"] == "calculator"
+
+    stacks = folded_stacks(client_spans.spans + server_spans.spans)
+    print(f"   {[line for line in stacks if 'mcp_server.call_tool' in line]}")
+    assert any(line.startswith("mcp-client:mcp_client.call_tool;mcp-server:mcp_server.call_tool ")
+               for line in stacks)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Test the JSONL exporter
+        print("\n4. Testing the JSONL exporter...")
+        path = Path(tmp) / "traces" / "spans.jsonl"
+        jsonl = JsonlSpanExporter(path)
+        jsonl.export(exporter.spans[:2])
+        jsonl.export(exporter.spans[2:])
+        lines = path.read_text().splitlines()
+        print(f"   {len(lines)} lines in {path.name}")
+        assert [json.loads(line) for line in lines] == exporter.spans
+
+        # Test the OTLP exporter against the stand-in collector
+        print("\n5. Testing the OTLP exporter...")
+        port = _free_port()
+        collected = Path(tmp) / "collected.jsonl"
+        threading.Thread(target=run_collector, args=(port, collected), daemon=True).start()
+        otlp = OtlpHttpExporter(f"http://127.0.0.1:{port}/")
+        assert otlp.url == f"http://127.0.0.1:{port}/v1/traces"
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                otlp.export(exporter.spans)
+                break
+            except OSError:
+                assert time.monotonic() < deadline, "collector did not start"
+                time.sleep(0.05)
+        received = [json.loads(line) for line in collected.read_text().splitlines()]
+        print(f"   Collector received {len(received)} spans")
+        assert received == exporter.spans, "spans changed on the way through OTLP"
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_tracing()
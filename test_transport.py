@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""Test cancellation and recovery: the notification filter, timeouts and reconnects."""
+
+import sys
+import os
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import anyio
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mcp.types as types
+
+import src.mcp_client as mcp_client
+from src.mcp_client import (RECONNECTS, TOOL_RETRIES, CancelledNotification, CancelledNotificationParams,
+                            MCPClient)
+from src.mcp_server import TOOL_CALLS, MCPServerApp
+from src.transport import CANCELLED_METHOD, filter_cancellations
+
+
+def _notification(method: str, params: dict = None) -> types.JSONRPCMessage:
+    return types.JSONRPCMessage(types.JSONRPCNotification(jsonrpc="2.0", method=method, params=params))
+
+
+def _request(request_id: int) -> types.JSONRPCMessage:
+    return types.JSONRPCMessage(types.JSONRPCRequest(
+        jsonrpc="2.0", id=request_id, method="tools/call", params={"name": "calculator"}))
+
+
+async def _filter(messages: list) -> tuple:
+    """Send messages through filter_cancellations; return (passed through, cancellations)."""
+    cancelled = []
+    writer, reader = anyio.create_memory_object_stream(len(messages))
+    async with writer:
+        for message in messages:
+            await writer.send(message)
+    received = []
+    with anyio.fail_after(5):
+        async with filter_cancellations(reader, lambda *args: cancelled.append(args)) as filtered:
+            async for message in filtered:
+                received.append(message)
+    return received, cancelled
+
+
+class HeldTools:
+    """Wraps a server's _run_tool so the next call of a tool waits until the test releases it."""
+
+    def __init__(self, app: MCPServerApp):
+        self.app = app
+        self.run_tool = app._run_tool
+        self.held = {}
+        self.running = {}
+        app._run_tool = self
+
+    def hold(self, name: str) -> threading.Event:
+        gate = self.held[name] = threading.Event()
+        return gate
+
+    def __call__(self, name, arguments, submitted, permit=None):
+        gate = self.held.pop(name, None)
+        if gate is not None:
+            # Worker threads run in a copy of the request's context
+            self.running[name] = self.app.server.request_context.request_id
+            gate.wait(10)
+            self.running.pop(name, None)
+        return self.run_tool(name, arguments, submitted, permit)
+
+
+class DroppingProxy:
+    """TCP proxy in front of the server whose open connections can be cut."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.writers = []
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.writers += [writer, upstream_writer]
+        await asyncio.gather(self._pipe(reader, upstream_writer), self._pipe(upstream_reader, writer))
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def drop(self):
+        for writer in self.writers:
+            writer.close()
+        self.writers.clear()
+
+
+async def _wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.05)
+
+
+async def _connect(port: int) -> MCPClient:
+    client = MCPClient(use_cache=False, server_address=("127.0.0.1", port))
+    client.tool_cache = None
+    await client.connect()
+    return client
+
+
+async def _drop_when_running(proxy: DroppingProxy, held: HeldTools, name: str):
+    await _wait_for(lambda: name in held.running)
+    proxy.drop()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _recovery():
+    """Serve over TCP with tools held on the server and check how the client recovers."""
+    port = _free_port()
+    app = MCPServerApp()
+    held = HeldTools(app)
+    server = asyncio.create_task(app.run_socket("127.0.0.1", port))
+    proxy = DroppingProxy(port)
+    clients = []
+    gates = []
+    call_timeout = mcp_client.MCP_CALL_TIMEOUT
+    try:
+        async def listening() -> bool:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                return False
+            writer.close()
+            return True
+
+        deadline = time.monotonic() + 10
+        while not await listening():
+            assert time.monotonic() < deadline, "server did not start"
+            await asyncio.sleep(0.05)
+        client = await _connect(port)
+        clients.append(client)
+
+        # Test the server stops waiting for a cancelled call
+        print("\n5. Testing the server answers a cancelled call without waiting for the tool...")
+        gates.append(held.hold("calculator"))
+        call = asyncio.ensure_future(client._call_tool_request("calculator", {"expression": "6 * 7"}))
+        await _wait_for(lambda: "calculator" in held.running)
+        request_id = held.running["calculator"]
+        cancelled = TOOL_CALLS.value(tool="calculator", status="cancelled")
+        await client.session.send_notification(CancelledNotification(
+            method=CANCELLED_METHOD,
+            params=CancelledNotificationParams(requestId=request_id, reason="test")
+        ))
+        result = json.loads((await asyncio.wait_for(call, 5)).content[0].text)
+        print(f"   {result}")
+        assert result == {"success": False, "error": "Cancelled by client", "error_type": "cancelled"}
+        assert TOOL_CALLS.value(tool="calculator", status="cancelled") == cancelled + 1
+        assert "calculator" in held.running, "tool finished before the response"
+        gates[-1].set()
+
+        # Test a timed out idempotent call is cancelled and retried on the same session
+        print("\n6. Testing a client timeout cancels the call and retries an idempotent tool...")
+        mcp_client.MCP_CALL_TIMEOUT = 0.5
+        gates.append(held.hold("calculator"))
+        session = client.session
+        cancelled = TOOL_CALLS.value(tool="calculator", status="cancelled")
+        retries = TOOL_RETRIES.value(tool="calculator")
+        result = await client.call_tool("calculator", {"expression": "6 * 7"})
+        print(f"   {result}")
+        assert result["success"] and "42" in json.dumps(result)
+        assert not gates[-1].is_set(), "retry waited for the timed out call"
+        assert TOOL_CALLS.value(tool="calculator", status="cancelled") == cancelled + 1
+        assert TOOL_RETRIES.value(tool="calculator") == retries + 1
+        assert client.session is session, "reconnected although the server answered ping"
+        gates[-1].set()
+
+        # Test a timed out call of a tool with side effects isn't repeated
+        print("\n7. Testing a timed out non-idempotent call is not retried...")
+        gates.append(held.hold("execute_command"))
+        retries = TOOL_RETRIES.value(tool="execute_command")
+        result = await client.call_tool("execute_command", {"command": "echo hi"})
+        print(f"   {result}")
+        assert result["success"] is False and result["error_type"] == "timeout"
+        assert TOOL_RETRIES.value(tool="execute_command") == retries
+        gates[-1].set()
+        mcp_client.MCP_CALL_TIMEOUT = call_timeout
+
+        # Test a dropped connection is replaced and an idempotent call retried
+        print("\n8. Testing a lost connection reconnects and retries an idempotent tool...")
+        proxy_client = await _connect(await proxy.start())
+        clients.append(proxy_client)
+        session = proxy_client.session
+        reconnects = RECONNECTS.value(reason="disconnected", outcome="ok")
+        gates.append(held.hold("calculator"))
+        # The client reconnects in the task that opened it, so the connection is cut from another
+        dropper = asyncio.create_task(_drop_when_running(proxy, held, "calculator"))
+        result = await proxy_client.call_tool("calculator", {"expression": "6 * 7"})
+        await dropper
+        print(f"   {result}")
+        assert result["success"] and proxy_client.session is not session
+        assert RECONNECTS.value(reason="disconnected", outcome="ok") == reconnects + 1
+
+        # Test a tool with side effects reports the lost connection instead
+        gates.append(held.hold("execute_command"))
+        dropper = asyncio.create_task(_drop_when_running(proxy, held, "execute_command"))
+        result = await proxy_client.call_tool("execute_command", {"command": "echo hi"})
+        await dropper
+        print(f"   {result['error_type']}: {result['error']}")
+        assert result["success"] is False and result["error_type"] == "disconnected"
+        assert RECONNECTS.value(reason="disconnected", outcome="ok") == reconnects + 2
+        result = await proxy_client.call_tool("calculator", {"expression": "1 + 1"})
+        assert result["success"], "reconnected session not usable"
+    finally:
+        mcp_client.MCP_CALL_TIMEOUT = call_timeout
+        for gate in gates:
+            gate.set()
+        # Opened in this task, so their cancel scopes nest: close the last one first
+        for client in reversed(clients):
+            await client.close()
+        if hasattr(proxy, "server"):
+            proxy.server.close()
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+
+
+def test_transport():
+    """Filter cancellations, then cancel, time out and drop calls against a real server."""
+    print("=" * 50)
+    print("Testing Cancellation and Recovery")
+    print("=" * 50)
+
+    # Test cancellations are taken out
+    print("\n1. Testing cancellations reach on_cancel...")
+    initialized = _notification("notifications/initialized")
+    bad = ValueError("invalid JSON")
+    messages = [
+        _request(1),
+        _notification(CANCELLED_METHOD, {"requestId": 1, "reason": "user pressed Ctrl+C"}),
+        initialized,
+        bad,
+        _notification(CANCELLED_METHOD, {"requestId": "abc"}),
+        _request(2),
+    ]
+    received, cancelled = anyio.run(_filter, messages)
+    print(f"   Cancelled: {cancelled}")
+    assert cancelled == [(1, "user pressed Ctrl+C"), ("abc", None)]
+
+    # Test everything else passes through in order
+    print("\n2. Testing other messages pass through in order...")
+    print(f"   Passed through: {len(received)} of {len(messages)}")
+    assert received == [messages[0], initialized, bad, messages[5]]
+
+    # Test a cancellation without params
+    print("\n3. Testing a cancellation without params...")
+    received, cancelled = anyio.run(_filter, [_notification(CANCELLED_METHOD)])
+    print(f"   Cancelled: {cancelled}")
+    assert received == [] and cancelled == [(None, None)]
+
+    # Test the filter doesn't hold back messages while waiting for more
+    print("\n4. Testing messages are forwarded before the stream ends...")
+
+    async def forwarded_while_open():
+        writer, reader = anyio.create_memory_object_stream(10)
+        async with writer, filter_cancellations(reader, lambda *args: None) as filtered:
+            await writer.send(_request(3))
+            with anyio.fail_after(5):
+                return await filtered.receive()
+
+    message = anyio.run(forwarded_while_open)
+    assert message.root.id == 3
+
+    asyncio.run(_recovery())
+
+    print("\n" + "=" * 50)
+    print("All tests completed!")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    test_transport()